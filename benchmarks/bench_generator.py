@@ -0,0 +1,85 @@
+"""
+Benchmark: end-to-end ``generate_server`` time and peak memory on synthetic
+specs of growing size, to check that both scale linearly with the number of
+operations. Two incremental reruns are reported separately: one on the
+unchanged spec, which stops at the manifest, and one after a single operation
+changed, which renders only that operation.
+
+Run from the repository root:
+
+    python benchmarks/bench_generator.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mcpgen.generator import generate_server  # noqa: E402
+
+SIZES = (1000, 5000, 10000)
+
+
+def synthetic_spec(operations):
+    paths = {}
+    for index in range(operations):
+        paths[f"/v1/resources{index}/{{resource_id}}"] = {
+            "parameters": [{"$ref": "#/components/parameters/ResourceId"}],
+            "get": {
+                "operationId": f"get-resource-{index}",
+                "summary": f"Get resource {index}",
+                "tags": [f"group{index % 50}"],
+                "parameters": [{"name": "expand", "in": "query", "schema": {"type": "string"}}],
+                "responses": {"200": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Resource"}}}}},
+            },
+        }
+    return {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": paths,
+        "components": {
+            "parameters": {"ResourceId": {"name": "resource_id", "in": "path", "required": True, "schema": {"type": "string"}}},
+            "schemas": {"Resource": {"type": "object", "properties": {"id": {"type": "string"}, "name": {"type": "string"}}}},
+        },
+    }
+
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in SIZES:
+            spec_path = os.path.join(workdir, f"spec_{size}.json")
+            with open(spec_path, "w") as f:
+                json.dump(synthetic_spec(size), f)
+            output = os.path.join(workdir, f"out_{size}")
+
+            started = time.perf_counter()
+            generate_server(spec_path, output)
+            elapsed = time.perf_counter() - started
+
+            # Forced, so that the manifest of the first run is not reused
+            tracemalloc.start()
+            generate_server(spec_path, output, force=True)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            started = time.perf_counter()
+            generate_server(spec_path, output)
+            rerun = time.perf_counter() - started
+
+            spec = synthetic_spec(size)
+            spec["paths"]["/v1/resources0/{resource_id}"]["get"]["summary"] = "Changed"
+            with open(spec_path, "w") as f:
+                json.dump(spec, f)
+            started = time.perf_counter()
+            generate_server(spec_path, output)
+            changed = time.perf_counter() - started
+            print(f"{size:>6} operations: {elapsed * 1000:8.1f} ms, peak {peak / 1e6:6.1f} MB "
+                  f"({elapsed / size * 1e6:.1f} us/operation); unchanged rerun {rerun * 1000:6.1f} ms, "
+                  f"one operation changed {changed * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
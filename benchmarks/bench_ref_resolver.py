@@ -0,0 +1,108 @@
+"""
+Benchmark: $ref resolution of a synthetic 5k-schema spec, naive deep-copy
+inlining vs. the memoizing resolver in ``mcpgen.resolver``.
+
+The spec has layers of object schemas that each reference two schemas of the
+next layer, a self-referencing tree schema, and operations whose request and
+response bodies reference the top layer. Run from the repository root:
+
+    python benchmarks/bench_ref_resolver.py
+"""
+
+import copy
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from mcpgen.resolver import resolve_spec  # noqa: E402
+
+LAYERS = 4
+PER_LAYER = 1250
+OPERATIONS = 1000
+
+
+def ref(name):
+    return {"$ref": f"#/components/schemas/{name}"}
+
+
+def synthetic_spec(seed=0):
+    rng = random.Random(seed)
+    schemas = {"Tree": {"type": "object", "properties": {"children": {"type": "array", "items": ref("Tree")}}}}
+    for layer in range(LAYERS):
+        for index in range(PER_LAYER):
+            properties = {f"field_{n}": {"type": "string", "description": f"Field {n}"} for n in range(4)}
+            if layer + 1 < LAYERS:
+                properties["left"] = ref(f"S{layer + 1}_{rng.randrange(PER_LAYER)}")
+                properties["right"] = ref(f"S{layer + 1}_{rng.randrange(PER_LAYER)}")
+            else:
+                properties["tree"] = ref("Tree")
+            schemas[f"S{layer}_{index}"] = {"type": "object", "properties": properties}
+
+    paths = {}
+    for index in range(OPERATIONS):
+        schema = ref(f"S0_{rng.randrange(PER_LAYER)}")
+        paths[f"/v1/items{index}/{{item_id}}"] = {
+            "post": {
+                "operationId": f"create_item_{index}",
+                "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "string"}}],
+                "requestBody": {"content": {"application/json": {"schema": schema}}},
+                "responses": {"200": {"content": {"application/json": {"schema": ref(f"S0_{rng.randrange(PER_LAYER)}")}}}},
+            }
+        }
+    return {"openapi": "3.0.0", "paths": paths, "components": {"schemas": schemas}}
+
+
+def naive_resolve_spec(spec):
+    """Inline every reference with a deep copy of its target; self-referencing schemas stay references."""
+    schemas = spec["components"]["schemas"]
+    recursive = {name for name, schema in schemas.items() if json.dumps(ref(name)) in json.dumps(schema)}
+
+    def resolve(node):
+        if isinstance(node, dict):
+            target = node.get("$ref")
+            if isinstance(target, str):
+                name = target.rsplit("/", 1)[-1]
+                if name in recursive:
+                    return copy.deepcopy(node)
+                return resolve(copy.deepcopy(schemas[name]))
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+
+    return {**spec, "paths": resolve(spec["paths"]), "components": resolve(spec["components"])}
+
+
+def measure(func, spec):
+    started = time.perf_counter()
+    result = func(spec)
+    elapsed = time.perf_counter() - started
+    # Peak memory is measured in a second run; tracing slows the first one down
+    del result
+    tracemalloc.start()
+    result = func(spec)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    spec = synthetic_spec()
+    print(f"{len(spec['components']['schemas'])} schemas, {len(spec['paths'])} operations, "
+          f"{json.dumps(spec).count('$ref')} references")
+
+    naive, naive_elapsed, naive_peak = measure(naive_resolve_spec, spec)
+    memoized, memo_elapsed, memo_peak = measure(resolve_spec, spec)
+    assert json.dumps(naive["paths"], sort_keys=True) == json.dumps(memoized["paths"], sort_keys=True)
+
+    for label, elapsed, peak in (("naive deepcopy", naive_elapsed, naive_peak), ("memoized", memo_elapsed, memo_peak)):
+        print(f"{label:>15}: {elapsed * 1000:8.1f} ms, peak {peak / 1e6:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
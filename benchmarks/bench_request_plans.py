@@ -0,0 +1,67 @@
+"""
+Microbenchmark: per-call request building, legacy loop vs. precompiled plan.
+
+Run from the repository root:
+
+    python benchmarks/bench_request_plans.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "constructor-mcp-server"))
+
+from plans import RequestPlan  # noqa: E402
+from utils import get_api_headers  # noqa: E402
+
+PATH = "/v1/knowledge-models/{knowledge_model_id}/chunks"
+ARGUMENTS = {
+    "knowledge_model_id": "3f1c2a9e-1b7d-4c55-9f0e-2d8b6a4c7e11",
+    "document_id": "9a8b7c6d",
+    "content_type": "text",
+    "sort": "chunk_index",
+    "offset": "0",
+    "limit": "100",
+}
+
+
+def legacy_build(arguments):
+    """The per-call argument classification previously inlined in every tool."""
+    path_params = {}
+    query_params = {}
+    headers = get_api_headers()
+    request_body = None
+
+    for key, value in arguments.items():
+        if key == "body":
+            request_body = value
+        elif "{" + key + "}" in PATH:
+            path_params[key] = value
+        else:
+            query_params[key] = value
+
+    url_path = PATH
+    for param_name, param_value in path_params.items():
+        url_path = url_path.replace("{" + param_name + "}", str(param_value))
+
+    return "" + url_path, query_params, headers, request_body
+
+
+def main():
+    plan = RequestPlan(
+        "get_v1_knowledge_models_chunks",
+        "GET",
+        PATH,
+        query=["document_id", "document_type", "content_type", "sort", "offset", "limit"],
+    )
+    assert legacy_build(ARGUMENTS)[:2] == tuple(plan.build(ARGUMENTS)[:2])
+
+    number = 200_000
+    for label, func in (("legacy loop", legacy_build), ("request plan", plan.build)):
+        best = min(timeit.repeat(lambda: func(ARGUMENTS), number=number, repeat=5))
+        print(f"{label:>14}: {best / number * 1e6:.3f} us/call")
+
+
+if __name__ == "__main__":
+    main()
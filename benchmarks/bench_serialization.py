@@ -0,0 +1,50 @@
+"""
+Benchmark: serializing a large get_v1_knowledge_models_chunks result.
+
+Compares the previous str() (Python repr) output with the stdlib json and
+orjson serializers. Run from the repository root:
+
+    python benchmarks/bench_serialization.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "constructor-mcp-server"))
+
+from serialization import JsonSerializer, orjson  # noqa: E402
+
+
+def make_chunks_result(count: int) -> dict:
+    """Build a result shaped like a formatted list-chunks response."""
+    chunks = [
+        {
+            "id": f"chunk-{index:06d}",
+            "document_id": f"doc-{index // 50:04d}",
+            "document_type": "internal",
+            "content_type": "text",
+            "chunk_index": index % 50,
+            "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8,
+            "metadata": {"page": index % 300, "source": "upload.pdf", "score": None},
+            "created_at": "2024-05-01T12:00:00Z",
+        }
+        for index in range(count)
+    ]
+    return {"success": True, "status_code": 200, "data": {"results": chunks, "total": count}}
+
+
+def main():
+    result = make_chunks_result(5000)
+    candidates = [("str()", str), ("json", JsonSerializer(backend="json").dumps)]
+    if orjson is not None:
+        candidates.append(("orjson", JsonSerializer(backend="orjson").dumps))
+
+    for label, func in candidates:
+        size = len(func(result).encode("utf-8"))
+        best = min(timeit.repeat(lambda: func(result), number=10, repeat=5)) / 10
+        print(f"{label:>8}: {best * 1e3:8.2f} ms/call  {size / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: peak RSS of ``generate_server`` with ``json.load`` vs. the
+streaming loader, on a synthetic spec with large responses and many unused
+component schemas (as in vendor specs). Each mode runs in a fresh
+subprocess so that its peak RSS is measured on its own (Unix only).
+
+Run from the repository root:
+
+    python benchmarks/bench_streaming_loader.py [operations]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = """
+import resource, sys, time
+sys.path.insert(0, {root!r})
+from mcpgen.generator import generate_server
+started = time.perf_counter()
+generate_server({spec!r}, {out!r}, force=True, streaming={streaming})
+elapsed = time.perf_counter() - started
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def write_spec(path, operations):
+    description = "Lorem ipsum dolor sit amet. " * 40
+    with open(path, "w") as f:
+        f.write('{"openapi": "3.0.0", "servers": [{"url": "https://api.example.com"}], "components": {"schemas": {')
+        # Most schemas are only referenced from responses, which the generator never reads
+        for index in range(operations * 2):
+            if index:
+                f.write(",")
+            schema = {"type": "object", "description": description,
+                      "properties": {f"f{n}": {"type": "string", "description": description} for n in range(5)}}
+            f.write(f'"Schema{index}": {json.dumps(schema)}')
+        f.write('}}, "paths": {')
+        for index in range(operations):
+            if index:
+                f.write(",")
+            item = {"get": {
+                "operationId": f"get_{index}",
+                "summary": f"Get {index}",
+                "description": description,
+                "parameters": [{"name": "id", "in": "query", "schema": {"$ref": f"#/components/schemas/Schema{index % 10}"}}],
+                "responses": {str(code): {"description": description, "content": {"application/json": {
+                    "schema": {"$ref": f"#/components/schemas/Schema{2 * index + (code % 2)}"},
+                    "example": {"items": [description] * 5}}}} for code in (200, 201, 400, 404)},
+            }}
+            f.write(f'"/v1/items{index}": {json.dumps(item)}')
+        f.write("}}")
+
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as workdir:
+        spec = os.path.join(workdir, "spec.json")
+        write_spec(spec, operations)
+        print(f"{operations} operations, spec {os.path.getsize(spec) / 1e6:.0f} MB")
+        outputs = []
+        for label, streaming in (("json.load", False), ("streaming", True)):
+            out = os.path.join(workdir, label)
+            code = CHILD.format(root=ROOT, spec=spec, out=out, streaming=streaming)
+            elapsed, maxrss = subprocess.check_output([sys.executable, "-c", code], text=True).split()
+            print(f"{label:>10}: {float(elapsed) * 1000:8.1f} ms, peak RSS {int(maxrss) / 1024:7.1f} MB")
+            with open(os.path.join(out, "server.py")) as f:
+                outputs.append(f.read())
+        assert outputs[0] == outputs[1]
+
+
+if __name__ == "__main__":
+    main()
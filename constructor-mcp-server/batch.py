@@ -0,0 +1,230 @@
+"""
+Batched tool invocation.
+
+A batch is a list of calls, each with an ``id``, a ``tool`` name and its
+``arguments``. An argument value of the form ``{"$ref": "<id>.<path>"}`` is
+replaced by part of an earlier call's result, for example
+``{"$ref": "files.data.results.0.id"}``. A ``*`` path segment selects every
+element of a list; a call whose arguments contain such a reference is run
+once per element. References and the optional ``depends_on`` list define a
+DAG: each call starts as soon as the calls it depends on have finished, and
+at most ``max_concurrency`` tool coroutines run at once.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from projection import split_arguments
+from utils import report_progress
+
+ToolHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+WILDCARD = "*"
+
+
+class BatchError(ValueError):
+    """Raised when a batch is malformed or a reference cannot be resolved."""
+
+
+def _references(value: Any, found: List[str]) -> List[str]:
+    """Collect every ``$ref`` string inside an argument value."""
+    if isinstance(value, dict):
+        if set(value) == {"$ref"}:
+            found.append(str(value["$ref"]))
+        else:
+            for item in value.values():
+                _references(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _references(item, found)
+    return found
+
+
+def _select(value: Any, path: List[str], ref: str) -> Any:
+    for index, segment in enumerate(path):
+        if segment == WILDCARD:
+            if not isinstance(value, list):
+                raise BatchError(f"Reference {ref!r}: '*' applied to a non-list value")
+            return [_select(item, path[index + 1:], ref) for item in value]
+        if isinstance(value, list) and segment.lstrip("-").isdigit():
+            try:
+                value = value[int(segment)]
+            except IndexError:
+                raise BatchError(f"Reference {ref!r}: index {segment} out of range") from None
+        elif isinstance(value, dict) and segment in value:
+            value = value[segment]
+        else:
+            raise BatchError(f"Reference {ref!r}: no field {segment!r}")
+    return value
+
+
+def _substitute(value: Any, results: Dict[str, Any], element: Optional[int]) -> Any:
+    """Replace references with values; wildcard references take element ``element``."""
+    if isinstance(value, dict):
+        if set(value) == {"$ref"}:
+            ref = str(value["$ref"])
+            call_id, *path = ref.split(".")
+            resolved = _select(results[call_id], path, ref)
+            if WILDCARD in path and element is not None:
+                return resolved[element]
+            return resolved
+        return {key: _substitute(item, results, element) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, results, element) for item in value]
+    return value
+
+
+class BatchCall:
+    """One entry of a batch and its outcome."""
+
+    __slots__ = ("id", "tool", "arguments", "depends_on", "fan_out", "done", "status", "result", "started", "elapsed")
+
+    def __init__(self, spec: Dict[str, Any], index: int):
+        if not isinstance(spec, dict):
+            raise BatchError(f"Call {index} must be an object with 'tool' and 'arguments', not {type(spec).__name__}")
+        self.id = str(spec.get("id", index))
+        self.tool = spec.get("tool")
+        self.arguments = spec.get("arguments", {})
+        if not isinstance(self.arguments, dict):
+            raise BatchError(f"Arguments of call {self.id!r} must be an object, not {type(self.arguments).__name__}")
+        depends_on = spec.get("depends_on", ())
+        if not isinstance(depends_on, (list, tuple)):
+            raise BatchError(f"depends_on of call {self.id!r} must be a list of call ids")
+        refs = _references(self.arguments, [])
+        self.depends_on: Set[str] = {ref.split(".", 1)[0] for ref in refs} | {str(item) for item in depends_on}
+        self.fan_out = any(WILDCARD in ref.split(".") for ref in refs)
+        self.done = asyncio.Event()
+        self.status = "pending"
+        self.result: Any = None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "tool": self.tool,
+            "status": self.status,
+            "started_ms": round(self.started * 1000, 1),
+            "elapsed_ms": round(self.elapsed * 1000, 1),
+            "result": self.result,
+        }
+
+
+def _failed(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get("error"))
+
+
+def _check_acyclic(calls: Dict[str, BatchCall]) -> None:
+    visiting: Set[str] = set()
+    visited: Set[str] = set()
+
+    def visit(call_id: str) -> None:
+        if call_id in visited:
+            return
+        if call_id in visiting:
+            raise BatchError(f"Dependency cycle through call {call_id!r}")
+        visiting.add(call_id)
+        for dependency in calls[call_id].depends_on:
+            visit(dependency)
+        visiting.discard(call_id)
+        visited.add(call_id)
+
+    for call_id in calls:
+        visit(call_id)
+
+
+def plan_batch(specs: List[Dict[str, Any]], handlers: Dict[str, ToolHandler], max_calls: int = 100) -> Dict[str, BatchCall]:
+    """Validate a batch and return its calls keyed by id."""
+    if not isinstance(specs, list) or not specs:
+        raise BatchError("calls must be a non-empty list")
+    if len(specs) > max_calls:
+        raise BatchError(f"Too many calls in batch: {len(specs)} > {max_calls}")
+
+    calls: Dict[str, BatchCall] = {}
+    for index, spec in enumerate(specs):
+        call = BatchCall(spec, index)
+        if call.id in calls:
+            raise BatchError(f"Duplicate call id: {call.id!r}")
+        if call.tool not in handlers:
+            raise BatchError(f"Unknown tool in call {call.id!r}: {call.tool}")
+        calls[call.id] = call
+    for call in calls.values():
+        unknown = call.depends_on - set(calls)
+        if unknown:
+            raise BatchError(f"Call {call.id!r} depends on unknown call(s): {', '.join(sorted(unknown))}")
+    _check_acyclic(calls)
+    return calls
+
+
+def _fan_out_size(call: BatchCall, results: Dict[str, Any]) -> int:
+    """Number of invocations for a call with wildcard references (all must agree)."""
+    sizes = set()
+    for ref in _references(call.arguments, []):
+        call_id, *path = ref.split(".")
+        if WILDCARD in path:
+            values = _select(results[call_id], path[:path.index(WILDCARD) + 1], ref)
+            sizes.add(len(values))
+    if len(sizes) != 1:
+        raise BatchError(f"Wildcard references in call {call.id!r} select lists of different lengths")
+    return sizes.pop()
+
+
+async def run_batch(
+    specs: List[Dict[str, Any]],
+    handlers: Dict[str, ToolHandler],
+    max_concurrency: int = 8,
+    max_calls: int = 100,
+) -> Dict[str, Any]:
+    """Run a batch of tool calls as a DAG and return every result."""
+    calls = plan_batch(specs, handlers, max_calls)
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+    results: Dict[str, Any] = {}
+    batch_started = time.monotonic()
+    finished = 0
+
+    async def invoke(call: BatchCall, arguments: Dict[str, Any]) -> Any:
+        arguments, projection = split_arguments(arguments)
+        async with semaphore:
+            result = await handlers[call.tool](arguments)
+        return projection.apply(result) if projection is not None else result
+
+    async def run(call: BatchCall) -> None:
+        nonlocal finished
+        try:
+            for dependency in call.depends_on:
+                await calls[dependency].done.wait()
+            failed = [dependency for dependency in call.depends_on if calls[dependency].status != "ok"]
+            if failed:
+                call.status = "skipped"
+                call.result = {"error": f"Dependency failed: {', '.join(sorted(failed))}"}
+                return
+
+            call.started = time.monotonic() - batch_started
+            try:
+                if call.fan_out:
+                    elements = _fan_out_size(call, results)
+                    call.result = list(await asyncio.gather(*(
+                        invoke(call, _substitute(call.arguments, results, element)) for element in range(elements)
+                    )))
+                    error = any(_failed(result) for result in call.result)
+                else:
+                    call.result = await invoke(call, _substitute(call.arguments, results, None))
+                    error = _failed(call.result)
+                call.status = "error" if error else "ok"
+            except Exception as e:
+                call.status = "error"
+                call.result = {"error": str(e)}
+            call.elapsed = time.monotonic() - batch_started - call.started
+            results[call.id] = call.result
+        finally:
+            call.done.set()
+            finished += 1
+            await report_progress(finished, len(calls), f"{call.id}: {call.status}")
+
+    await asyncio.gather(*(run(call) for call in calls.values()))
+    return {
+        "success": all(call.status == "ok" for call in calls.values()),
+        "elapsed_ms": round((time.monotonic() - batch_started) * 1000, 1),
+        "results": {call_id: call.as_dict() for call_id, call in calls.items()},
+    }
+
@@ -0,0 +1,264 @@
+"""
+Per-operation circuit breakers.
+
+Each operation (the ``operation`` request extension) has its own breaker.
+Outcomes are tracked over a rolling time window; once enough calls have been
+seen and either the failure rate or the slow-call rate crosses its threshold
+the breaker opens. While open, requests fail fast with a synthetic 503
+response (marked with an ``X-Circuit-Open`` header) instead of waiting out
+upstream timeouts. After ``open_duration`` a limited number of half-open
+probes is let through; the breaker closes again if they all succeed.
+
+The breaker is split around admission control. ``BreakerTransport`` sits
+above it, so a request to an open breaker is rejected at once without
+waiting for (or using up) an admission slot or rate token. ``BreakerClock``
+sits below it and times only the upstream call, so time spent queueing for
+admission is not counted towards a call's duration.
+"""
+
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BreakerSettings:
+    """Thresholds shared by the breakers of one or more operations."""
+
+    __slots__ = (
+        "window",
+        "min_calls",
+        "failure_rate",
+        "slow_call_duration",
+        "slow_call_rate",
+        "open_duration",
+        "half_open_max_calls",
+    )
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_duration: float = 10.0,
+        slow_call_rate: float = 0.8,
+        open_duration: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate = slow_call_rate
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+
+    def replace(self, **overrides: Any) -> "BreakerSettings":
+        """Return a copy of these settings with some values overridden."""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(overrides)
+        return BreakerSettings(**values)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open state machine over a rolling window of outcomes."""
+
+    def __init__(self, settings: BreakerSettings):
+        self.settings = settings
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        self.rejected = 0
+        # (finished_at, failed, slow) for each call inside the window
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.settings.window
+        while self._calls and self._calls[0][0] < horizon:
+            self._calls.popleft()
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a probe through."""
+        return max(self.opened_at + self.settings.open_duration - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed, counting it as a probe when half-open."""
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self.probes = 0
+            self.probe_successes = 0
+        if self.state == HALF_OPEN:
+            if self.probes >= self.settings.half_open_max_calls:
+                self.rejected += 1
+                return False
+            self.probes += 1
+        return True
+
+    def record(self, failed: bool, duration: Optional[float]) -> None:
+        """Record the outcome of a call that was allowed through (``duration`` None: never slow)."""
+        now = time.monotonic()
+        slow = duration is not None and duration >= self.settings.slow_call_duration
+
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._open(now)
+                return
+            self.probe_successes += 1
+            if self.probe_successes >= self.settings.half_open_max_calls:
+                self.state = CLOSED
+                self._calls.clear()
+            return
+
+        self._calls.append((now, failed, slow))
+        self._trim(now)
+        calls = len(self._calls)
+        if calls < self.settings.min_calls:
+            return
+        failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+        slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+        if failures / calls >= self.settings.failure_rate or slow_calls / calls >= self.settings.slow_call_rate:
+            self._open(now)
+
+    def abandon(self) -> None:
+        """Forget a call that was allowed through but never completed."""
+        if self.state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self._calls.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        self._trim(time.monotonic())
+        calls = len(self._calls)
+        return {
+            "state": self.state,
+            "calls": calls,
+            "failure_rate": sum(1 for _, failed, _ in self._calls if failed) / calls if calls else 0.0,
+            "slow_call_rate": sum(1 for _, _, slow in self._calls if slow) / calls if calls else 0.0,
+            "rejected": self.rejected,
+        }
+
+
+def _timed(request: httpx.Request) -> bool:
+    """Whether a call's duration says anything about upstream health.
+
+    Streamed downloads and streamed request bodies (file uploads) take as long
+    as their size requires, so they are never counted as slow calls.
+    """
+    return not request.extensions.get("streaming") and isinstance(request.stream, httpx.ByteStream)
+
+
+# Request extension in which BreakerClock leaves the duration of the upstream call
+DURATION_EXTENSION = "breaker_duration"
+
+
+class BreakerClock(httpx.AsyncBaseTransport):
+    """Transport wrapper below admission control that times the upstream call for the breaker above."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            return await self._transport.handle_async_request(request)
+        finally:
+            request.extensions[DURATION_EXTENSION] = time.monotonic() - started
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class BreakerTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that fails fast for operations whose breaker is open."""
+
+    name = "breaker"
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        settings: Optional[BreakerSettings] = None,
+        overrides: Optional[Dict[str, BreakerSettings]] = None,
+    ):
+        self._transport = transport
+        self._settings = settings or BreakerSettings()
+        self._overrides = dict(overrides or {})
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker_for(self, operation: str) -> CircuitBreaker:
+        breaker = self._breakers.get(operation)
+        if breaker is None:
+            breaker = CircuitBreaker(self._overrides.get(operation, self._settings))
+            self._breakers[operation] = breaker
+        return breaker
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        operation = request.extensions.get("operation") or f"{request.method} {request.url.path}"
+        breaker = self.breaker_for(operation)
+        if not breaker.allow():
+            return self._reject(operation, breaker)
+
+        started = time.monotonic()
+        request.extensions.pop(DURATION_EXTENSION, None)
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError:
+            breaker.record(True, self._duration(request, started))
+            raise
+        except BaseException:
+            breaker.abandon()
+            raise
+        breaker.record(response.status_code >= 500, self._duration(request, started))
+        return response
+
+    @staticmethod
+    def _duration(request: httpx.Request, started: float) -> Optional[float]:
+        """Duration of the upstream call, as timed by BreakerClock when it is installed below."""
+        if not _timed(request):
+            return None
+        return request.extensions.get(DURATION_EXTENSION, time.monotonic() - started)
+
+    def _reject(self, operation: str, breaker: CircuitBreaker) -> httpx.Response:
+        retry_after = breaker.retry_after()
+        body = {
+            "message": f"Circuit breaker open for {operation}; failing fast",
+            "circuit": {"operation": operation, "state": breaker.state, "retry_after": round(retry_after, 3)},
+        }
+        return httpx.Response(
+            503,
+            headers={
+                "Content-Type": "application/json",
+                "Retry-After": str(int(retry_after) + 1),
+                "X-Circuit-Open": "1",
+            },
+            content=json.dumps(body).encode("utf-8"),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state of every breaker that has seen traffic."""
+        return {operation: breaker.stats() for operation, breaker in self._breakers.items()}
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_breaker_transport(transport: httpx.AsyncBaseTransport, config: Dict[str, Any]) -> BreakerTransport:
+    """Wrap a transport with the settings from the ``breaker`` section of config.json."""
+    settings = BreakerSettings(**{key: value for key, value in config.items() if key in BreakerSettings.__slots__})
+    overrides = {
+        operation: settings.replace(**override)
+        for operation, override in config.get("operations", {}).items()
+    }
+    return BreakerTransport(transport, settings=settings, overrides=overrides)
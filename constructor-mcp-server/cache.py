@@ -0,0 +1,139 @@
+"""
+In-process TTL/LRU cache for GET responses.
+
+Responses are cached per URL and credentials for a TTL chosen by the
+operation that issued the request (passed as the ``operation`` request
+extension). When an expired entry carries an ETag or Last-Modified header it
+is revalidated with a conditional request instead of being refetched.
+Successful writes invalidate cached entries for the same path, its children
+and its parent collection.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from coalescing import BufferedResponse
+
+CacheKey = Tuple[str, str]
+
+
+class _Entry:
+    """A cached response together with its freshness and validators."""
+
+    __slots__ = ("response", "path", "expires_at", "etag", "last_modified")
+
+    def __init__(self, response: BufferedResponse, path: str, ttl: float):
+        self.response = response
+        self.path = path
+        self.expires_at = time.monotonic() + ttl
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that serves GET responses from a bounded LRU cache."""
+
+    name = "cache"
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        ttl: Optional[Dict[str, float]] = None,
+        default_ttl: float = 0.0,
+        max_entries: int = 512,
+        auth_header: str = "X-KM-AccessKey",
+    ):
+        self._transport = transport
+        self._ttl = dict(ttl or {})
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._auth_header = auth_header
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _ttl_for(self, request: httpx.Request) -> float:
+        operation = request.extensions.get("operation")
+        return self._ttl.get(operation, self._default_ttl)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            response = await self._transport.handle_async_request(request)
+            if response.status_code < 400:
+                self._invalidate(request.url.path)
+            return response
+
+        ttl = self._ttl_for(request)
+        if ttl <= 0 or request.extensions.get("streaming"):
+            return await self._transport.handle_async_request(request)
+
+        key = (str(request.url), request.headers.get(self._auth_header, ""))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if time.monotonic() < entry.expires_at:
+                self.hits += 1
+                return entry.response.replay()
+            if entry.etag:
+                request.headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request.headers["If-Modified-Since"] = entry.last_modified
+
+        response = await self._transport.handle_async_request(request)
+
+        if response.status_code == 304 and entry is not None:
+            await response.aclose()
+            self.revalidated += 1
+            entry.expires_at = time.monotonic() + ttl
+            return entry.response.replay()
+
+        self.misses += 1
+        if response.status_code != 200 or "no-store" in response.headers.get("Cache-Control", ""):
+            return response
+
+        buffered = await BufferedResponse.read(response)
+        self._store(key, _Entry(buffered, request.url.path, ttl))
+        return buffered.replay()
+
+    def _store(self, key: CacheKey, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _invalidate(self, path: str) -> None:
+        parent = path.rsplit("/", 1)[0]
+        prefix = path + "/"
+        stale = [
+            key for key, entry in self._entries.items()
+            if entry.path == path or entry.path == parent or entry.path.startswith(prefix)
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters for this transport."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,147 @@
+"""
+Singleflight coalescing of identical in-flight requests.
+
+Concurrent requests with the same method, URL and credentials share a single
+upstream request. The upstream call runs in its own task so that cancelling
+one waiter never cancels the request for the others; it is only cancelled
+once every waiter has gone away. Errors are re-raised in every waiter.
+"""
+
+import asyncio
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import httpx
+
+CoalesceKey = Tuple[str, str, str, str]
+
+
+class _Flight:
+    """A shared upstream request and the number of callers waiting on it."""
+
+    __slots__ = ("task", "waiters", "abandoned")
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+        # Set when the last waiter went away and the upstream request was cancelled
+        self.abandoned = False
+
+
+class BufferedResponse:
+    """Raw response parts that can be replayed into a fresh httpx.Response."""
+
+    __slots__ = ("status_code", "headers", "content", "extensions")
+
+    def __init__(self, status_code: int, headers: httpx.Headers, content: bytes, extensions: Dict[str, Any]):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.extensions = extensions
+
+    @classmethod
+    async def read(cls, response: httpx.Response) -> "BufferedResponse":
+        """Drain a transport-level response into a replayable buffer."""
+        try:
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        extensions = {k: v for k, v in response.extensions.items() if k != "network_stream"}
+        return cls(response.status_code, response.headers, content, extensions)
+
+    def replay(self) -> httpx.Response:
+        # The compression layer below has already decoded the body and dropped
+        # its Content-Encoding, so the buffered bytes are replayed as they are.
+        return httpx.Response(
+            self.status_code,
+            headers=self.headers,
+            stream=httpx.ByteStream(self.content),
+            extensions=self.extensions,
+        )
+
+
+class CoalescingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that shares identical in-flight requests."""
+
+    name = "coalescing"
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        methods: Iterable[str] = ("GET", "HEAD"),
+        auth_header: str = "X-KM-AccessKey",
+    ):
+        self._transport = transport
+        self._methods = frozenset(method.upper() for method in methods)
+        self._auth_header = auth_header
+        self._flights: Dict[CoalesceKey, _Flight] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def _key(self, request: httpx.Request) -> Optional[CoalesceKey]:
+        # Streamed downloads must not be buffered in memory
+        if request.method not in self._methods or request.extensions.get("streaming"):
+            return None
+        return (
+            request.method,
+            str(request.url),
+            request.headers.get(self._auth_header, ""),
+            # Conditional revalidations must not be merged with plain requests
+            request.headers.get("If-None-Match", "") + request.headers.get("If-Modified-Since", ""),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._key(request)
+        if key is None:
+            return await self._transport.handle_async_request(request)
+
+        self.requests += 1
+        coalesced = False
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight(asyncio.ensure_future(self._fetch(request)))
+                self._flights[key] = flight
+                flight.task.add_done_callback(lambda _, key=key, flight=flight: self._forget(key, flight))
+            elif not coalesced:
+                coalesced = True
+                self.coalesced += 1
+
+            flight.waiters += 1
+            try:
+                # asyncio.wait neither cancels the flight nor raises when it was
+                # cancelled, so a CancelledError here always means this caller went away.
+                await asyncio.wait((flight.task,))
+            except asyncio.CancelledError:
+                flight.waiters -= 1
+                # Drop the upstream request only if nobody else waits
+                if flight.waiters == 0 and not flight.task.done():
+                    flight.abandoned = True
+                    # Remove it now so that new callers cannot join a doomed flight
+                    self._forget(key, flight)
+                    flight.task.cancel()
+                raise
+            flight.waiters -= 1
+            if flight.task.cancelled() and flight.abandoned:
+                # The flight was dropped by its previous waiters, not by this
+                # caller; start a new one instead of inheriting their cancellation.
+                continue
+            return flight.task.result().replay()
+
+    async def _fetch(self, request: httpx.Request) -> BufferedResponse:
+        response = await self._transport.handle_async_request(request)
+        return await BufferedResponse.read(response)
+
+    def _forget(self, key: CoalesceKey, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return request counters for this transport."""
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,304 @@
+"""
+Token-budget compaction of tool and resource results.
+
+The token size of a result is estimated from its serialized length. A result
+over its budget is compacted in two passes:
+
+1. strings longer than ``max_string_chars`` are elided, keeping their start;
+2. the largest arrays are cut to the prefix that fits the budget.
+
+Every cut is listed in the ``compaction`` block with its own continuation
+cursor; nothing is dropped that a cursor cannot bring back. The full result
+is kept for a while, and the ``continue_result`` tool returns the rest of one
+array (compacted the same way, with cursors of its own) or the next
+budget-sized piece of one string. Paths and offsets in continuations always
+refer to the original result. Bytes and tokens saved are counted per tool or
+resource.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from serialization import JsonSerializer
+
+Path = Tuple[Any, ...]
+
+# Estimated size of the description of one cut in the compaction block
+CUT_BYTES = 128
+
+
+def _arrays(value: Any, path: Path = ()) -> List[Tuple[Path, list]]:
+    """Every list inside a value with the path leading to it."""
+    found: List[Tuple[Path, list]] = []
+    if isinstance(value, list):
+        found.append((path, value))
+        for index, item in enumerate(value):
+            found.extend(_arrays(item, path + (index,)))
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            found.extend(_arrays(item, path + (key,)))
+    return found
+
+
+def _replace(value: Any, path: Path, replacement: Any) -> Any:
+    """Return a copy of ``value`` with the item at ``path`` replaced (containers on the path are copied)."""
+    if not path:
+        return replacement
+    head, rest = path[0], path[1:]
+    if isinstance(value, list):
+        copy = list(value)
+    else:
+        copy = dict(value)
+    copy[head] = _replace(value[head], rest, replacement)
+    return copy
+
+
+def _get(value: Any, path: Path) -> Any:
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _find(value: Any, path: Path) -> Any:
+    """The item at ``path``, or None if the path no longer exists."""
+    try:
+        return _get(value, path)
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+class _Cut(NamedTuple):
+    """One truncation of a stored result: the item at ``path`` was kept up to ``offset``."""
+    path: Path
+    kind: str
+    offset: int
+    total: int
+
+
+class _Stored:
+    """A result kept for continuation, with the cuts made to it.
+
+    ``origin`` places a continuation result (``{"data": part}``) within the
+    original one: the path of ``part`` there and the offset of its first
+    element. It is None for original results.
+    """
+
+    __slots__ = ("name", "result", "cuts", "origin", "expires_at")
+
+    def __init__(self, name: str, result: Any, cuts: List[_Cut], origin: Optional[Tuple[Path, int]], expires_at: float):
+        self.name = name
+        self.result = result
+        self.cuts = cuts
+        self.origin = origin
+        self.expires_at = expires_at
+
+    def locate(self, path: Path) -> Tuple[Path, int]:
+        """Path in the original result and offset of the first element of the item at ``path``."""
+        if self.origin is None:
+            return path, 0
+        origin_path, base = self.origin
+        rest = path[1:]
+        if not rest:
+            return origin_path, base
+        return origin_path + (base + rest[0],) + rest[1:], 0
+
+
+class Compactor:
+    """Compact results that exceed a token budget and keep continuation cursors."""
+
+    def __init__(
+        self,
+        serializer: JsonSerializer,
+        max_tokens: int = 8000,
+        chars_per_token: float = 4.0,
+        max_string_chars: int = 2000,
+        max_cursors: int = 64,
+        cursor_ttl: float = 900.0,
+        budgets: Optional[Dict[str, int]] = None,
+    ):
+        self._serializer = serializer
+        self.max_tokens = max_tokens
+        self.chars_per_token = chars_per_token
+        self.max_string_chars = max_string_chars
+        self.max_cursors = max_cursors
+        self.cursor_ttl = cursor_ttl
+        self._budgets = dict(budgets or {})
+        self._stored: "OrderedDict[str, _Stored]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _size(self, value: Any) -> int:
+        return len(self._serializer.dumps_bytes(value))
+
+    def _budget_bytes(self, name: str) -> int:
+        return int(self._budgets.get(name, self.max_tokens) * self.chars_per_token)
+
+    def tokens(self, size_bytes: int) -> int:
+        """Estimated token count of a serialized size."""
+        return int(size_bytes / self.chars_per_token + 0.5)
+
+    def compact(self, name: str, result: Any) -> Any:
+        """Return ``result`` unchanged if it fits its budget, else a compacted copy."""
+        return self._compact(name, result, None)
+
+    def _compact(self, name: str, result: Any, origin: Optional[Tuple[Path, int]]) -> Any:
+        stats = self._stats.setdefault(name, {"calls": 0, "compacted": 0, "bytes_saved": 0, "tokens_saved": 0})
+        stats["calls"] += 1
+        if not isinstance(result, dict) or "data" not in result:
+            return result
+
+        budget_bytes = self._budget_bytes(name)
+        original = self._size(result)
+        if original <= budget_bytes:
+            return result
+
+        elided: List[Tuple[Path, int]] = []
+        compacted = self._elide(result, (), elided)
+        size = self._size(compacted) if elided else original
+        arrays: Dict[Path, Tuple[int, int]] = {}
+        while True:
+            cuts = self._cuts(compacted, arrays, elided)
+            # Leave room for the compaction block attached below
+            excess = size - budget_bytes + 256 + CUT_BYTES * len(cuts)
+            if excess <= 0:
+                break
+            step = self._cut_largest_array(compacted, excess, elided)
+            if step is None:
+                break
+            compacted, path, kept, total = step
+            arrays[path] = (kept, arrays[path][1] if path in arrays else total)
+            size = self._size(compacted)
+
+        info: Dict[str, Any] = {
+            "original_tokens": self.tokens(original),
+            "tokens": self.tokens(size),
+            "elided_strings": sum(1 for cut in cuts if cut.kind == "string"),
+        }
+        if cuts:
+            info["truncated"] = self._store(name, result, cuts, origin)
+            info["cursor"] = info["truncated"][0]["cursor"]
+        compacted = {**compacted, "compaction": info}
+
+        saved = original - self._size(compacted)
+        stats["compacted"] += 1
+        stats["bytes_saved"] += max(saved, 0)
+        stats["tokens_saved"] += max(self.tokens(saved), 0)
+        return compacted
+
+    def _cuts(self, compacted: Any, arrays: Dict[Path, Tuple[int, int]], elided: List[Tuple[Path, int]]) -> List[_Cut]:
+        """The cuts still visible in ``compacted``; those inside the dropped part of an array are not."""
+        cuts = []
+        for path, (kept, total) in arrays.items():
+            items = _find(compacted, path)
+            if isinstance(items, list) and len(items) == kept:
+                cuts.append(_Cut(path, "array", kept, total))
+        for path, length in elided:
+            if isinstance(_find(compacted, path), str):
+                cuts.append(_Cut(path, "string", self.max_string_chars, length))
+        return cuts
+
+    def _elide(self, value: Any, path: Path, elided: List[Tuple[Path, int]]) -> Any:
+        limit = self.max_string_chars
+        if isinstance(value, str):
+            if len(value) > limit:
+                elided.append((path, len(value)))
+                return f"{value[:limit]}… [{len(value) - limit} more chars]"
+            return value
+        if isinstance(value, list):
+            return [self._elide(item, path + (index,), elided) for index, item in enumerate(value)]
+        if isinstance(value, dict):
+            return {key: self._elide(item, path + (key,), elided) for key, item in value.items()}
+        return value
+
+    def _cut_largest_array(self, result: Any, excess: int, elided: List[Tuple[Path, int]]):
+        candidates = [(path, items) for path, items in _arrays(result["data"], ("data",)) if len(items) > 1]
+        if not candidates:
+            return None
+        sizes = {path: [self._size(item) + 1 for item in items] for path, items in candidates}
+        # An item also takes the descriptions of the strings elided inside it
+        for elided_path, _ in elided:
+            for path, _ in candidates:
+                if len(elided_path) > len(path) and elided_path[:len(path)] == path:
+                    sizes[path][elided_path[len(path)]] += CUT_BYTES
+        path, items = max(candidates, key=lambda candidate: sum(sizes[candidate[0]]))
+
+        keep_bytes = sum(sizes[path]) - excess
+        kept = 0
+        used = 0
+        for size in sizes[path]:
+            if used + size > keep_bytes:
+                break
+            used += size
+            kept += 1
+        # Keep at least one item so that every continuation makes progress
+        kept = min(max(kept, 1), len(items) - 1)
+        return _replace(result, path, items[:kept]), path, kept, len(items)
+
+    def _store(self, name: str, result: Any, cuts: List[_Cut], origin: Optional[Tuple[Path, int]]) -> List[Dict[str, Any]]:
+        """Keep ``result`` for continuation; return the description of every cut with its cursor."""
+        now = time.monotonic()
+        while self._stored:
+            oldest = next(iter(self._stored.values()))
+            if len(self._stored) < self.max_cursors and oldest.expires_at > now:
+                break
+            self._stored.popitem(last=False)
+        key = uuid.uuid4().hex
+        stored = self._stored[key] = _Stored(name, result, cuts, origin, now + self.cursor_ttl)
+
+        described = []
+        for index, cut in enumerate(cuts):
+            path, base = stored.locate(cut.path)
+            described.append({
+                "path": list(path),
+                "type": cut.kind,
+                "kept": base + cut.offset,
+                "total": base + cut.total,
+                "cursor": f"{key}.{index}",
+            })
+        return described
+
+    def resume(self, cursor: str) -> Any:
+        """Return the next part of a truncated array or string."""
+        key, _, index = cursor.partition(".")
+        stored = self._stored.get(key)
+        if stored is None or stored.expires_at < time.monotonic() or not index.isdigit() or int(index) >= len(stored.cuts):
+            raise ValueError(f"Unknown or expired cursor: {cursor}")
+        cut = stored.cuts[int(index)]
+        path, base = stored.locate(cut.path)
+        remainder = _get(stored.result, cut.path)[cut.offset:]
+        origin = (path, base + cut.offset)
+        continuation = {"path": list(path), "type": cut.kind, "offset": base + cut.offset, "total": base + cut.total}
+
+        if cut.kind == "array":
+            result = self._compact(stored.name, {"data": remainder}, origin)
+        else:
+            result = self._piece(stored.name, remainder, origin)
+        return {**result, "continuation": continuation}
+
+    def _piece(self, name: str, text: str, origin: Tuple[Path, int]) -> Dict[str, Any]:
+        """The longest start of ``text`` that fits the budget, with a cursor for the rest."""
+        room = max(self._budget_bytes(name) - 512, 1)
+        length = min(len(text), room)
+        while length > 1:
+            size = self._size(text[:length])
+            if size <= room:
+                break
+            length = max(length * room // size, 1)
+        result: Dict[str, Any] = {"data": text[:length]}
+        if length < len(text):
+            truncated = self._store(name, {"data": text}, [_Cut(("data",), "string", length, len(text))], origin)
+            result["compaction"] = {"truncated": truncated, "cursor": truncated[0]["cursor"]}
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return compaction counters per tool or resource."""
+        return {name: dict(counters) for name, counters in self._stats.items()}
+
+
+def create_compactor(serializer: JsonSerializer, config: Dict[str, Any]) -> Optional[Compactor]:
+    """Create a compactor from the ``compaction`` section of config.json (None if disabled)."""
+    compaction_config = dict(config.get("compaction", {}))
+    if not compaction_config.pop("enabled", True):
+        return None
+    return Compactor(serializer, **compaction_config)
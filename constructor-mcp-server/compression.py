@@ -0,0 +1,250 @@
+"""
+Compression negotiation with upstream.
+
+Responses: the Accept-Encoding header is set to the configured encodings that
+can be decoded here (gzip and deflate always; ``br`` and ``zstd`` only when
+the ``brotli`` or ``zstandard`` package is installed). Compressed responses
+are decoded incrementally in this layer so that the wire size, decoded size
+and decoding time can be measured; they leave it with the Content-Encoding
+header removed. Streamed requests (downloads) are left alone in both
+directions: their Accept-Encoding is the caller's, and their responses keep
+their encoding, so that byte offsets refer to what upstream actually sent.
+
+Requests: bodies of at least ``request_min_bytes`` are gzip-compressed before
+they are sent, unless the request already has a Content-Encoding or its body
+is streamed. If upstream answers a compressed body with 415, the request is
+sent again uncompressed and request compression is turned off.
+"""
+
+import gzip
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+DEFAULT_ENCODINGS = ("zstd", "br", "gzip", "deflate")
+DEFAULT_METHODS = ("POST", "PUT", "PATCH")
+
+
+class _Decoder:
+    """Incremental decoder for one content coding."""
+
+    def __init__(self, encoding: str):
+        if encoding == "gzip":
+            self._decompressor: Any = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._decompressor = zlib.decompressobj()
+            self._raw_fallback = True
+        elif encoding == "br":
+            self._decompressor = brotli.Decompressor()
+        elif encoding == "zstd":
+            self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            raise ValueError(f"Unsupported content coding: {encoding}")
+        self.encoding = encoding
+
+    def decode(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._decompressor.process(data)
+        if self.encoding == "deflate" and self._raw_fallback:
+            # Some servers send raw deflate without the zlib header
+            self._raw_fallback = False
+            try:
+                return self._decompressor.decompress(data)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding in ("gzip", "deflate"):
+            return self._decompressor.flush()
+        return b""
+
+
+def available_encodings() -> tuple:
+    """Content codings that can be decoded with the installed packages."""
+    encodings = ["gzip", "deflate"]
+    if brotli is not None:
+        encodings.insert(0, "br")
+    if zstandard is not None:
+        encodings.insert(0, "zstd")
+    return tuple(encodings)
+
+
+class _DecodingStream(httpx.AsyncByteStream):
+    """Response stream that decodes its content and reports sizes when closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, decoder: _Decoder, record: Callable[[str, int, int, float], None]):
+        self._stream = stream
+        self._decoder = decoder
+        self._record = record
+        self._wire_bytes = 0
+        self._decoded_bytes = 0
+        self._seconds = 0.0
+        self._recorded = False
+
+    def _decode(self, data: bytes, final: bool = False) -> bytes:
+        started = time.perf_counter()
+        decoded = self._decoder.flush() if final else self._decoder.decode(data)
+        self._seconds += time.perf_counter() - started
+        self._wire_bytes += len(data)
+        self._decoded_bytes += len(decoded)
+        return decoded
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            decoded = self._decode(chunk)
+            if decoded:
+                yield decoded
+        tail = self._decode(b"", final=True)
+        if tail:
+            yield tail
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._recorded:
+                self._recorded = True
+                self._record(self._decoder.encoding, self._wire_bytes, self._decoded_bytes, self._seconds)
+
+
+class CompressionTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that negotiates response encodings and compresses request bodies."""
+
+    name = "compression"
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        accept_encoding: Iterable[str] = DEFAULT_ENCODINGS,
+        request_compression: bool = True,
+        request_min_bytes: int = 16384,
+        request_level: int = 6,
+        methods: Iterable[str] = DEFAULT_METHODS,
+    ):
+        self._transport = transport
+        supported = available_encodings()
+        self.accept_encoding = [encoding for encoding in accept_encoding if encoding in supported]
+        self.request_compression = request_compression
+        self.request_min_bytes = request_min_bytes
+        self.request_level = request_level
+        self._methods = frozenset(method.upper() for method in methods)
+        self.requests_compressed = 0
+        self.request_bytes = 0
+        self.request_wire_bytes = 0
+        self.request_seconds = 0.0
+        self.request_rejected = 0
+        self.responses: Dict[str, Dict[str, Any]] = {}
+
+    def _record_response(self, encoding: str, wire_bytes: int, decoded_bytes: int, seconds: float) -> None:
+        counters = self.responses.setdefault(encoding, {"responses": 0, "wire_bytes": 0, "decoded_bytes": 0, "seconds": 0.0})
+        counters["responses"] += 1
+        counters["wire_bytes"] += wire_bytes
+        counters["decoded_bytes"] += decoded_bytes
+        counters["seconds"] += seconds
+
+    def _compress(self, request: httpx.Request) -> Optional[httpx.Request]:
+        """Return a gzip-compressed copy of the request, or None if it should be sent as is."""
+        if (
+            not self.request_compression
+            or request.method not in self._methods
+            or "Content-Encoding" in request.headers
+            or request.extensions.get("streaming")
+        ):
+            return None
+        try:
+            body = request.content
+        except httpx.RequestNotRead:
+            return None
+        if len(body) < self.request_min_bytes:
+            return None
+
+        started = time.perf_counter()
+        compressed = gzip.compress(body, compresslevel=self.request_level, mtime=0)
+        self.request_seconds += time.perf_counter() - started
+        self.requests_compressed += 1
+        self.request_bytes += len(body)
+        self.request_wire_bytes += len(compressed)
+
+        headers = httpx.Headers(request.headers)
+        headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(compressed))
+        return httpx.Request(request.method, request.url, headers=headers, content=compressed, extensions=request.extensions)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        streaming = request.extensions.get("streaming")
+        if self.accept_encoding and not streaming:
+            request.headers["Accept-Encoding"] = ", ".join(self.accept_encoding)
+
+        compressed = self._compress(request)
+        if compressed is None:
+            response = await self._transport.handle_async_request(request)
+        else:
+            response = await self._transport.handle_async_request(compressed)
+            if response.status_code == 415:
+                # Upstream does not accept compressed bodies; stop compressing them
+                await response.aclose()
+                self.request_rejected += 1
+                self.request_compression = False
+                response = await self._transport.handle_async_request(request)
+
+        # A streamed response is returned undecoded, with its Content-Encoding
+        # and Content-Length, so the caller can tell what its offsets count
+        encoding = response.headers.get("Content-Encoding", "").strip().lower()
+        if streaming or not encoding or encoding == "identity" or encoding not in available_encodings():
+            return response
+
+        headers = httpx.Headers(response.headers)
+        del headers["Content-Encoding"]
+        headers.pop("Content-Length", None)
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            stream=_DecodingStream(response.stream, _Decoder(encoding), self._record_response),
+            extensions=response.extensions,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return compression ratios and time spent compressing and decoding."""
+        responses = {
+            encoding: {
+                "responses": counters["responses"],
+                "wire_bytes": counters["wire_bytes"],
+                "decoded_bytes": counters["decoded_bytes"],
+                "ratio": round(counters["decoded_bytes"] / counters["wire_bytes"], 2) if counters["wire_bytes"] else None,
+                "cpu_ms": round(counters["seconds"] * 1000, 1),
+            }
+            for encoding, counters in self.responses.items()
+        }
+        return {
+            "accept_encoding": ", ".join(self.accept_encoding),
+            "request_compression": self.request_compression,
+            "requests_compressed": self.requests_compressed,
+            "request_bytes": self.request_bytes,
+            "request_wire_bytes": self.request_wire_bytes,
+            "request_ratio": round(self.request_bytes / self.request_wire_bytes, 2) if self.request_wire_bytes else None,
+            "request_cpu_ms": round(self.request_seconds * 1000, 1),
+            "request_rejected": self.request_rejected,
+            "responses": responses,
+        }
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_compression_transport(transport: httpx.AsyncBaseTransport, config: Dict[str, Any]) -> CompressionTransport:
+    """Wrap a transport with the settings from the ``compression`` section of config.json."""
+    settings = {key: value for key, value in config.items() if key != "enabled"}
+    return CompressionTransport(transport, **settings)
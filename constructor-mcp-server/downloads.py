@@ -0,0 +1,307 @@
+"""
+Chunked, resumable downloads into a local spool directory.
+
+Response bodies are streamed to ``<spool>/<key>.part`` in fixed-size chunks,
+so memory use does not depend on the file size. If the transfer is
+interrupted, the next attempt (within the same call or a later one) resumes
+from the bytes already on disk with a ``Range`` request guarded by
+``If-Range``. A completed file is checked against the announced size and, if
+upstream sends one, its SHA-256 digest before it is moved into place.
+
+Downloads ask for the identity encoding, so that ``Range`` offsets count the
+bytes written to disk. A response that is content-encoded anyway is accepted
+but never resumed: its partial file is discarded on the next attempt.
+
+Concurrent downloads of the same URL would share these files, so they are
+serialized per URL; each caller still makes its own request once the one
+before it has finished. Files small enough to be returned inline are read and
+removed straight away; other spool files (and abandoned partial files) are
+removed once they are older than ``max_age`` seconds. The downloader retries
+interrupted transfers itself, so the retry layer leaves these requests alone.
+All file I/O runs on executor threads.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from plans import RequestPlan
+from retry import RETRYABLE_ERRORS
+from utils import handle_api_error, report_progress
+
+DEFAULT_SPOOL_DIR = os.path.join(tempfile.gettempdir(), "constructor-mcp-downloads")
+
+
+class DownloadError(Exception):
+    """Raised when a download cannot be completed or fails verification."""
+
+    def __init__(self, message: str, error: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.error = error or {"error": message}
+
+
+class Download:
+    """A file downloaded into the spool directory."""
+
+    __slots__ = ("path", "size", "sha256", "mime_type", "content")
+
+    def __init__(self, path: str, size: int, sha256: str, mime_type: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.mime_type = mime_type
+        # The file's bytes, when read for inline return (the spool file is then gone)
+        self.content: Optional[bytes] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "uri": "file://" + self.path,
+            "path": self.path,
+            "size": self.size,
+            "sha256": self.sha256,
+            "mime_type": self.mime_type,
+        }
+
+
+def _expected_sha256(headers: httpx.Headers) -> Optional[str]:
+    """Return the hex SHA-256 announced by upstream, if any."""
+    checksum = headers.get("X-Checksum-SHA256")
+    if checksum:
+        return checksum.strip().lower()
+    for name in ("Repr-Digest", "Digest"):
+        for item in headers.get(name, "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            if algorithm.lower() == "sha-256" and value:
+                try:
+                    return base64.b64decode(value.strip(":")).hex()
+                except (binascii.Error, ValueError):
+                    return None
+    return None
+
+
+def _encoded(response: httpx.Response) -> bool:
+    """Whether the response body has a content coding (offsets then count encoded bytes)."""
+    return response.headers.get("Content-Encoding", "identity").strip().lower() not in ("", "identity")
+
+
+def _total_size(response: httpx.Response) -> Optional[int]:
+    """Total representation size from Content-Range (206) or Content-Length (200)."""
+    if response.status_code == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length")
+    if length is not None and length.isdigit() and "Content-Encoding" not in response.headers:
+        return int(length)
+    return None
+
+
+class SpoolDownloader:
+    """Download request plans into the spool directory, resuming partial files."""
+
+    def __init__(
+        self,
+        spool_dir: Optional[str] = None,
+        chunk_size: int = 1_048_576,
+        max_attempts: int = 3,
+        max_age: float = 86400.0,
+    ):
+        self.spool_dir = os.path.expanduser(spool_dir or DEFAULT_SPOOL_DIR)
+        self.chunk_size = chunk_size
+        self.max_attempts = max_attempts
+        self.max_age = max_age
+        # Spool key -> [lock, number of callers holding or waiting for it]
+        self._locks: Dict[str, List[Any]] = {}
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+    def _paths(self, key: str):
+        final = os.path.join(self.spool_dir, key)
+        return final, final + ".part", final + ".part.json"
+
+    async def download(
+        self,
+        client: httpx.AsyncClient,
+        plan: RequestPlan,
+        url: str,
+        headers: Dict[str, str],
+        inline_max_bytes: Optional[int] = None,
+    ) -> Download:
+        """Download ``url`` into the spool and return the verified file.
+
+        Files of at most ``inline_max_bytes`` are read into ``content`` and
+        removed from the spool.
+        """
+        loop = asyncio.get_running_loop()
+        key = self._key(str(client.base_url.join(url)))
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await loop.run_in_executor(None, self._prune, set(self._locks))
+                download = await self._download(client, plan, url, headers, key)
+                if inline_max_bytes is not None and download.size <= inline_max_bytes:
+                    download.content = await loop.run_in_executor(None, _take, download.path)
+                return download
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def _prune(self, active: Set[str]) -> None:
+        """Create the spool directory and remove files older than ``max_age`` (runs on an executor)."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        horizon = time.time() - self.max_age
+        for entry in os.scandir(self.spool_dir):
+            # Files of downloads in progress are never touched
+            if entry.name.split(".", 1)[0] in active:
+                continue
+            try:
+                if entry.is_file() and entry.stat().st_mtime < horizon:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    async def _download(self, client: httpx.AsyncClient, plan: RequestPlan, url: str, headers: Dict[str, str], key: str) -> Download:
+        loop = asyncio.get_running_loop()
+        final_path, part_path, meta_path = self._paths(key)
+        extensions = {**plan.extensions, "streaming": True}
+
+        attempt = 0
+        while True:
+            attempt += 1
+            meta, offset = await loop.run_in_executor(None, _resume_state, part_path, meta_path)
+            request_headers = {**headers, "Accept": "*/*", "Accept-Encoding": "identity"}
+            validator = meta.get("etag") or meta.get("last_modified")
+            if offset and validator:
+                request_headers["Range"] = f"bytes={offset}-"
+                request_headers["If-Range"] = validator
+            else:
+                offset = 0
+
+            try:
+                async with client.stream("GET", url, headers=request_headers, extensions=extensions) as response:
+                    restart = response.status_code == 416 or (response.status_code == 206 and _encoded(response))
+                    if restart and offset:
+                        # The partial file is stale, already complete, or the
+                        # range was taken from an encoded body; start over
+                        await loop.run_in_executor(None, _remove, part_path, meta_path)
+                        continue
+                    if response.status_code >= 400:
+                        await response.aread()
+                        error = handle_api_error(response)
+                        raise DownloadError(str(error["message"]), error)
+                    if response.status_code != 206:
+                        offset = 0
+                    return await self._receive(response, offset, final_path, part_path, meta_path)
+            except RETRYABLE_ERRORS + (httpx.ReadError,):
+                if attempt >= self.max_attempts:
+                    raise
+                await asyncio.sleep(min(0.5 * 2 ** (attempt - 1), 5.0))
+
+    async def _receive(self, response: httpx.Response, offset: int, final_path: str, part_path: str, meta_path: str) -> Download:
+        loop = asyncio.get_running_loop()
+        encoded = _encoded(response)
+        # Sizes and offsets of an encoded body do not match the decoded bytes on disk
+        total = None if encoded else _total_size(response)
+        meta = {
+            "etag": None if encoded else response.headers.get("ETag"),
+            "last_modified": None if encoded else response.headers.get("Last-Modified"),
+            "total": total,
+        }
+        await loop.run_in_executor(None, _save_meta, meta_path, meta)
+
+        digest = hashlib.sha256()
+        handle = await loop.run_in_executor(None, open, part_path, "r+b" if offset else "wb")
+        try:
+            # Hash the bytes kept from the interrupted transfer before appending
+            while offset:
+                block = await loop.run_in_executor(None, handle.read, self.chunk_size)
+                if not block:
+                    break
+                digest.update(block)
+            handle.seek(offset)
+            handle.truncate()
+
+            received = offset
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                await loop.run_in_executor(None, handle.write, chunk)
+                digest.update(chunk)
+                received += len(chunk)
+                await report_progress(received, total, f"Downloaded {received} bytes")
+        finally:
+            await loop.run_in_executor(None, handle.close)
+
+        if total is not None and received != total:
+            raise DownloadError(f"Size mismatch: expected {total} bytes, received {received}")
+        sha256 = digest.hexdigest()
+        expected = _expected_sha256(response.headers)
+        if expected is not None and expected != sha256:
+            await loop.run_in_executor(None, _remove, part_path, meta_path)
+            raise DownloadError(f"Checksum mismatch: expected sha256 {expected}, got {sha256}")
+
+        await loop.run_in_executor(None, _complete, part_path, final_path, meta_path)
+        mime_type = response.headers.get("Content-Type", "application/octet-stream").split(";")[0].strip()
+        return Download(final_path, received, sha256, mime_type)
+
+
+# Blocking file operations, run on executor threads
+
+def _resume_state(part_path: str, meta_path: str) -> Tuple[Dict[str, Any], int]:
+    """Return the saved metadata and size of a partial file."""
+    try:
+        with open(meta_path, "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+    except (OSError, ValueError):
+        meta = {}
+    try:
+        offset = os.path.getsize(part_path)
+    except OSError:
+        offset = 0
+    return meta if isinstance(meta, dict) else {}, offset
+
+
+def _save_meta(path: str, meta: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(meta, handle)
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _complete(part_path: str, final_path: str, meta_path: str) -> None:
+    os.replace(part_path, final_path)
+    _remove(meta_path)
+
+
+def _take(path: str) -> bytes:
+    """Read a spool file and remove it."""
+    with open(path, "rb") as handle:
+        data = handle.read()
+    _remove(path)
+    return data
+
+
+def read_inline(download: Download) -> Any:
+    """Decode the inline content of a download: text for textual types, bytes otherwise."""
+    data = download.content or b""
+    if download.mime_type.startswith("text/") or download.mime_type in ("application/json", "application/xml"):
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+    return data
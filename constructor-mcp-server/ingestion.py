@@ -0,0 +1,243 @@
+"""
+Bulk ingestion of chunks through the batch-create endpoint.
+
+Chunks are read from a JSONL file (one chunk object per line) and packed into
+batches bounded by both chunk count and encoded size. Each chunk is encoded
+once; request bodies are assembled from the encoded chunks. A fixed number of
+workers send batches concurrently, pulling from a bounded queue so the reader
+never runs more than a few batches ahead of the network. Reading and
+encoding happen on an executor thread, off the event loop. A failed batch is
+retried on its own with backoff; the other batches are unaffected. Lines that
+are not valid JSON are skipped and reported with their line numbers.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from plans import RequestPlan
+from retry import RETRYABLE_ERRORS, RetryPolicy
+from utils import handle_api_error, report_progress
+
+
+class Batch(NamedTuple):
+    """A group of encoded chunks sent in one request."""
+    index: int
+    first_line: int
+    last_line: int
+    chunks: List[bytes]
+    size_bytes: int
+
+    def body(self) -> bytes:
+        return b'{"chunks":[' + b",".join(self.chunks) + b"]}"
+
+
+def read_jsonl(path: str, invalid: Optional[List[Dict[str, Any]]] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, chunk) for every non-blank line of a JSONL file.
+
+    Lines that are not valid JSON raise ValueError, unless an ``invalid`` list
+    is given: they are then appended to it and skipped.
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, 1):
+            if line.strip():
+                try:
+                    chunk = json.loads(line)
+                except json.JSONDecodeError as e:
+                    if invalid is None:
+                        raise ValueError(f"{path}:{line_number}: invalid JSON: {e}") from None
+                    invalid.append({"line": line_number, "error": f"invalid JSON: {e}"})
+                    continue
+                yield line_number, chunk
+
+
+def pack_batches(chunks: Iterable[Tuple[int, Any]], max_count: int = 100, max_bytes: int = 1_048_576) -> Iterator[Batch]:
+    """Pack (line number, chunk) pairs into batches bounded by count and encoded size."""
+    encoded: List[bytes] = []
+    size = 0
+    first_line = 0
+    last_line = 0
+    index = 0
+    for line_number, chunk in chunks:
+        data = json.dumps(chunk, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if encoded and (len(encoded) >= max_count or size + len(data) + 1 > max_bytes):
+            yield Batch(index, first_line, last_line, encoded, size)
+            index += 1
+            encoded, size = [], 0
+        if not encoded:
+            first_line = line_number
+        encoded.append(data)
+        size += len(data) + 1
+        last_line = line_number
+    if encoded:
+        yield Batch(index, first_line, last_line, encoded, size)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(fraction * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class IngestionReport:
+    """Throughput and per-batch latency of an ingestion run."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.batches = 0
+        self.chunks = 0
+        self.bytes = 0
+        self.retries = 0
+        self.latencies: List[float] = []
+        self.failed: List[Dict[str, Any]] = []
+        self.invalid_lines: List[Dict[str, Any]] = []
+
+    def record(self, batch: Batch, latency: float) -> None:
+        self.batches += 1
+        self.chunks += len(batch.chunks)
+        self.bytes += batch.size_bytes
+        self.latencies.append(latency)
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        latencies = sorted(self.latencies)
+        return {
+            "batches": self.batches,
+            "chunks": self.chunks,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "failed_batches": self.failed,
+            "invalid_lines": self.invalid_lines,
+            "elapsed_seconds": round(elapsed, 3),
+            "chunks_per_second": round(self.chunks / elapsed, 1),
+            "bytes_per_second": round(self.bytes / elapsed, 1),
+            "batch_latency": {
+                "avg": round(sum(latencies) / len(latencies), 4) if latencies else 0.0,
+                "p50": round(_percentile(latencies, 0.5), 4),
+                "p95": round(_percentile(latencies, 0.95), 4),
+                "max": round(latencies[-1], 4) if latencies else 0.0,
+            },
+        }
+
+
+async def ingest_batches(
+    client: httpx.AsyncClient,
+    plan: RequestPlan,
+    arguments: Dict[str, Any],
+    batches: Iterable[Batch],
+    concurrency: int = 4,
+    max_attempts: int = 3,
+) -> IngestionReport:
+    """Send batches concurrently with backpressure, retrying failed batches.
+
+    ``batches`` is consumed on an executor thread, so it may read files.
+    """
+    loop = asyncio.get_running_loop()
+    url, query_params, headers, _ = plan.build(arguments)
+    headers = {**headers, "Content-Type": "application/json"}
+    policy = RetryPolicy(max_attempts=max_attempts, methods=(plan.method,))
+    report = IngestionReport()
+    queue: "asyncio.Queue[Optional[Batch]]" = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def send(batch: Batch) -> None:
+        body = batch.body()
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            error: Dict[str, Any]
+            try:
+                response = await client.post(url, headers=headers, params=query_params, content=body, extensions=plan.extensions)
+            except RETRYABLE_ERRORS as e:
+                error = {"error": str(e)}
+                retryable = True
+            except httpx.HTTPError as e:
+                error = {"error": str(e)}
+                retryable = False
+            else:
+                if response.status_code < 400:
+                    report.record(batch, time.monotonic() - started)
+                    await report_progress(report.chunks, None, f"Ingested {report.batches} batch(es)")
+                    return
+                error = handle_api_error(response)
+                retryable = response.status_code in policy.statuses or response.status_code >= 500
+
+            if not retryable or attempt >= policy.max_attempts:
+                report.failed.append({
+                    "batch": batch.index,
+                    "lines": [batch.first_line, batch.last_line],
+                    "chunks": len(batch.chunks),
+                    "attempts": attempt,
+                    **error,
+                })
+                return
+            report.retries += 1
+            await asyncio.sleep(policy.backoff(attempt))
+
+    async def worker() -> None:
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            await send(batch)
+
+    async def produce() -> None:
+        iterator = iter(batches)
+        while True:
+            batch = await loop.run_in_executor(None, next, iterator, None)
+            if batch is None:
+                break
+            await queue.put(batch)
+        for _ in workers:
+            await queue.put(None)
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(max(concurrency, 1))]
+    tasks = [asyncio.ensure_future(produce()), *workers]
+    try:
+        # A worker that dies stops draining the queue, so wait on the producer
+        # and the workers together and surface the first failure.
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return report
+
+
+async def ingest_jsonl(
+    client: httpx.AsyncClient,
+    plan: RequestPlan,
+    arguments: Dict[str, Any],
+    batch_size: int = 100,
+    max_batch_bytes: int = 1_048_576,
+    concurrency: int = 4,
+    max_attempts: int = 3,
+) -> Dict[str, Any]:
+    """Ingest the JSONL file named by the ``jsonl_path`` argument.
+
+    ``batch_size``, ``max_batch_bytes`` and ``concurrency`` tool arguments
+    override the configured values.
+    """
+    settings = {"batch_size": batch_size, "max_batch_bytes": max_batch_bytes, "concurrency": concurrency}
+    for name in settings:
+        if arguments.get(name) is not None:
+            settings[name] = int(arguments[name])
+    path = arguments["jsonl_path"]
+    request_arguments = {key: value for key, value in arguments.items() if key != "jsonl_path" and key not in settings}
+
+    invalid: List[Dict[str, Any]] = []
+    batches = pack_batches(read_jsonl(path, invalid), settings["batch_size"], settings["max_batch_bytes"])
+    report = await ingest_batches(
+        client, plan, request_arguments, batches,
+        concurrency=settings["concurrency"], max_attempts=max_attempts,
+    )
+    report.invalid_lines = invalid
+    return {"success": not report.failed and not report.invalid_lines, "data": report.as_dict()}
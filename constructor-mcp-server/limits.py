@@ -0,0 +1,180 @@
+"""
+Admission control for upstream requests.
+
+Every request sent upstream must first be admitted: at most ``max_in_flight``
+requests are outstanding at once, and admissions are paced by a token bucket
+(``rate`` requests per second with bursts of up to ``burst``). Callers that
+cannot be admitted immediately wait in a FIFO queue, so admission order is
+fair. A slot is held until the response body has been consumed or closed.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def delay(self) -> float:
+        """Seconds until the next token becomes available."""
+        self._refill()
+        return max((1.0 - self.tokens) / self.rate, 0.0)
+
+
+class AdmissionController:
+    """FIFO admission queue bounded by in-flight count and a token bucket."""
+
+    def __init__(self, max_in_flight: int = 16, rate: Optional[float] = None, burst: Optional[float] = None):
+        self.max_in_flight = max_in_flight
+        self.bucket = TokenBucket(rate, burst or rate) if rate else None
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.admitted = 0
+        self.queued = 0
+        self.waits = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _can_admit(self) -> bool:
+        return self.in_flight < self.max_in_flight and (self.bucket is None or self.bucket.try_take())
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent upstream."""
+        if not self._waiters and self._can_admit():
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        started = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        self._wake()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just before being cancelled: hand the slot back.
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+        waited = time.monotonic() - started
+        self.waits += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def release(self) -> None:
+        """Return an in-flight slot and admit queued requests."""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.max_in_flight:
+            if self._waiters[0].done():
+                # Cancelled while queued: drop it without using a slot
+                self._waiters.popleft()
+                continue
+            if self.bucket is not None and not self.bucket.try_take():
+                if self._timer is None:
+                    loop = asyncio.get_running_loop()
+                    self._timer = loop.call_later(self.bucket.delay(), self._on_timer)
+                return
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            self.admitted += 1
+            waiter.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return admission and queue-wait counters."""
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "avg_queue_wait": self.total_wait / self.waits if self.waits else 0.0,
+            "max_queue_wait": self.max_wait,
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that releases its admission slot once closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, controller: AdmissionController):
+        self._stream = stream
+        self._controller = controller
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._controller.release()
+
+
+class LimitingTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that admits requests through an AdmissionController."""
+
+    name = "limits"
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, controller: AdmissionController):
+        self._transport = transport
+        self._controller = controller
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self._controller.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._controller.release()
+            raise
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, self._controller),
+            extensions=response.extensions,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return self._controller.stats()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,345 @@
+"""
+Local mirror of knowledge-model chunks with a full-text index.
+
+Chunks are stored in SQLite with an FTS5 index (external content table kept in
+step by triggers), so searches are answered locally with BM25 ranking.
+Syncing is incremental:
+
+- internal documents are listed with their ``updated_at`` timestamps, and
+  only documents that are new or changed have their chunks refetched;
+- a full sweep over every chunk of the model (which also covers files and
+  videos) runs on the first sync and then every ``full_sync_interval``
+  seconds. It rewrites only rows whose content hash changed and deletes
+  chunks that no longer exist. The per-document pass is skipped then, and
+  document versions are recorded straight from the listing.
+
+All database work runs on a single background thread.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from pagination import iter_pages
+from plans import RequestPlan
+from utils import report_progress
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirrors (
+    knowledge_model_id TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    knowledge_model_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    updated_at TEXT,
+    PRIMARY KEY (knowledge_model_id, id)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    rowid INTEGER PRIMARY KEY,
+    knowledge_model_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    document_id TEXT,
+    content_type TEXT,
+    document_page INTEGER,
+    chunk_index INTEGER,
+    text TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    UNIQUE (knowledge_model_id, id)
+);
+CREATE INDEX IF NOT EXISTS chunks_document ON chunks (knowledge_model_id, document_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+    INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE OF text ON chunks BEGIN
+    INSERT INTO chunks_fts (chunks_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+    INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+END;
+"""
+
+UPSERT_CHUNK = """
+INSERT INTO chunks (knowledge_model_id, id, document_id, content_type, document_page, chunk_index, text, hash)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (knowledge_model_id, id) DO UPDATE SET
+    document_id = excluded.document_id,
+    content_type = excluded.content_type,
+    document_page = excluded.document_page,
+    chunk_index = excluded.chunk_index,
+    text = excluded.text,
+    hash = excluded.hash
+WHERE chunks.hash != excluded.hash
+"""
+
+SEARCH = """
+SELECT c.id, c.document_id, c.text, c.content_type, c.document_page, c.chunk_index, bm25(chunks_fts) AS rank
+FROM chunks_fts JOIN chunks AS c ON c.rowid = chunks_fts.rowid
+WHERE chunks_fts MATCH ? AND c.knowledge_model_id = ?{documents}
+ORDER BY rank
+LIMIT ?
+"""
+
+DEFAULT_PATH = os.path.join("~", ".cache", "constructor-mcp", "mirror.sqlite3")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _chunk_hash(chunk: Dict[str, Any]) -> str:
+    key = "\x1f".join(str(chunk.get(name, "")) for name in ("document_id", "content_type", "document_page", "chunk_index", "text"))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def fts_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching any of its words."""
+    words = _WORD.findall(query)
+    if not words:
+        return None
+    return " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+class ChunkMirror:
+    """SQLite/FTS5 mirror of the chunks of one or more knowledge models."""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_staleness: float = 3600.0, full_sync_interval: float = 86400.0, page_size: int = 100, prefetch: int = 2):
+        self.path = os.path.expanduser(path)
+        self.max_staleness = max_staleness
+        self.full_sync_interval = full_sync_interval
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mirror")
+        self._db: Optional[sqlite3.Connection] = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # Database operations (run on the mirror thread)
+
+    def _status(self, knowledge_model_id: str) -> Dict[str, Any]:
+        db = self._connect()
+        row = db.execute(
+            "SELECT synced_at, full_synced_at FROM mirrors WHERE knowledge_model_id = ?", (knowledge_model_id,)
+        ).fetchone()
+        chunks = db.execute("SELECT COUNT(*) FROM chunks WHERE knowledge_model_id = ?", (knowledge_model_id,)).fetchone()[0]
+        if row is None:
+            return {"knowledge_model_id": knowledge_model_id, "synced": False, "chunks": chunks, "stale": True}
+        age = time.time() - row[0]
+        return {
+            "knowledge_model_id": knowledge_model_id,
+            "synced": True,
+            "chunks": chunks,
+            "synced_at": row[0],
+            "full_synced_at": row[1],
+            "age_seconds": round(age, 1),
+            "stale": age > self.max_staleness,
+        }
+
+    def _document_versions(self, knowledge_model_id: str) -> Dict[str, Optional[str]]:
+        rows = self._connect().execute(
+            "SELECT id, updated_at FROM documents WHERE knowledge_model_id = ?", (knowledge_model_id,)
+        )
+        return dict(rows.fetchall())
+
+    def _upsert_chunks(self, knowledge_model_id: str, chunks: List[Dict[str, Any]]) -> int:
+        db = self._connect()
+        with db:
+            cursor = db.executemany(UPSERT_CHUNK, [
+                (
+                    knowledge_model_id,
+                    str(chunk["id"]),
+                    chunk.get("document_id"),
+                    chunk.get("content_type"),
+                    chunk.get("document_page"),
+                    chunk.get("chunk_index"),
+                    chunk.get("text") or "",
+                    _chunk_hash(chunk),
+                )
+                for chunk in chunks
+                if chunk.get("id") is not None
+            ])
+            return max(cursor.rowcount, 0)
+
+    def _replace_document(self, knowledge_model_id: str, document_id: str, updated_at: Optional[str], keep: Set[str]) -> int:
+        """Drop chunks of a document that were not seen and record its version."""
+        db = self._connect()
+        with db:
+            existing = db.execute(
+                "SELECT id FROM chunks WHERE knowledge_model_id = ? AND document_id = ?", (knowledge_model_id, document_id)
+            ).fetchall()
+            stale = [(knowledge_model_id, chunk_id) for (chunk_id,) in existing if chunk_id not in keep]
+            db.executemany("DELETE FROM chunks WHERE knowledge_model_id = ? AND id = ?", stale)
+            db.execute(
+                "INSERT OR REPLACE INTO documents (knowledge_model_id, id, updated_at) VALUES (?, ?, ?)",
+                (knowledge_model_id, document_id, updated_at),
+            )
+            return len(stale)
+
+    def _remove_documents(self, knowledge_model_id: str, document_ids: Iterable[str]) -> int:
+        db = self._connect()
+        removed = 0
+        with db:
+            for document_id in document_ids:
+                removed += db.execute(
+                    "DELETE FROM chunks WHERE knowledge_model_id = ? AND document_id = ?", (knowledge_model_id, document_id)
+                ).rowcount
+                db.execute("DELETE FROM documents WHERE knowledge_model_id = ? AND id = ?", (knowledge_model_id, document_id))
+        return removed
+
+    def _set_documents(self, knowledge_model_id: str, versions: Dict[str, Optional[str]]) -> None:
+        """Replace the recorded document versions of a knowledge model."""
+        db = self._connect()
+        with db:
+            db.execute("DELETE FROM documents WHERE knowledge_model_id = ?", (knowledge_model_id,))
+            db.executemany(
+                "INSERT INTO documents (knowledge_model_id, id, updated_at) VALUES (?, ?, ?)",
+                [(knowledge_model_id, document_id, updated_at) for document_id, updated_at in versions.items()],
+            )
+
+    def _prune_chunks(self, knowledge_model_id: str, keep: Set[str]) -> int:
+        db = self._connect()
+        with db:
+            existing = db.execute("SELECT id FROM chunks WHERE knowledge_model_id = ?", (knowledge_model_id,)).fetchall()
+            stale = [(knowledge_model_id, chunk_id) for (chunk_id,) in existing if chunk_id not in keep]
+            db.executemany("DELETE FROM chunks WHERE knowledge_model_id = ? AND id = ?", stale)
+        return len(stale)
+
+    def _mark_synced(self, knowledge_model_id: str, full: bool) -> None:
+        db = self._connect()
+        now = time.time()
+        with db:
+            row = db.execute("SELECT full_synced_at FROM mirrors WHERE knowledge_model_id = ?", (knowledge_model_id,)).fetchone()
+            full_synced_at = now if full or row is None else row[0]
+            db.execute(
+                "INSERT OR REPLACE INTO mirrors (knowledge_model_id, synced_at, full_synced_at) VALUES (?, ?, ?)",
+                (knowledge_model_id, now, full_synced_at),
+            )
+
+    def _search(self, knowledge_model_id: str, match: str, top_k: int, document_ids: Optional[List[str]]) -> List[Dict[str, Any]]:
+        params: List[Any] = [match, knowledge_model_id]
+        documents = ""
+        if document_ids:
+            documents = f" AND c.document_id IN ({', '.join('?' * len(document_ids))})"
+            params.extend(document_ids)
+        params.append(top_k)
+        rows = self._connect().execute(SEARCH.format(documents=documents), params).fetchall()
+        return [
+            {
+                "id": row[0],
+                "document_id": row[1],
+                "text": row[2],
+                "content_type": row[3],
+                "document_page": row[4],
+                "chunk_index": row[5],
+                # bm25() is lower for better matches
+                "similarity_score": round(-row[6], 6),
+            }
+            for row in rows
+        ]
+
+    # Public API
+
+    def syncing(self, knowledge_model_id: str) -> bool:
+        """Return True while a sync of the knowledge model is running."""
+        lock = self._locks.get(knowledge_model_id)
+        return lock is not None and lock.locked()
+
+    async def status(self, knowledge_model_id: str) -> Dict[str, Any]:
+        return await self._run(self._status, knowledge_model_id)
+
+    async def search(self, knowledge_model_id: str, query: str, top_k: int = 10, document_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search the mirrored chunks of a knowledge model."""
+        match = fts_query(query)
+        if match is None:
+            return []
+        return await self._run(self._search, knowledge_model_id, match, top_k, document_ids)
+
+    async def sync(
+        self,
+        client: httpx.AsyncClient,
+        chunks_plan: RequestPlan,
+        documents_plan: RequestPlan,
+        knowledge_model_id: str,
+        full: bool = False,
+    ) -> Dict[str, Any]:
+        """Bring the mirror of a knowledge model up to date."""
+        lock = self._locks.setdefault(knowledge_model_id, asyncio.Lock())
+        async with lock:
+            started = time.monotonic()
+            status = await self.status(knowledge_model_id)
+            full = full or not status["synced"] or time.time() - status["full_synced_at"] > self.full_sync_interval
+            stats = {"full": full, "documents_changed": 0, "documents_removed": 0, "chunks_written": 0, "chunks_removed": 0}
+            pages = {"page_size": self.page_size, "prefetch": self.prefetch}
+
+            # Internal documents: refetch chunks only for new or changed documents
+            known = await self._run(self._document_versions, knowledge_model_id)
+            listed: Dict[str, Optional[str]] = {}
+            async for page in iter_pages(client, documents_plan, {"knowledge_model_id": knowledge_model_id}, **pages):
+                for document in page.items:
+                    listed[str(document["id"])] = document.get("updated_at")
+            stats["documents_removed"] = sum(1 for document_id in known if document_id not in listed)
+
+            if full:
+                # Full sweep: every chunk of the model, including files and
+                # videos; it covers the internal documents as well
+                seen: Set[str] = set()
+                async for page in iter_pages(client, chunks_plan, {"knowledge_model_id": knowledge_model_id}, **pages):
+                    seen.update(str(chunk["id"]) for chunk in page.items)
+                    stats["chunks_written"] += await self._run(self._upsert_chunks, knowledge_model_id, page.items)
+                    await report_progress(len(seen), page.total, "Full sync of chunks")
+                stats["chunks_removed"] += await self._run(self._prune_chunks, knowledge_model_id, seen)
+                await self._run(self._set_documents, knowledge_model_id, listed)
+                stats["documents_changed"] = sum(
+                    1 for document_id, updated_at in listed.items()
+                    if document_id not in known or known[document_id] != updated_at
+                )
+            else:
+                for document_id, updated_at in listed.items():
+                    if document_id in known and known[document_id] == updated_at:
+                        continue
+                    seen = set()
+                    arguments = {"knowledge_model_id": knowledge_model_id, "document_id": document_id}
+                    async for page in iter_pages(client, chunks_plan, arguments, **pages):
+                        seen.update(str(chunk["id"]) for chunk in page.items)
+                        stats["chunks_written"] += await self._run(self._upsert_chunks, knowledge_model_id, page.items)
+                    stats["chunks_removed"] += await self._run(self._replace_document, knowledge_model_id, document_id, updated_at, seen)
+                    stats["documents_changed"] += 1
+                    await report_progress(stats["documents_changed"], len(listed), f"Synced document {document_id}")
+
+                removed = [document_id for document_id in known if document_id not in listed]
+                stats["chunks_removed"] += await self._run(self._remove_documents, knowledge_model_id, removed)
+
+            await self._run(self._mark_synced, knowledge_model_id, full)
+            stats["elapsed_seconds"] = round(time.monotonic() - started, 3)
+            stats["status"] = await self.status(knowledge_model_id)
+            return stats
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._executor.submit(self._db.close).result()
+            self._db = None
+        self._executor.shutdown(wait=False)
+
@@ -0,0 +1,180 @@
+"""
+Automatic pagination of limit/offset list operations.
+
+Operations whose plan declares both ``offset`` and ``limit`` query parameters
+are paginated. ``iter_pages`` walks such an operation as an async generator:
+after the first page has reported the total, up to ``prefetch`` following
+pages are fetched concurrently while the caller consumes the current one.
+Walking stops at the end of the collection or once a caller-supplied item or
+byte budget is reached.
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from plans import PAGINATION_ARGUMENTS, RequestPlan
+from utils import format_response, handle_api_error, report_progress
+
+
+class Page(NamedTuple):
+    """One page of a list operation."""
+    offset: int
+    items: List[Any]
+    total: Optional[int]
+    size_bytes: int
+
+
+class PaginationError(Exception):
+    """Raised when upstream answers a page request with an error status."""
+
+    def __init__(self, response: httpx.Response, offset: int):
+        super().__init__(f"Page at offset {offset} failed with status {response.status_code}")
+        self.response = response
+        self.offset = offset
+
+
+def _page_items(data: Any) -> List[Any]:
+    if isinstance(data, dict):
+        results = data.get("results")
+        return results if isinstance(results, list) else []
+    return data if isinstance(data, list) else []
+
+
+def _page_total(data: Any) -> Optional[int]:
+    if isinstance(data, dict) and isinstance(data.get("total"), int):
+        return data["total"]
+    return None
+
+
+async def _cancel(tasks: Deque["asyncio.Task[Page]"]) -> None:
+    """Cancel outstanding prefetches and wait until they have finished."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    tasks.clear()
+
+
+async def iter_pages(
+    client: httpx.AsyncClient,
+    plan: RequestPlan,
+    arguments: Dict[str, Any],
+    page_size: int = 100,
+    prefetch: int = 2,
+    max_items: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> AsyncIterator[Page]:
+    """Yield the pages of a paginated operation, starting at the ``offset`` argument."""
+    if not plan.paginated:
+        raise ValueError(f"Operation {plan.operation_id} is not paginated")
+
+    url, params, headers, _ = plan.build(arguments)
+    offset = int(params.pop("offset", None) or 0)
+    limit = int(params.pop("limit", None) or page_size)
+    end = offset + max_items if max_items is not None else None
+
+    async def fetch(page_offset: int) -> Page:
+        page_params = {**params, "offset": page_offset, "limit": limit}
+        response = await client.get(url, headers=headers, params=page_params, extensions=plan.extensions)
+        if response.status_code >= 400:
+            raise PaginationError(response, page_offset)
+        data = format_response(response)["data"]
+        return Page(page_offset, _page_items(data), _page_total(data), len(response.content))
+
+    pending: Deque["asyncio.Task[Page]"] = deque()
+    next_offset = offset
+    total: Optional[int] = None
+    items_seen = 0
+    bytes_seen = 0
+
+    def schedule() -> None:
+        nonlocal next_offset
+        # Until a page has reported the total, pages are fetched one at a time
+        window = max(prefetch, 1) if total is not None else 1
+        while len(pending) < window:
+            if (total is not None and next_offset >= total) or (end is not None and next_offset >= end):
+                break
+            pending.append(asyncio.ensure_future(fetch(next_offset)))
+            next_offset += limit
+
+    try:
+        schedule()
+        while pending:
+            page = await pending.popleft()
+            if page.total is not None:
+                total = page.total
+
+            items = page.items
+            if end is not None and page.offset + len(items) > end:
+                items = items[: end - page.offset]
+            if max_bytes is not None and bytes_seen + page.size_bytes > max_bytes:
+                return
+            items_seen += len(items)
+            bytes_seen += page.size_bytes
+            yield Page(page.offset, items, total, page.size_bytes)
+
+            if end is not None and page.offset + len(items) >= end:
+                return
+            if len(page.items) < limit:
+                if total is None or not page.items or page.offset + len(page.items) >= total:
+                    return
+                # Upstream capped the page size; continue with the size it serves
+                await _cancel(pending)
+                limit = len(page.items)
+                next_offset = page.offset + limit
+            schedule()
+    finally:
+        await _cancel(pending)
+
+
+async def collect_pages(
+    client: httpx.AsyncClient,
+    plan: RequestPlan,
+    arguments: Dict[str, Any],
+    page_size: int = 100,
+    prefetch: int = 2,
+    max_items: Optional[int] = 10_000,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Fetch every page of a list tool call and merge them into one result.
+
+    Pagination arguments given in the tool call override the configured ones.
+    """
+    settings = {"page_size": page_size, "prefetch": prefetch, "max_items": max_items, "max_bytes": max_bytes}
+    for name in PAGINATION_ARGUMENTS[1:]:
+        if arguments.get(name) is not None:
+            settings[name] = int(arguments[name])
+    request_arguments = {key: value for key, value in arguments.items() if key not in PAGINATION_ARGUMENTS}
+
+    results: List[Any] = []
+    pages = 0
+    size_bytes = 0
+    total: Optional[int] = None
+    next_offset = int(request_arguments.get("offset") or 0)
+    try:
+        async for page in iter_pages(client, plan, request_arguments, **settings):
+            pages += 1
+            size_bytes += page.size_bytes
+            total = page.total
+            results.extend(page.items)
+            next_offset = page.offset + len(page.items)
+            await report_progress(len(results), total, f"Fetched {pages} page(s)")
+    except PaginationError as e:
+        error = handle_api_error(e.response)
+        error["pagination"] = {"pages": pages, "items": len(results), "failed_offset": e.offset}
+        return error
+
+    return {
+        "success": True,
+        "status_code": 200,
+        "data": {"results": results, "total": total},
+        "pagination": {
+            "pages": pages,
+            "items": len(results),
+            "bytes": size_bytes,
+            "complete": total is not None and next_offset >= total,
+            "next_offset": next_offset,
+        },
+    }
@@ -0,0 +1,187 @@
+"""
+Precompiled request plans for API operations.
+
+A plan is built once per operation at import time. It splits the path
+template into literal and parameter segments and records where each known
+argument belongs, so building a request is a single pass over the arguments.
+Control arguments, which only steer the tool (pagination, uploads,
+ingestion), are never sent upstream; any other argument the plan does not
+know goes to the query string. Default headers, including the API key, are
+read on every build so that a changed key takes effect.
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from utils import get_api_headers
+
+PATH = "path"
+QUERY = "query"
+HEADER = "header"
+BODY = "body"
+CONTROL = "control"
+
+# Control arguments of every limit/offset list operation
+PAGINATION_ARGUMENTS = ("all_pages", "page_size", "prefetch", "max_items", "max_bytes")
+
+# Characters that never need percent-encoding in a path segment
+_UNSAFE_SEGMENT = re.compile(r"[^A-Za-z0-9_.~-]")
+
+
+_default_headers: Tuple[Optional[str], Dict[str, str]] = (None, {})
+
+
+def default_headers() -> Dict[str, str]:
+    """The API headers, rebuilt only when the API key has changed (do not modify)."""
+    global _default_headers
+    api_key = os.environ.get("API_KEY")
+    if not _default_headers[1] or _default_headers[0] != api_key:
+        _default_headers = (api_key, get_api_headers())
+    return _default_headers[1]
+
+
+class PreparedRequest(NamedTuple):
+    """Request parts produced by RequestPlan.build()."""
+    url: str
+    params: Dict[str, Any]
+    headers: Dict[str, str]
+    body: Any
+
+
+class RequestPlan:
+    """Compiled description of how to turn tool arguments into an HTTP request."""
+
+    __slots__ = (
+        "operation_id",
+        "method",
+        "path",
+        "literals",
+        "path_params",
+        "query_params",
+        "header_params",
+        "paginated",
+        "controls",
+        "headers",
+        "extensions",
+        "_locations",
+    )
+
+    def __init__(
+        self,
+        operation_id: str,
+        method: str,
+        path: str,
+        query: Iterable[str] = (),
+        header: Iterable[str] = (),
+        headers: Optional[Dict[str, str]] = None,
+        controls: Iterable[str] = (),
+    ):
+        self.operation_id = operation_id
+        self.method = method.upper()
+        self.path = path
+        self.literals, self.path_params = _split_path(path)
+        self.query_params = frozenset(query)
+        self.header_params = frozenset(header)
+        # limit/offset list operations can be walked page by page
+        self.paginated = {"offset", "limit"} <= self.query_params
+        self.controls = frozenset(controls).union(PAGINATION_ARGUMENTS if self.paginated else ())
+        # None: the default API headers, read at build time
+        self.headers = dict(headers) if headers is not None else None
+        # Request extensions let transport layers apply per-operation policies
+        self.extensions = {"operation": operation_id}
+
+        locations: Dict[str, str] = {"body": BODY}
+        for name in self.controls:
+            locations[name] = CONTROL
+        for name in self.query_params:
+            locations[name] = QUERY
+        for name in self.header_params:
+            locations[name] = HEADER
+        for name in self.path_params:
+            locations[name] = PATH
+        self._locations = locations
+
+    def build(self, arguments: Dict[str, Any]) -> PreparedRequest:
+        """Split arguments by location and render the request URL."""
+        locations = self._locations
+        path_values: Dict[str, Any] = {}
+        query_params: Dict[str, Any] = {}
+        shared = default_headers() if self.headers is None else self.headers
+        headers = shared
+        request_body = None
+
+        for key, value in arguments.items():
+            location = locations.get(key, QUERY)
+            if location == QUERY:
+                query_params[key] = value
+            elif location == PATH:
+                path_values[key] = value
+            elif location == HEADER:
+                if headers is shared:
+                    headers = dict(headers)
+                headers[key] = str(value)
+            elif location == BODY:
+                request_body = value
+
+        return PreparedRequest(self.render_path(path_values), query_params, headers, request_body)
+
+    def render_path(self, path_values: Dict[str, Any]) -> str:
+        """Substitute path parameter values into the path template."""
+        literals = self.literals
+        if not self.path_params:
+            return literals[0]
+
+        parts = [literals[0]]
+        for index, name in enumerate(self.path_params, 1):
+            try:
+                value = path_values[name]
+            except KeyError:
+                raise ValueError(f"Missing path parameter: {name}") from None
+            value = str(value)
+            if _UNSAFE_SEGMENT.search(value) is not None:
+                value = quote(value, safe="")
+            parts.append(value)
+            parts.append(literals[index])
+        return "".join(parts)
+
+    def parse_path(self, path: str) -> Dict[str, str]:
+        """Extract path parameter values from a concrete path matching this plan."""
+        segments = path.strip("/").split("/")
+        template = self.path.strip("/").split("/")
+        if len(segments) != len(template):
+            raise ValueError(f"Path {path!r} does not match {self.path!r}")
+
+        values: Dict[str, str] = {}
+        for segment, pattern in zip(segments, template):
+            if pattern.startswith("{"):
+                values[pattern[1:-1]] = unquote(segment)
+            elif segment != pattern:
+                raise ValueError(f"Path {path!r} does not match {self.path!r}")
+        return values
+
+
+def _split_path(path: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Split "/a/{x}/b" into literals ("/a/", "/b") and parameters ("x",)."""
+    literals: List[str] = []
+    params: List[str] = []
+    rest = path
+    while True:
+        start = rest.find("{")
+        if start < 0:
+            literals.append(rest)
+            break
+        end = rest.index("}", start)
+        literals.append(rest[:start])
+        params.append(rest[start + 1:end])
+        rest = rest[end + 1:]
+    return tuple(literals), tuple(params)
+
+
+def compile_plans(operations: Dict[str, Dict[str, Any]]) -> Dict[str, RequestPlan]:
+    """Compile an operation table into request plans keyed by operation name."""
+    return {
+        operation_id: RequestPlan(operation_id, **operation)
+        for operation_id, operation in operations.items()
+    }
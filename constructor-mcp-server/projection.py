@@ -0,0 +1,181 @@
+"""
+Projection of tool and resource results.
+
+A caller can narrow a result to what it needs with:
+
+- ``fields``: a list (or comma-separated string) of field paths such as
+  ``id``, ``name`` or ``metadata.page``. Lists are projected element by
+  element, and list responses (``{"results": [...], "total": n}``) project
+  their items while keeping the other keys.
+- ``projection``: an expression selecting part of the result. JMESPath is used
+  when the ``jmespath`` package is installed; otherwise a JSONPath-like subset
+  is supported (``results[*].metadata``, ``$.results[0].text``, ``*``).
+
+Tools take these as arguments; resources take them as URI query parameters
+(``api:///...?fields=id,name``). Compiled projections are cached, and the
+projection is applied to ``data`` before serialization.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+try:
+    import jmespath
+except ImportError:  # pragma: no cover - optional dependency
+    jmespath = None
+
+# Arguments (and resource URI query parameters) that describe a projection
+PROJECTION_ARGUMENTS = ("fields", "projection")
+
+# Input schema properties advertised for every tool
+PROJECTION_SCHEMA = {
+    "fields": {
+        "description": "Return only these fields (e.g. [\"id\", \"name\"]); applied to each item of list results",
+        "items": {"type": "string"},
+        "type": "array",
+    },
+    "projection": {
+        "description": "Expression selecting part of the result data (JMESPath, or a JSONPath-like subset such as results[*].id)",
+        "type": "string",
+    },
+}
+
+_MISSING = object()
+_STEP = re.compile(r"\.?([^.\[\]]+)|\[(\*|-?\d+)\]")
+
+
+def _pick(value: Any, paths: Tuple[Tuple[str, ...], ...]) -> Any:
+    if isinstance(value, list):
+        return [_pick(item, paths) for item in value]
+    if not isinstance(value, dict):
+        return value
+    picked: Dict[str, Any] = {}
+    for path in paths:
+        current: Any = value
+        for key in path:
+            current = current.get(key, _MISSING) if isinstance(current, dict) else _MISSING
+            if current is _MISSING:
+                break
+        if current is _MISSING:
+            continue
+        target = picked
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = current
+    return picked
+
+
+@lru_cache(maxsize=256)
+def compile_fields(fields: Tuple[str, ...]) -> Callable[[Any], Any]:
+    """Compile a field list into a function picking those fields."""
+    requested = tuple(dict.fromkeys(tuple(field.split(".")) for field in fields if field))
+    # A field already picked whole covers its subfields ("a" covers "a.b")
+    paths = tuple(
+        path for path in requested
+        if not any(len(other) < len(path) and path[:len(other)] == other for other in requested)
+    )
+
+    def project(value: Any) -> Any:
+        if isinstance(value, dict) and isinstance(value.get("results"), list):
+            first = tuple(path[0] for path in paths)
+            if "results" not in first:
+                return {**value, "results": _pick(value["results"], paths)}
+        return _pick(value, paths)
+
+    return project
+
+
+def _compile_path(expression: str) -> Callable[[Any], Any]:
+    text = expression.strip()
+    if text.startswith("$"):
+        text = text[1:]
+    steps: List[Tuple[str, Any]] = []
+    position = 0
+    while position < len(text):
+        match = _STEP.match(text, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Invalid projection expression: {expression!r}")
+        name, index = match.groups()
+        if name == "*" or index == "*":
+            steps.append(("each", None))
+        elif name is not None:
+            steps.append(("key", name))
+        else:
+            steps.append(("index", int(index)))
+        position = match.end()
+
+    def evaluate(value: Any, start: int = 0) -> Any:
+        for position in range(start, len(steps)):
+            kind, argument = steps[position]
+            if kind == "each":
+                items = value if isinstance(value, list) else list(value.values()) if isinstance(value, dict) else []
+                return [result for result in (evaluate(item, position + 1) for item in items) if result is not None]
+            if kind == "key":
+                value = value.get(argument) if isinstance(value, dict) else None
+            else:
+                value = value[argument] if isinstance(value, list) and -len(value) <= argument < len(value) else None
+            if value is None:
+                return None
+        return value
+
+    return evaluate
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression: str) -> Callable[[Any], Any]:
+    """Compile a projection expression with JMESPath, or the JSONPath-like subset."""
+    if jmespath is not None and not expression.lstrip().startswith("$"):
+        return jmespath.compile(expression).search
+    return _compile_path(expression)
+
+
+class Projection:
+    """A compiled projection applied to the ``data`` of a result."""
+
+    __slots__ = ("_steps",)
+
+    def __init__(self, fields: Any = None, expression: Optional[str] = None):
+        steps = []
+        if expression:
+            steps.append(compile_expression(expression))
+        if fields:
+            if isinstance(fields, str):
+                fields = fields.split(",")
+            steps.append(compile_fields(tuple(field.strip() for field in fields)))
+        self._steps = tuple(steps)
+
+    def apply(self, result: Any) -> Any:
+        """Project ``result["data"]`` of a successful result; other results pass through."""
+        if not isinstance(result, dict) or "data" not in result or result.get("error"):
+            return result
+        data = result["data"]
+        for step in self._steps:
+            data = step(data)
+        return {**result, "data": data}
+
+
+def split_arguments(arguments: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Projection]]:
+    """Remove projection arguments from tool arguments and compile them."""
+    if not any(name in arguments for name in PROJECTION_ARGUMENTS):
+        return arguments, None
+    arguments = dict(arguments)
+    fields = arguments.pop("fields", None)
+    expression = arguments.pop("projection", None)
+    if not fields and not expression:
+        return arguments, None
+    return arguments, Projection(fields, expression)
+
+
+def split_uri(uri: str) -> Tuple[str, Optional[Projection]]:
+    """Remove projection query parameters from a resource URI and compile them."""
+    base, separator, query = uri.partition("?")
+    if not separator:
+        return uri, None
+    params = parse_qs(query)
+    fields = ",".join(params.get("fields", ()))
+    expression = params.get("projection", [None])[-1]
+    if not fields and not expression:
+        return uri, None
+    return base, Projection(fields or None, expression)
@@ -4,17 +4,43 @@ Resource implementations for MCP server.
 
 import json
 import os
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 import httpx
-from utils import get_api_headers, handle_api_error, format_response, load_config
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from downloads import DownloadError, SpoolDownloader, read_inline
+from plans import compile_plans
+from utils import get_http_client, get_http_stats, handle_api_error, format_response, load_config
 
-# Load configuration
-config = load_config()
-base_url = config.get("api", {}).get("base_url", "https://constructor.app/api/platform-kmapi")
+# Shared HTTP client for API calls (base URL and pool limits come from config.json)
+client = get_http_client()
 
-# HTTP client for API calls
-client = httpx.AsyncClient(timeout=30.0)
+# File downloads are spooled to disk; small ones are also returned inline
+download_config = dict(load_config().get("downloads", {}))
+inline_max_bytes = download_config.pop("inline_max_bytes", 10_485_760)
+downloader = SpoolDownloader(**download_config)
+
+# Request plans for every resource, compiled once at import time
+PLANS = compile_plans({
+    "get_alive_resource": {"method": "GET", "path": "/alive"},
+    "get_v1_knowledge_models_resource": {"method": "GET", "path": "/v1/knowledge-models"},
+    "get_v1_knowledge_models_by_id_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}"},
+    "get_v1_knowledge_models_settings_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/settings"},
+    "get_v1_knowledge_models_chat_sessions_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions"},
+    "get_v1_knowledge_models_chat_sessions_by_id_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}"},
+    "get_v1_knowledge_models_files_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}"},
+    "get_v1_knowledge_models_files_metadata_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata"},
+    "get_v1_knowledge_models_internal_documents_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}"},
+    "get_v1_knowledge_models_widget_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/widget"},
+    "get_v1_knowledge_models_videos_transcription_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}/transcription"},
+    "get_v1_knowledge_models_videos_resource": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}"},
+    "get_v1_language_models_resource": {"method": "GET", "path": "/v1/language_models"},
+})
+
+
+def uri_path(uri: str) -> str:
+    """Return the API path of a resource URI such as api:///v1/knowledge-models."""
+    return uri.split("://", 1)[-1]
 
 
 async def resource_get_alive_resource(uri: str) -> Dict[str, Any]:
@@ -26,14 +52,12 @@ async def resource_get_alive_resource(uri: str) -> Dict[str, Any]:
     URI: api:///alive
     """
     try:
-        # Build URL
-        url = f"/alive"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_alive_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -54,12 +78,12 @@ async def resource_get_v1_knowledge_models_resource(uri: str) -> Dict[str, Any]:
     URI: api:///v1/knowledge-models
     """
     try:
-        # Build URL
-        url = f"{base_url}/v1/knowledge-models"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        response = await client.get(url, headers=headers)
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -80,15 +104,12 @@ async def resource_get_v1_knowledge_models_by_id_resource(uri: str) -> Dict[str,
     URI: api:///v1/knowledge-models/{knowledge_model_id}
     """
     try:
-        # Extract knowledge_model_id from URI
-        knowledge_model_id = uri.split('/')[-1]
-        
-        # Build URL
-        url = f"{base_url}/v1/knowledge-models/{knowledge_model_id}"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_by_id_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        response = await client.get(url, headers=headers)
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -109,14 +130,12 @@ async def resource_get_v1_knowledge_models_settings_resource(uri: str) -> Dict[s
     URI: api:///v1/knowledge-models/{knowledge_model_id}/settings
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/settings"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_settings_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -137,14 +156,12 @@ async def resource_get_v1_knowledge_models_chat_sessions_resource(uri: str) -> D
     URI: api:///v1/knowledge-models/{knowledge_model_id}/chat-sessions
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/chat-sessions"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_chat_sessions_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -165,17 +182,12 @@ async def resource_get_v1_knowledge_models_chat_sessions_by_id_resource(uri: str
     URI: api:///v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}
     """
     try:
-        # Extract IDs from URI
-        parts = uri.split('/')
-        knowledge_model_id = parts[3]
-        chat_session_id = parts[5]
-        
-        # Build URL
-        url = f"{base_url}/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_chat_sessions_by_id_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        response = await client.get(url, headers=headers)
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -187,7 +199,7 @@ async def resource_get_v1_knowledge_models_chat_sessions_by_id_resource(uri: str
         return {"error": str(e), "resource": "get_v1_knowledge_models_chat_sessions_by_id_resource"}
 
 
-async def resource_get_v1_knowledge_models_files_resource(uri: str) -> Dict[str, Any]:
+async def resource_get_v1_knowledge_models_files_resource(uri: str) -> Union[Dict[str, Any], List[ReadResourceContents]]:
     """
     Access to download a file from a knowledge model
     
@@ -196,21 +208,21 @@ async def resource_get_v1_knowledge_models_files_resource(uri: str) -> Dict[str,
     URI: api:///v1/knowledge-models/{knowledge_model_id}/files/{file_id}
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/files/{file_id}"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_files_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
-        # Make request
+        # Stream the body to the spool directory, resuming a partial download
+        download = await downloader.download(client, plan, url, headers, inline_max_bytes)
         
-        response = await client.get(url, headers=headers)
+        # Return small files inline and larger ones as a reference to the spool file
+        if download.content is None:
+            return {"success": True, "data": download.as_dict()}
         
+        return [ReadResourceContents(read_inline(download), download.mime_type)]
         
-        # Handle response
-        if response.status_code >= 400:
-            return handle_api_error(response)
-        
-        return format_response(response)
-        
+    except DownloadError as e:
+        return e.error
     except Exception as e:
         return {"error": str(e), "resource": "get_v1_knowledge_models_files_resource"}
 
@@ -224,14 +236,12 @@ async def resource_get_v1_knowledge_models_files_metadata_resource(uri: str) ->
     URI: api:///v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_files_metadata_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -252,14 +262,12 @@ async def resource_get_v1_knowledge_models_internal_documents_resource(uri: str)
     URI: api:///v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_internal_documents_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -280,14 +288,12 @@ async def resource_get_v1_knowledge_models_widget_resource(uri: str) -> Dict[str
     URI: api:///v1/knowledge-models/{knowledge_model_id}/widget
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/widget"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_widget_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -308,14 +314,12 @@ async def resource_get_v1_knowledge_models_videos_transcription_resource(uri: st
     URI: api:///v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}/transcription
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}/transcription"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_videos_transcription_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -336,14 +340,12 @@ async def resource_get_v1_knowledge_models_videos_resource(uri: str) -> Dict[str
     URI: api:///v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}
     """
     try:
-        # Build URL
-        url = f"/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_videos_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -364,14 +366,12 @@ async def resource_get_v1_language_models_resource(uri: str) -> Dict[str, Any]:
     URI: api:///v1/language_models
     """
     try:
-        # Build URL
-        url = f"/v1/language_models"
-        headers = get_api_headers()
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_language_models_resource"]
+        url, _, headers, _ = plan.build(plan.parse_path(uri_path(uri)))
         
         # Make request
-        
-        response = await client.get(url, headers=headers)
-        
+        response = await client.get(url, headers=headers, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -381,3 +381,16 @@ async def resource_get_v1_language_models_resource(uri: str) -> Dict[str, Any]:
         
     except Exception as e:
         return {"error": str(e), "resource": "get_v1_language_models_resource"}
+
+
+async def resource_get_http_metrics_resource(uri: str) -> Dict[str, Any]:
+    """
+    Access to HTTP client metrics (cache and request coalescing counters)
+    
+    URI: metrics:///http
+    """
+    try:
+        return {"success": True, "data": get_http_stats()}
+        
+    except Exception as e:
+        return {"error": str(e), "resource": "get_http_metrics_resource"}
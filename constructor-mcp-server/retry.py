@@ -0,0 +1,198 @@
+"""
+Retries of transient upstream failures.
+
+Idempotent requests that fail with a connect error, a timeout or a transient
+status (429/502/503/504 by default) are retried with exponential backoff and
+full jitter. A Retry-After header from upstream takes precedence over the
+computed delay. A global retry budget caps retries to a fraction of recent
+requests so that retries cannot amplify an outage. Policies can be
+overridden per operation (the ``operation`` request extension).
+"""
+
+import asyncio
+import email.utils
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional
+
+import httpx
+
+DEFAULT_STATUSES = (429, 502, 503, 504)
+DEFAULT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# Errors raised before or while talking to upstream that are safe to retry
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
+class RetryPolicy:
+    """When and how often a request may be retried."""
+
+    __slots__ = ("max_attempts", "backoff_base", "backoff_max", "max_retry_after", "statuses", "methods")
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        max_retry_after: float = 30.0,
+        statuses: Iterable[int] = DEFAULT_STATUSES,
+        methods: Iterable[str] = DEFAULT_METHODS,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+
+    def replace(self, **overrides: Any) -> "RetryPolicy":
+        """Return a copy of this policy with some settings overridden."""
+        settings = {name: getattr(self, name) for name in self.__slots__}
+        settings.update(overrides)
+        return RetryPolicy(**settings)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay after failed attempt number ``attempt``."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+
+class RetryBudget:
+    """Allow retries up to a fraction of the requests seen in a sliding window."""
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, window: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """Consume one retry from the budget, returning False if it is exhausted."""
+        now = time.monotonic()
+        self._trim(now)
+        allowed = self.ratio * len(self._requests) + self.min_per_second * self.window
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper that retries transient failures within a retry budget."""
+
+    name = "retry"
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        policy: Optional[RetryPolicy] = None,
+        budget: Optional[RetryBudget] = None,
+        overrides: Optional[Dict[str, RetryPolicy]] = None,
+    ):
+        self._transport = transport
+        self._policy = policy or RetryPolicy()
+        self._budget = budget or RetryBudget()
+        self._overrides = dict(overrides or {})
+        self.requests = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.gave_up = 0
+
+    def _policy_for(self, request: httpx.Request) -> RetryPolicy:
+        return self._overrides.get(request.extensions.get("operation"), self._policy)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self._policy_for(request)
+        self.requests += 1
+        self._budget.record_request()
+        # Streamed downloads are retried (and resumed) by the downloader itself
+        if request.method not in policy.methods or policy.max_attempts <= 1 or request.extensions.get("streaming"):
+            return await self._transport.handle_async_request(request)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await self._transport.handle_async_request(request)
+            except RETRYABLE_ERRORS:
+                if attempt >= policy.max_attempts:
+                    self.gave_up += 1
+                    raise
+                if not self._acquire_retry():
+                    raise
+                await asyncio.sleep(policy.backoff(attempt))
+                continue
+
+            # Fail-fast responses from an open circuit breaker are final
+            if response.status_code not in policy.statuses or "X-Circuit-Open" in response.headers:
+                return response
+            if attempt >= policy.max_attempts:
+                self.gave_up += 1
+                return response
+
+            delay = policy.backoff(attempt)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > policy.max_retry_after:
+                    return response
+                delay = retry_after
+            if not self._acquire_retry():
+                return response
+
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+    def _acquire_retry(self) -> bool:
+        if self._budget.try_acquire():
+            self.retries += 1
+            return True
+        self.budget_exhausted += 1
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        """Return retry counters for this transport."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "gave_up": self.gave_up,
+        }
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_retry_transport(transport: httpx.AsyncBaseTransport, config: Dict[str, Any]) -> RetryTransport:
+    """Wrap a transport with the policy from the ``retry`` section of config.json."""
+    settings = {key: value for key, value in config.items() if key in RetryPolicy.__slots__}
+    policy = RetryPolicy(**settings)
+    budget = RetryBudget(**config.get("budget", {}))
+    overrides = {
+        operation: policy.replace(**override)
+        for operation, override in config.get("operations", {}).items()
+    }
+    return RetryTransport(transport, policy=policy, budget=budget, overrides=overrides)
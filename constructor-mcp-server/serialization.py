@@ -0,0 +1,71 @@
+"""
+JSON serialization of tool and resource results.
+
+orjson is used when it is installed; otherwise the standard library json
+module is used. Output is compact by default and can be capped in size, in
+which case a small JSON envelope with a preview is returned instead.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class JsonSerializer:
+    """Serialize results to JSON text with an optional size cap."""
+
+    def __init__(self, backend: str = "auto", compact: bool = True, max_bytes: Optional[int] = None):
+        if backend == "auto":
+            backend = "orjson" if orjson is not None else "json"
+        if backend == "orjson" and orjson is None:
+            raise ValueError("orjson serializer requested but orjson is not installed")
+        if backend not in ("orjson", "json"):
+            raise ValueError(f"Unknown serializer backend: {backend}")
+        self.backend = backend
+        self.compact = compact
+        self.max_bytes = max_bytes
+
+        if backend == "orjson":
+            self._options = orjson.OPT_NON_STR_KEYS | (0 if compact else orjson.OPT_INDENT_2)
+        else:
+            self._kwargs: Dict[str, Any] = {"ensure_ascii": False, "default": str}
+            if compact:
+                self._kwargs["separators"] = (",", ":")
+            else:
+                self._kwargs["indent"] = 2
+
+    def dumps_bytes(self, value: Any) -> bytes:
+        """Serialize a value to UTF-8 encoded JSON."""
+        if self.backend == "orjson":
+            return orjson.dumps(value, default=str, option=self._options)
+        return json.dumps(value, **self._kwargs).encode("utf-8")
+
+    def dumps(self, value: Any) -> str:
+        """Serialize a value to JSON text, applying the size cap if configured."""
+        data = self.dumps_bytes(value)
+        if self.max_bytes is not None and len(data) > self.max_bytes:
+            data = self._oversized(data)
+        return data.decode("utf-8")
+
+    def _oversized(self, data: bytes) -> bytes:
+        preview = data[: max(self.max_bytes // 2, 0)].decode("utf-8", errors="ignore")
+        return self.dumps_bytes({
+            "truncated": True,
+            "size_bytes": len(data),
+            "max_bytes": self.max_bytes,
+            "preview": preview,
+        })
+
+
+def create_serializer(config: Dict[str, Any]) -> JsonSerializer:
+    """Create a serializer from the ``serialization`` section of config.json."""
+    serialization_config = config.get("serialization", {})
+    return JsonSerializer(
+        backend=serialization_config.get("backend", "auto"),
+        compact=serialization_config.get("compact", True),
+        max_bytes=serialization_config.get("max_bytes"),
+    )
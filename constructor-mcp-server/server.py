@@ -7,17 +7,23 @@ Generated from OpenAPI specification for ConstructorKnowledgeModel
 import asyncio
 import os
 import sys
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Union
 
 from mcp.server import Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, Resource, TextContent, ImageContent, EmbeddedResource
 import mcp.server.stdio
 import mcp.types as types
 
 from tools import *
+from tools import mirror
 from resources import *
-from utils import setup_logging, load_config
+from batch import BatchError, run_batch
+from compaction import create_compactor
+from projection import PROJECTION_SCHEMA, split_arguments, split_uri
+from serialization import create_serializer
+from utils import DEFAULT_BASE_URL, close_http_client, progress_callback, setup_logging, load_config
 
 # Server configuration
 SERVER_NAME = "constructor-knowledge-api"
@@ -29,6 +35,12 @@ server = Server(SERVER_NAME)
 # Setup logging
 logger = setup_logging()
 
+# Serializer shared by all tool and resource handlers
+serializer = create_serializer(load_config())
+
+# Compacts results over their token budget before serialization (None if disabled)
+compactor = create_compactor(serializer, load_config())
+
 @server.list_tools()
 async def handle_list_tools() -> List[Tool]:
     """List available tools."""
@@ -85,11 +97,11 @@ async def handle_list_tools() -> List[Tool]:
         Tool(
             name="get_v1_knowledge_models_chat_sessions_messages",
             description="Get all messages from chat session",
-            inputSchema={"properties": {"chat_session_id": {"type": "string"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id", "chat_session_id"], "type": "object"}
+            inputSchema={"properties": {"all_pages": {"description": "Fetch every page (with prefetching) and return them merged", "type": "boolean"}, "chat_session_id": {"type": "string"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "max_bytes": {"description": "Stop once this many response bytes have been fetched (with all_pages)", "type": "integer"}, "max_items": {"description": "Stop once this many items have been fetched (with all_pages)", "type": "integer"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id", "chat_session_id"], "type": "object"}
         ),
 
         Tool(
-            name="get_v1_knowledge_models_chat_sessions_messages",
+            name="get_v1_knowledge_models_chat_sessions_messages_by_id",
             description="Get chat message",
             inputSchema={"properties": {"chat_session_id": {"type": "string"}, "knowledge_model_id": {"type": "string"}, "message_id": {"type": "string"}}, "required": ["knowledge_model_id", "chat_session_id", "message_id"], "type": "object"}
         ),
@@ -103,13 +115,13 @@ async def handle_list_tools() -> List[Tool]:
         Tool(
             name="get_v1_knowledge_models_files",
             description="GET: List files of the knowledge model",
-            inputSchema={"properties": {"knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
+            inputSchema={"properties": {"all_pages": {"description": "Fetch every page (with prefetching) and return them merged", "type": "boolean"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "max_bytes": {"description": "Stop once this many response bytes have been fetched (with all_pages)", "type": "integer"}, "max_items": {"description": "Stop once this many items have been fetched (with all_pages)", "type": "integer"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
         ),
 
         Tool(
             name="post_v1_knowledge_models_files",
             description="POST: Upload a file to the knowledge model",
-            inputSchema={"properties": {"knowledge_model_id": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
+            inputSchema={"properties": {"content_type": {"description": "MIME type of the file (guessed from the name by default)", "type": "string"}, "file_path": {"description": "Local path of the file to upload; streamed as multipart/form-data", "type": "string"}, "filename": {"description": "File name to send (defaults to the base name of file_path)", "type": "string"}, "folder": {"type": "string"}, "knowledge_model_id": {"type": "string"}}, "required": ["knowledge_model_id", "file_path"], "type": "object"}
         ),
 
         Tool(
@@ -133,7 +145,7 @@ async def handle_list_tools() -> List[Tool]:
         Tool(
             name="get_v1_knowledge_models_internal_documents",
             description="GET: List internal documents",
-            inputSchema={"properties": {"knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
+            inputSchema={"properties": {"all_pages": {"description": "Fetch every page (with prefetching) and return them merged", "type": "boolean"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "max_bytes": {"description": "Stop once this many response bytes have been fetched (with all_pages)", "type": "integer"}, "max_items": {"description": "Stop once this many items have been fetched (with all_pages)", "type": "integer"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
         ),
 
         Tool(
@@ -157,17 +169,17 @@ async def handle_list_tools() -> List[Tool]:
         Tool(
             name="get_v1_knowledge_models_internal_documents_chunks",
             description="GET: List internal chunks",
-            inputSchema={"properties": {"document_id": {"type": "string"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "offset": {"type": "string"}}, "required": ["document_id", "knowledge_model_id"], "type": "object"}
+            inputSchema={"properties": {"all_pages": {"description": "Fetch every page (with prefetching) and return them merged", "type": "boolean"}, "document_id": {"type": "string"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "max_bytes": {"description": "Stop once this many response bytes have been fetched (with all_pages)", "type": "integer"}, "max_items": {"description": "Stop once this many items have been fetched (with all_pages)", "type": "integer"}, "offset": {"type": "string"}}, "required": ["document_id", "knowledge_model_id"], "type": "object"}
         ),
 
         Tool(
             name="post_v1_knowledge_models_internal_documents_chunks_batch",
             description="POST: Batch create internal chunks",
-            inputSchema={"properties": {"document_id": {"type": "string"}, "knowledge_model_id": {"type": "string"}}, "required": ["document_id", "knowledge_model_id"], "type": "object"}
+            inputSchema={"properties": {"batch_size": {"description": "Chunks per request when ingesting jsonl_path", "type": "integer"}, "concurrency": {"description": "Batches sent concurrently when ingesting jsonl_path", "type": "integer"}, "document_id": {"type": "string"}, "jsonl_path": {"description": "Local JSONL file with one chunk per line to ingest in batches", "type": "string"}, "knowledge_model_id": {"type": "string"}, "max_batch_bytes": {"description": "Maximum encoded size of one batch when ingesting jsonl_path", "type": "integer"}}, "required": ["document_id", "knowledge_model_id"], "type": "object"}
         ),
 
         Tool(
-            name="get_v1_knowledge_models_internal_documents_chunks",
+            name="get_v1_knowledge_models_internal_documents_chunks_by_id",
             description="Get internal chunk",
             inputSchema={"properties": {"chunk_id": {"type": "string"}, "document_id": {"type": "string"}, "knowledge_model_id": {"type": "string"}}, "required": ["chunk_id", "document_id", "knowledge_model_id"], "type": "object"}
         ),
@@ -193,7 +205,7 @@ async def handle_list_tools() -> List[Tool]:
         Tool(
             name="get_v1_knowledge_models_chunks",
             description="GET: List document chunks",
-            inputSchema={"properties": {"content_type": {"description": "Filter by chunk content type", "type": "string"}, "document_id": {"description": "Filter by specific document ID", "type": "string"}, "document_type": {"description": "Filter by document type", "type": "string"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "offset": {"type": "string"}, "sort": {"description": "Sort by field, e.g. \u0027chunk_index\u0027", "type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
+            inputSchema={"properties": {"all_pages": {"description": "Fetch every page (with prefetching) and return them merged", "type": "boolean"}, "content_type": {"description": "Filter by chunk content type", "type": "string"}, "document_id": {"description": "Filter by specific document ID", "type": "string"}, "document_type": {"description": "Filter by document type", "type": "string"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "max_bytes": {"description": "Stop once this many response bytes have been fetched (with all_pages)", "type": "integer"}, "max_items": {"description": "Stop once this many items have been fetched (with all_pages)", "type": "integer"}, "offset": {"type": "string"}, "sort": {"description": "Sort by field, e.g. \u0027chunk_index\u0027", "type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
         ),
 
         Tool(
@@ -211,7 +223,7 @@ async def handle_list_tools() -> List[Tool]:
         Tool(
             name="get_v1_knowledge_models_videos",
             description="GET: List videos in the knowledge model",
-            inputSchema={"properties": {"knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
+            inputSchema={"properties": {"all_pages": {"description": "Fetch every page (with prefetching) and return them merged", "type": "boolean"}, "knowledge_model_id": {"type": "string"}, "limit": {"type": "string"}, "max_bytes": {"description": "Stop once this many response bytes have been fetched (with all_pages)", "type": "integer"}, "max_items": {"description": "Stop once this many items have been fetched (with all_pages)", "type": "integer"}, "offset": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
         ),
 
         Tool(
@@ -227,7 +239,7 @@ async def handle_list_tools() -> List[Tool]:
         ),
 
         Tool(
-            name="post_v1_knowledge_models_chat_completions",
+            name="post_v1_knowledge_models_chat_completions_by_extension",
             description="POST: Generates text responses based on incoming messages.",
             inputSchema={"properties": {"X-KM-Extension": {"type": "string"}, "extension": {"type": "string"}, "knowledge_model_id": {"type": "string"}}, "required": ["knowledge_model_id", "extension"], "type": "object"}
         ),
@@ -244,7 +256,41 @@ async def handle_list_tools() -> List[Tool]:
             inputSchema={"properties": {"knowledge_model_id": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
         ),
 
+        Tool(
+            name="sync_local_mirror",
+            description="Sync the local full-text mirror of a knowledge model's chunks (incremental unless full is set)",
+            inputSchema={"properties": {"full": {"description": "Refetch every chunk instead of only changed documents", "type": "boolean"}, "knowledge_model_id": {"type": "string"}}, "required": ["knowledge_model_id"], "type": "object"}
+        ),
+
+        Tool(
+            name="search_local_chunks",
+            description="Full-text search over the local chunk mirror; uses remote chunk search while the mirror is stale",
+            inputSchema={"properties": {"included_document_ids": {"items": {"type": "string"}, "type": "array"}, "knowledge_model_id": {"type": "string"}, "query": {"type": "string"}, "top_k": {"type": "integer"}}, "required": ["knowledge_model_id", "query"], "type": "object"}
+        ),
+
+        Tool(
+            name="search_knowledge_models",
+            description="Search chunks across several knowledge models concurrently; results are merged, deduplicated and ranked by score. Models that miss the deadline are reported as timed out.",
+            inputSchema={"properties": {"deadline": {"description": "Seconds to wait for the slowest model", "type": "number"}, "knowledge_model_ids": {"items": {"type": "string"}, "type": "array"}, "query": {"type": "string"}, "top_k": {"type": "integer"}}, "required": ["knowledge_model_ids", "query"], "type": "object"}
+        ),
+
+        Tool(
+            name="continue_result",
+            description="Fetch the next part of an array or string that was truncated to fit the token budget (pass a cursor from compaction.truncated)",
+            inputSchema={"properties": {"cursor": {"type": "string"}}, "required": ["cursor"], "type": "object"}
+        ),
+
+        Tool(
+            name="batch_call",
+            description="Run several tool calls in one request. Calls run concurrently once their dependencies finish; an argument {\"$ref\": \"<id>.<path>\"} takes a value from an earlier result, and a '*' path segment runs the call once per list element.",
+            inputSchema={"properties": {"calls": {"items": {"properties": {"arguments": {"type": "object"}, "depends_on": {"items": {"type": "string"}, "type": "array"}, "id": {"type": "string"}, "tool": {"type": "string"}}, "required": ["tool"], "type": "object"}, "type": "array"}, "max_concurrency": {"description": "Maximum tool calls running at once", "type": "integer"}}, "required": ["calls"], "type": "object"}
+        ),
+
     ]
+    # Every tool except batch_call accepts a projection of its result
+    for tool in tools:
+        if tool.name != "batch_call":
+            tool.inputSchema["properties"].update(PROJECTION_SCHEMA)
     return tools
 
 @server.list_resources()
@@ -268,7 +314,7 @@ async def handle_list_resources() -> List[Resource]:
 
         Resource(
             uri="api:///v1/knowledge-models/{knowledge_model_id}",
-            name="get_v1_knowledge_models_resource",
+            name="get_v1_knowledge_models_by_id_resource",
             description="Access to get knowledge model",
             mimeType="application/json"
         ),
@@ -289,7 +335,7 @@ async def handle_list_resources() -> List[Resource]:
 
         Resource(
             uri="api:///v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}",
-            name="get_v1_knowledge_models_chat_sessions_resource",
+            name="get_v1_knowledge_models_chat_sessions_by_id_resource",
             description="Access to get chat session",
             mimeType="application/json"
         ),
@@ -343,687 +389,249 @@ async def handle_list_resources() -> List[Resource]:
             mimeType="application/json"
         ),
 
+        Resource(
+            uri="metrics:///http",
+            name="get_http_metrics_resource",
+            description="Access to HTTP client metrics (cache and request coalescing counters)",
+            mimeType="application/json"
+        ),
+
+        Resource(
+            uri="metrics:///compaction",
+            name="get_compaction_metrics_resource",
+            description="Access to response compaction counters (bytes and tokens saved per tool)",
+            mimeType="application/json"
+        ),
+
     ]
     return resources
 
 # Tool handlers
 
-@server.call_tool()
-async def handle_post_v1_knowledge_models(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models tool."""
-    if name != "post_v1_knowledge_models":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_delete_v1_knowledge_models(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle delete_v1_knowledge_models tool."""
-    if name != "delete_v1_knowledge_models":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_delete_v1_knowledge_models(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in delete_v1_knowledge_models: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models tool."""
-    if name != "patch_v1_knowledge_models":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models_settings(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models_settings tool."""
-    if name != "patch_v1_knowledge_models_settings":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models_settings(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models_settings: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_chat_sessions(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_chat_sessions tool."""
-    if name != "post_v1_knowledge_models_chat_sessions":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_chat_sessions(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_chat_sessions: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_delete_v1_knowledge_models_chat_sessions(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle delete_v1_knowledge_models_chat_sessions tool."""
-    if name != "delete_v1_knowledge_models_chat_sessions":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_delete_v1_knowledge_models_chat_sessions(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in delete_v1_knowledge_models_chat_sessions: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models_chat_sessions(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models_chat_sessions tool."""
-    if name != "patch_v1_knowledge_models_chat_sessions":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models_chat_sessions(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models_chat_sessions: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_chat_sessions_messages(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_chat_sessions_messages tool."""
-    if name != "post_v1_knowledge_models_chat_sessions_messages":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_chat_sessions_messages(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_chat_sessions_messages: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_chat_sessions_messages(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_chat_sessions_messages tool."""
-    if name != "get_v1_knowledge_models_chat_sessions_messages":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_chat_sessions_messages(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_chat_sessions_messages: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_chat_sessions_messages(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_chat_sessions_messages tool."""
-    if name != "get_v1_knowledge_models_chat_sessions_messages":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_chat_sessions_messages(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_chat_sessions_messages: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_chat_sessions_messages_feedback(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_chat_sessions_messages_feedback tool."""
-    if name != "post_v1_knowledge_models_chat_sessions_messages_feedback":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_chat_sessions_messages_feedback(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_chat_sessions_messages_feedback: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_files(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_files tool."""
-    if name != "get_v1_knowledge_models_files":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_files(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_files: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_files(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_files tool."""
-    if name != "post_v1_knowledge_models_files":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_files(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_files: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_delete_v1_knowledge_models_files(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle delete_v1_knowledge_models_files tool."""
-    if name != "delete_v1_knowledge_models_files":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_delete_v1_knowledge_models_files(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in delete_v1_knowledge_models_files: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models_files_metadata(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models_files_metadata tool."""
-    if name != "patch_v1_knowledge_models_files_metadata":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models_files_metadata(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models_files_metadata: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_internal_documents(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_internal_documents tool."""
-    if name != "post_v1_knowledge_models_internal_documents":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_internal_documents(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_internal_documents: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_internal_documents(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_internal_documents tool."""
-    if name != "get_v1_knowledge_models_internal_documents":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_internal_documents(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_internal_documents: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models_internal_documents(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models_internal_documents tool."""
-    if name != "patch_v1_knowledge_models_internal_documents":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models_internal_documents(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models_internal_documents: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_delete_v1_knowledge_models_internal_documents(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle delete_v1_knowledge_models_internal_documents tool."""
-    if name != "delete_v1_knowledge_models_internal_documents":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_delete_v1_knowledge_models_internal_documents(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in delete_v1_knowledge_models_internal_documents: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_internal_documents_chunks(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_internal_documents_chunks tool."""
-    if name != "post_v1_knowledge_models_internal_documents_chunks":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_internal_documents_chunks(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_internal_documents_chunks: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_internal_documents_chunks(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_internal_documents_chunks tool."""
-    if name != "get_v1_knowledge_models_internal_documents_chunks":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_internal_documents_chunks(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_internal_documents_chunks: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_internal_documents_chunks_batch(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_internal_documents_chunks_batch tool."""
-    if name != "post_v1_knowledge_models_internal_documents_chunks_batch":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_internal_documents_chunks_batch(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_internal_documents_chunks_batch: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_internal_documents_chunks(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_internal_documents_chunks tool."""
-    if name != "get_v1_knowledge_models_internal_documents_chunks":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_internal_documents_chunks(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_internal_documents_chunks: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models_internal_documents_chunks(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models_internal_documents_chunks tool."""
-    if name != "patch_v1_knowledge_models_internal_documents_chunks":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models_internal_documents_chunks(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models_internal_documents_chunks: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_delete_v1_knowledge_models_internal_documents_chunks(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle delete_v1_knowledge_models_internal_documents_chunks tool."""
-    if name != "delete_v1_knowledge_models_internal_documents_chunks":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_delete_v1_knowledge_models_internal_documents_chunks(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in delete_v1_knowledge_models_internal_documents_chunks: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models_widget(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models_widget tool."""
-    if name != "patch_v1_knowledge_models_widget":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models_widget(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models_widget: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_chunks(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_chunks tool."""
-    if name != "get_v1_knowledge_models_chunks":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_chunks(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_chunks: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_chunks_search(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_chunks_search tool."""
-    if name != "post_v1_knowledge_models_chunks_search":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_chunks_search(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_chunks_search: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_videos_import(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_videos_import tool."""
-    if name != "post_v1_knowledge_models_videos_import":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_videos_import(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_videos_import: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_get_v1_knowledge_models_videos(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle get_v1_knowledge_models_videos tool."""
-    if name != "get_v1_knowledge_models_videos":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_get_v1_knowledge_models_videos(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in get_v1_knowledge_models_videos: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_patch_v1_knowledge_models_videos(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle patch_v1_knowledge_models_videos tool."""
-    if name != "patch_v1_knowledge_models_videos":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_patch_v1_knowledge_models_videos(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in patch_v1_knowledge_models_videos: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_delete_v1_knowledge_models_videos(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle delete_v1_knowledge_models_videos tool."""
-    if name != "delete_v1_knowledge_models_videos":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_delete_v1_knowledge_models_videos(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in delete_v1_knowledge_models_videos: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_chat_completions(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_chat_completions tool."""
-    if name != "post_v1_knowledge_models_chat_completions":
-        raise ValueError(f"Unknown tool: {name}")
-    
-    try:
-        result = await tool_post_v1_knowledge_models_chat_completions(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_chat_completions: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
-
-
-@server.call_tool()
-async def handle_post_v1_knowledge_models_chat_completions(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_chat_completions tool."""
-    if name != "post_v1_knowledge_models_chat_completions":
-        raise ValueError(f"Unknown tool: {name}")
+# Registry mapping each tool name to its implementation in tools.py.
+# Tool names are unique, so dispatch is a single dictionary lookup.
+TOOL_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = {
+    "post_v1_knowledge_models": tool_post_v1_knowledge_models,
+    "delete_v1_knowledge_models": tool_delete_v1_knowledge_models,
+    "patch_v1_knowledge_models": tool_patch_v1_knowledge_models,
+    "patch_v1_knowledge_models_settings": tool_patch_v1_knowledge_models_settings,
+    "post_v1_knowledge_models_chat_sessions": tool_post_v1_knowledge_models_chat_sessions,
+    "delete_v1_knowledge_models_chat_sessions": tool_delete_v1_knowledge_models_chat_sessions,
+    "patch_v1_knowledge_models_chat_sessions": tool_patch_v1_knowledge_models_chat_sessions,
+    "post_v1_knowledge_models_chat_sessions_messages": tool_post_v1_knowledge_models_chat_sessions_messages,
+    "get_v1_knowledge_models_chat_sessions_messages": tool_get_v1_knowledge_models_chat_sessions_messages,
+    "get_v1_knowledge_models_chat_sessions_messages_by_id": tool_get_v1_knowledge_models_chat_sessions_messages_by_id,
+    "post_v1_knowledge_models_chat_sessions_messages_feedback": tool_post_v1_knowledge_models_chat_sessions_messages_feedback,
+    "get_v1_knowledge_models_files": tool_get_v1_knowledge_models_files,
+    "post_v1_knowledge_models_files": tool_post_v1_knowledge_models_files,
+    "delete_v1_knowledge_models_files": tool_delete_v1_knowledge_models_files,
+    "patch_v1_knowledge_models_files_metadata": tool_patch_v1_knowledge_models_files_metadata,
+    "post_v1_knowledge_models_internal_documents": tool_post_v1_knowledge_models_internal_documents,
+    "get_v1_knowledge_models_internal_documents": tool_get_v1_knowledge_models_internal_documents,
+    "patch_v1_knowledge_models_internal_documents": tool_patch_v1_knowledge_models_internal_documents,
+    "delete_v1_knowledge_models_internal_documents": tool_delete_v1_knowledge_models_internal_documents,
+    "post_v1_knowledge_models_internal_documents_chunks": tool_post_v1_knowledge_models_internal_documents_chunks,
+    "get_v1_knowledge_models_internal_documents_chunks": tool_get_v1_knowledge_models_internal_documents_chunks,
+    "post_v1_knowledge_models_internal_documents_chunks_batch": tool_post_v1_knowledge_models_internal_documents_chunks_batch,
+    "get_v1_knowledge_models_internal_documents_chunks_by_id": tool_get_v1_knowledge_models_internal_documents_chunks_by_id,
+    "patch_v1_knowledge_models_internal_documents_chunks": tool_patch_v1_knowledge_models_internal_documents_chunks,
+    "delete_v1_knowledge_models_internal_documents_chunks": tool_delete_v1_knowledge_models_internal_documents_chunks,
+    "patch_v1_knowledge_models_widget": tool_patch_v1_knowledge_models_widget,
+    "get_v1_knowledge_models_chunks": tool_get_v1_knowledge_models_chunks,
+    "post_v1_knowledge_models_chunks_search": tool_post_v1_knowledge_models_chunks_search,
+    "post_v1_knowledge_models_videos_import": tool_post_v1_knowledge_models_videos_import,
+    "get_v1_knowledge_models_videos": tool_get_v1_knowledge_models_videos,
+    "patch_v1_knowledge_models_videos": tool_patch_v1_knowledge_models_videos,
+    "delete_v1_knowledge_models_videos": tool_delete_v1_knowledge_models_videos,
+    "post_v1_knowledge_models_chat_completions_by_extension": tool_post_v1_knowledge_models_chat_completions_by_extension,
+    "post_v1_knowledge_models_chat_completions": tool_post_v1_knowledge_models_chat_completions,
+    "post_v1_knowledge_models_tools_translation": tool_post_v1_knowledge_models_tools_translation,
+    "sync_local_mirror": tool_sync_local_mirror,
+    "search_local_chunks": tool_search_local_chunks,
+    "search_knowledge_models": tool_search_knowledge_models,
+}
+
+# Before these tools had distinct names, a call to the shared name reached the
+# single-item operation. Such calls are recognised by the argument only that
+# operation takes and still routed to it.
+LEGACY_TOOL_ROUTES = {
+    "get_v1_knowledge_models_chat_sessions_messages": ("message_id", "get_v1_knowledge_models_chat_sessions_messages_by_id"),
+    "get_v1_knowledge_models_internal_documents_chunks": ("chunk_id", "get_v1_knowledge_models_internal_documents_chunks_by_id"),
+    "post_v1_knowledge_models_chat_completions": ("extension", "post_v1_knowledge_models_chat_completions_by_extension"),
+}
+
+
+def _route_legacy(
+    handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    argument: str,
+    target: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+) -> Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]:
+    async def route(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return await (target if argument in arguments else handler)(arguments)
+    return route
+
+
+for _name, (_argument, _target) in LEGACY_TOOL_ROUTES.items():
+    TOOL_HANDLERS[_name] = _route_legacy(TOOL_HANDLERS[_name], _argument, TOOL_HANDLERS[_target])
+
+# batch_call may invoke every tool above, but not itself
+BATCH_HANDLERS = dict(TOOL_HANDLERS)
+batch_config = load_config().get("batch", {})
+
+
+async def tool_batch_call(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a DAG of tool calls with bounded concurrency and return all results."""
+    try:
+        settings = dict(batch_config)
+        if arguments.get("max_concurrency") is not None:
+            settings["max_concurrency"] = min(int(arguments["max_concurrency"]), settings.get("max_concurrency", 8))
+        return await run_batch(arguments.get("calls"), BATCH_HANDLERS, **settings)
+    except BatchError as e:
+        return {"error": str(e), "tool": "batch_call"}
+
+
+TOOL_HANDLERS["batch_call"] = tool_batch_call
+
+
+async def tool_continue_result(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the next part of a result that was truncated to fit the token budget."""
+    try:
+        if compactor is None:
+            raise ValueError("Response compaction is disabled")
+        return compactor.resume(arguments["cursor"])
+    except Exception as e:
+        return {"error": str(e), "tool": "continue_result"}
+
+
+TOOL_HANDLERS["continue_result"] = tool_continue_result
+
+
+def _progress_reporter():
+    """Build a progress callback for the current request, or None if no token was sent."""
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+    progress_token = ctx.meta.progressToken if ctx.meta else None
+    if progress_token is None:
+        return None
+    
+    async def send(progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        await ctx.session.send_progress_notification(
+            progress_token, progress, total=total, message=message, related_request_id=ctx.request_id
+        )
     
-    try:
-        result = await tool_post_v1_knowledge_models_chat_completions(arguments)
-        return [TextContent(type="text", text=str(result))]
-    except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_chat_completions: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
+    return send
 
 
 @server.call_tool()
-async def handle_post_v1_knowledge_models_tools_translation(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle post_v1_knowledge_models_tools_translation tool."""
-    if name != "post_v1_knowledge_models_tools_translation":
+async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """Dispatch a tool call to its registered implementation."""
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
         raise ValueError(f"Unknown tool: {name}")
     
+    token = progress_callback.set(_progress_reporter())
     try:
-        result = await tool_post_v1_knowledge_models_tools_translation(arguments)
-        return [TextContent(type="text", text=str(result))]
+        arguments, projection = split_arguments(arguments or {})
+        result = await handler(arguments)
+        if projection is not None:
+            result = projection.apply(result)
+        if compactor is not None:
+            result = compactor.compact(name, result)
+        return [TextContent(type="text", text=serializer.dumps(result))]
     except Exception as e:
-        logger.error(f"Error in post_v1_knowledge_models_tools_translation: {e}")
+        logger.error(f"Error in {name}: {e}")
         return [TextContent(type="text", text=f"Error: {str(e)}")]
-
+    finally:
+        progress_callback.reset(token)
 
 
 # Resource handlers
 
-@server.read_resource()
-async def handle_get_alive_resource(uri: str) -> str:
-    """Handle get_alive_resource resource."""
-    if uri != "api:///alive":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_alive_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_alive_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_resource resource."""
-    if uri != "api:///v1/knowledge-models":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_settings_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_settings_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/settings":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_settings_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_settings_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_chat_sessions_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_chat_sessions_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/chat-sessions":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_chat_sessions_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_chat_sessions_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_chat_sessions_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_chat_sessions_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_chat_sessions_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_chat_sessions_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_files_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_files_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/files/{file_id}":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_files_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_files_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_files_metadata_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_files_metadata_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_files_metadata_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_files_metadata_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_internal_documents_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_internal_documents_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_internal_documents_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_internal_documents_resource: {e}")
-        raise
-
-
-@server.read_resource()
-async def handle_get_v1_knowledge_models_widget_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_widget_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/widget":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_widget_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_widget_resource: {e}")
-        raise
+# Registry mapping each resource URI template to its implementation in
+# resources.py. Templates without parameters are resolved by exact lookup;
+# parameterised templates are matched by segment count and literal segments.
+RESOURCE_HANDLERS: Dict[str, Callable[[str], Awaitable[Dict[str, Any]]]] = {
+    "api:///alive": resource_get_alive_resource,
+    "api:///v1/knowledge-models": resource_get_v1_knowledge_models_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}": resource_get_v1_knowledge_models_by_id_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/settings": resource_get_v1_knowledge_models_settings_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/chat-sessions": resource_get_v1_knowledge_models_chat_sessions_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}": resource_get_v1_knowledge_models_chat_sessions_by_id_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/files/{file_id}": resource_get_v1_knowledge_models_files_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata": resource_get_v1_knowledge_models_files_metadata_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}": resource_get_v1_knowledge_models_internal_documents_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/widget": resource_get_v1_knowledge_models_widget_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}/transcription": resource_get_v1_knowledge_models_videos_transcription_resource,
+    "api:///v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}": resource_get_v1_knowledge_models_videos_resource,
+    "api:///v1/language_models": resource_get_v1_language_models_resource,
+    "metrics:///http": resource_get_http_metrics_resource,
+}
+
+
+async def resource_get_compaction_metrics_resource(uri: str) -> Dict[str, Any]:
+    """Return response compaction counters per tool and resource."""
+    return {"success": True, "data": compactor.stats() if compactor is not None else {}}
+
+
+RESOURCE_HANDLERS["metrics:///compaction"] = resource_get_compaction_metrics_resource
+
+
+def _compile_resource_routes() -> Dict[int, List[tuple]]:
+    """Group parameterised resource templates by their number of segments."""
+    routes: Dict[int, List[tuple]] = {}
+    for template, handler in RESOURCE_HANDLERS.items():
+        if "{" not in template:
+            continue
+        segments = template.split("/")
+        literals = tuple(
+            (index, segment) for index, segment in enumerate(segments)
+            if not segment.startswith("{")
+        )
+        routes.setdefault(len(segments), []).append((literals, handler))
+    return routes
 
 
-@server.read_resource()
-async def handle_get_v1_knowledge_models_videos_transcription_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_videos_transcription_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}/transcription":
-        raise ValueError(f"Unknown resource: {uri}")
-    
-    try:
-        result = await resource_get_v1_knowledge_models_videos_transcription_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_videos_transcription_resource: {e}")
-        raise
+_RESOURCE_ROUTES = _compile_resource_routes()
 
 
-@server.read_resource()
-async def handle_get_v1_knowledge_models_videos_resource(uri: str) -> str:
-    """Handle get_v1_knowledge_models_videos_resource resource."""
-    if uri != "api:///v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}":
-        raise ValueError(f"Unknown resource: {uri}")
+def resolve_resource(uri: str) -> Optional[Callable[[str], Awaitable[Dict[str, Any]]]]:
+    """Return the handler registered for a concrete resource URI, if any."""
+    handler = RESOURCE_HANDLERS.get(uri)
+    if handler is not None:
+        return handler
     
-    try:
-        result = await resource_get_v1_knowledge_models_videos_resource(uri)
-        return str(result)
-    except Exception as e:
-        logger.error(f"Error reading get_v1_knowledge_models_videos_resource: {e}")
-        raise
+    segments = uri.split("/")
+    for literals, candidate in _RESOURCE_ROUTES.get(len(segments), ()):
+        if all(segments[index] == segment for index, segment in literals):
+            return candidate
+    return None
 
 
 @server.read_resource()
-async def handle_get_v1_language_models_resource(uri: str) -> str:
-    """Handle get_v1_language_models_resource resource."""
-    if uri != "api:///v1/language_models":
+async def handle_read_resource(uri: str) -> Union[str, Iterable[ReadResourceContents]]:
+    """Dispatch a resource read to its registered implementation."""
+    uri, projection = split_uri(str(uri))
+    handler = resolve_resource(uri)
+    if handler is None:
         raise ValueError(f"Unknown resource: {uri}")
     
     try:
-        result = await resource_get_v1_language_models_resource(uri)
-        return str(result)
+        result = await handler(uri)
+        # Handlers return ready-made contents for binary downloads
+        if isinstance(result, list):
+            return result
+        if projection is not None:
+            result = projection.apply(result)
+        if compactor is not None:
+            result = compactor.compact(handler.__name__[len("resource_"):], result)
+        return serializer.dumps(result)
     except Exception as e:
-        logger.error(f"Error reading get_v1_language_models_resource: {e}")
+        logger.error(f"Error reading {uri}: {e}")
         raise
 
 
-
 async def main():
     """Main entry point."""
     # Load configuration
@@ -1036,17 +644,21 @@ async def main():
         sys.exit(1)
     
     logger.info(f"Starting {SERVER_NAME} v{SERVER_VERSION}")
-    logger.info(f"API Base URL: https://constructor.app/api/platform-kmapi")
-    logger.info(f"Tools: 35")
-    logger.info(f"Resources: 13")
+    logger.info(f"API Base URL: {config.get('api', {}).get('base_url', DEFAULT_BASE_URL)}")
+    logger.info(f"Tools: {len(TOOL_HANDLERS)}")
+    logger.info(f"Resources: {len(RESOURCE_HANDLERS)}")
     
     # Run the server
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            server.create_initialization_options()
-        )
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                server.create_initialization_options()
+            )
+    finally:
+        mirror.close()
+        await close_http_client()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
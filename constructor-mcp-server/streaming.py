@@ -0,0 +1,145 @@
+"""
+Incremental consumption of server-sent event (SSE) responses.
+
+Chat completions requested with ``"stream": true`` are answered with a
+``text/event-stream`` of ``chat.completion.chunk`` events. The events are
+folded into a single ``chat.completion`` result while partial output is
+forwarded as MCP progress notifications. Accumulated content is capped so
+very long generations cannot grow memory without bound.
+"""
+
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from utils import format_response, report_progress
+
+# Default cap on accumulated completion text per choice
+DEFAULT_MAX_CONTENT_CHARS = 1_000_000
+
+# Minimum delay between two progress notifications carrying partial output
+DEFAULT_FLUSH_INTERVAL = 0.05
+
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[str]:
+    """Yield the data payload of each event in a text/event-stream response."""
+    data: List[str] = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield "\n".join(data)
+                data = []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield "\n".join(data)
+
+
+class _Choice:
+    """Accumulated state of one streamed completion choice."""
+
+    __slots__ = ("index", "role", "parts", "length", "truncated", "finish_reason", "additional_kwargs")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.role = "assistant"
+        self.parts: List[str] = []
+        self.length = 0
+        self.truncated = False
+        self.finish_reason: Optional[str] = None
+        self.additional_kwargs: Dict[str, Any] = {"citations": []}
+
+    def append(self, content: str, max_chars: int) -> None:
+        room = max_chars - self.length
+        if room <= 0:
+            self.truncated = self.truncated or bool(content)
+            return
+        if len(content) > room:
+            content = content[:room]
+            self.truncated = True
+        self.parts.append(content)
+        self.length += len(content)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "message": {
+                "role": self.role,
+                "content": "".join(self.parts),
+                "additional_kwargs": self.additional_kwargs,
+            },
+            "finish_reason": self.finish_reason,
+            "truncated": self.truncated,
+        }
+
+
+async def collect_completion_stream(
+    response: httpx.Response,
+    max_content_chars: int = DEFAULT_MAX_CONTENT_CHARS,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+) -> Dict[str, Any]:
+    """Fold a streamed chat completion into one result, reporting partial output."""
+    if "text/event-stream" not in response.headers.get("Content-Type", ""):
+        await response.aread()
+        return format_response(response)
+
+    completion: Dict[str, Any] = {"object": "chat.completion"}
+    choices: Dict[int, _Choice] = {}
+    pending: List[str] = []
+    events = 0
+    last_flush = 0.0
+
+    async for data in iter_sse_data(response):
+        if data.strip() == "[DONE]":
+            break
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+        events += 1
+
+        if "error" in event:
+            completion["error"] = event["error"]
+            continue
+        for key in ("id", "model", "created"):
+            if key in event:
+                completion[key] = event[key]
+
+        for chunk in event.get("choices") or []:
+            index = chunk.get("index", 0)
+            choice = choices.get(index)
+            if choice is None:
+                choice = choices[index] = _Choice(index)
+            delta = chunk.get("delta") or {}
+            content = delta.get("content") or ""
+            choice.role = delta.get("role") or choice.role
+            choice.append(content, max_content_chars)
+            citations = (delta.get("additional_kwargs") or {}).get("citations")
+            if citations:
+                choice.additional_kwargs["citations"] = citations
+            if chunk.get("finish_reason"):
+                choice.finish_reason = chunk["finish_reason"]
+            if content and index == 0:
+                pending.append(content)
+
+        now = time.monotonic()
+        if pending and now - last_flush >= flush_interval:
+            await report_progress(events, message="".join(pending))
+            pending = []
+            last_flush = now
+
+    if pending:
+        await report_progress(events, message="".join(pending))
+
+    completion["choices"] = [choices[index].as_dict() for index in sorted(choices)]
+    return {
+        "success": "error" not in completion,
+        "status_code": response.status_code,
+        "data": completion,
+    }
@@ -2,15 +2,77 @@
 Tool implementations for MCP server.
 """
 
+import asyncio
 import json
+import logging
 import os
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Set
 
 import httpx
-from utils import get_api_headers, handle_api_error, format_response
-
-# HTTP client for API calls
-client = httpx.AsyncClient(timeout=30.0)
+from ingestion import ingest_jsonl
+from mirror import ChunkMirror
+from pagination import PaginationError, collect_pages
+from plans import RequestPlan, compile_plans
+from streaming import collect_completion_stream
+from uploads import upload_file
+from utils import get_http_client, handle_api_error, format_response, load_config
+
+# Load configuration
+config = load_config()
+
+# Shared HTTP client for API calls (base URL and pool limits come from config.json)
+client = get_http_client()
+
+# Request plans for every operation, compiled once at import time
+PLANS = compile_plans({
+    "post_v1_knowledge_models": {"method": "POST", "path": "/v1/knowledge-models"},
+    "delete_v1_knowledge_models": {"method": "DELETE", "path": "/v1/knowledge-models/{knowledge_model_id}"},
+    "patch_v1_knowledge_models": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}"},
+    "patch_v1_knowledge_models_settings": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}/settings"},
+    "post_v1_knowledge_models_chat_sessions": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions"},
+    "delete_v1_knowledge_models_chat_sessions": {"method": "DELETE", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}"},
+    "patch_v1_knowledge_models_chat_sessions": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}"},
+    "post_v1_knowledge_models_chat_sessions_messages": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages"},
+    "get_v1_knowledge_models_chat_sessions_messages": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages", "query": ["offset", "limit"]},
+    "get_v1_knowledge_models_chat_sessions_messages_by_id": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}"},
+    "post_v1_knowledge_models_chat_sessions_messages_feedback": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}/feedback"},
+    "get_v1_knowledge_models_files": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/files", "query": ["offset", "limit"]},
+    "post_v1_knowledge_models_files": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/files", "controls": ["file_path", "folder", "filename", "content_type"]},
+    "delete_v1_knowledge_models_files": {"method": "DELETE", "path": "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}"},
+    "patch_v1_knowledge_models_files_metadata": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata"},
+    "post_v1_knowledge_models_internal_documents": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents"},
+    "get_v1_knowledge_models_internal_documents": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents", "query": ["offset", "limit"]},
+    "patch_v1_knowledge_models_internal_documents": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}"},
+    "delete_v1_knowledge_models_internal_documents": {"method": "DELETE", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}"},
+    "post_v1_knowledge_models_internal_documents_chunks": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks"},
+    "get_v1_knowledge_models_internal_documents_chunks": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks", "query": ["offset", "limit"]},
+    "post_v1_knowledge_models_internal_documents_chunks_batch": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/batch", "controls": ["jsonl_path", "batch_size", "max_batch_bytes", "concurrency"]},
+    "get_v1_knowledge_models_internal_documents_chunks_by_id": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}"},
+    "patch_v1_knowledge_models_internal_documents_chunks": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}"},
+    "delete_v1_knowledge_models_internal_documents_chunks": {"method": "DELETE", "path": "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}"},
+    "patch_v1_knowledge_models_widget": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}/widget"},
+    "get_v1_knowledge_models_chunks": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/chunks", "query": ["document_id", "document_type", "content_type", "sort", "offset", "limit"]},
+    "post_v1_knowledge_models_chunks_search": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/chunks/search"},
+    "post_v1_knowledge_models_videos_import": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/videos/import"},
+    "get_v1_knowledge_models_videos": {"method": "GET", "path": "/v1/knowledge-models/{knowledge_model_id}/videos", "query": ["offset", "limit"]},
+    "patch_v1_knowledge_models_videos": {"method": "PATCH", "path": "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}"},
+    "delete_v1_knowledge_models_videos": {"method": "DELETE", "path": "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}"},
+    "post_v1_knowledge_models_chat_completions_by_extension": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/chat/completions/{extension}", "header": ["X-KM-Extension"]},
+    "post_v1_knowledge_models_chat_completions": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/chat/completions", "query": ["extension"], "header": ["X-KM-Extension"]},
+    "post_v1_knowledge_models_tools_translation": {"method": "POST", "path": "/v1/knowledge-models/{knowledge_model_id}/tools/translation"},
+})
+
+
+async def _stream_completion(plan: RequestPlan, url: str, query_params: Dict[str, Any], headers: Dict[str, str], request_body: Any) -> Dict[str, Any]:
+    """Send a chat completion in stream mode and fold its events into one result."""
+    headers = {**headers, "Accept": "text/event-stream"}
+    async with client.stream("POST", url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            return handle_api_error(response)
+        
+        return await collect_completion_stream(response, **config.get("streaming", {}))
 
 
 async def tool_post_v1_knowledge_models(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -21,30 +83,12 @@ async def tool_post_v1_knowledge_models(arguments: Dict[str, Any]) -> Dict[str,
     Path: /v1/knowledge-models
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -64,30 +108,12 @@ async def tool_delete_v1_knowledge_models(arguments: Dict[str, Any]) -> Dict[str
     Path: /v1/knowledge-models/{knowledge_model_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["delete_v1_knowledge_models"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.delete(url, headers=headers, params=query_params)
+        response = await client.delete(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -107,30 +133,12 @@ async def tool_patch_v1_knowledge_models(arguments: Dict[str, Any]) -> Dict[str,
     Path: /v1/knowledge-models/{knowledge_model_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -150,30 +158,12 @@ async def tool_patch_v1_knowledge_models_settings(arguments: Dict[str, Any]) ->
     Path: /v1/knowledge-models/{knowledge_model_id}/settings
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/settings":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/settings"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models_settings"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -193,30 +183,12 @@ async def tool_post_v1_knowledge_models_chat_sessions(arguments: Dict[str, Any])
     Path: /v1/knowledge-models/{knowledge_model_id}/chat-sessions
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat-sessions":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat-sessions"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_chat_sessions"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -236,30 +208,12 @@ async def tool_delete_v1_knowledge_models_chat_sessions(arguments: Dict[str, Any
     Path: /v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["delete_v1_knowledge_models_chat_sessions"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.delete(url, headers=headers, params=query_params)
+        response = await client.delete(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -279,30 +233,12 @@ async def tool_patch_v1_knowledge_models_chat_sessions(arguments: Dict[str, Any]
     Path: /v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models_chat_sessions"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -322,30 +258,12 @@ async def tool_post_v1_knowledge_models_chat_sessions_messages(arguments: Dict[s
     Path: /v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_chat_sessions_messages"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -365,30 +283,14 @@ async def tool_get_v1_knowledge_models_chat_sessions_messages(arguments: Dict[st
     Path: /v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_chat_sessions_messages"]
+        if arguments.get("all_pages"):
+            return await collect_pages(client, plan, arguments, **config.get("pagination", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -400,7 +302,7 @@ async def tool_get_v1_knowledge_models_chat_sessions_messages(arguments: Dict[st
         return {"error": str(e), "tool": "get_v1_knowledge_models_chat_sessions_messages"}
 
 
-async def tool_get_v1_knowledge_models_chat_sessions_messages(arguments: Dict[str, Any]) -> Dict[str, Any]:
+async def tool_get_v1_knowledge_models_chat_sessions_messages_by_id(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """
     Get chat message
     
@@ -408,30 +310,12 @@ async def tool_get_v1_knowledge_models_chat_sessions_messages(arguments: Dict[st
     Path: /v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_chat_sessions_messages_by_id"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -440,7 +324,7 @@ async def tool_get_v1_knowledge_models_chat_sessions_messages(arguments: Dict[st
         return format_response(response)
         
     except Exception as e:
-        return {"error": str(e), "tool": "get_v1_knowledge_models_chat_sessions_messages"}
+        return {"error": str(e), "tool": "get_v1_knowledge_models_chat_sessions_messages_by_id"}
 
 
 async def tool_post_v1_knowledge_models_chat_sessions_messages_feedback(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -451,30 +335,12 @@ async def tool_post_v1_knowledge_models_chat_sessions_messages_feedback(argument
     Path: /v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}/feedback
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}/feedback":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat-sessions/{chat_session_id}/messages/{message_id}/feedback"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_chat_sessions_messages_feedback"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -494,30 +360,14 @@ async def tool_get_v1_knowledge_models_files(arguments: Dict[str, Any]) -> Dict[
     Path: /v1/knowledge-models/{knowledge_model_id}/files
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/files":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/files"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_files"]
+        if arguments.get("all_pages"):
+            return await collect_pages(client, plan, arguments, **config.get("pagination", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -537,30 +387,14 @@ async def tool_post_v1_knowledge_models_files(arguments: Dict[str, Any]) -> Dict
     Path: /v1/knowledge-models/{knowledge_model_id}/files
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/files":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/files"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_files"]
+        if arguments.get("file_path"):
+            return await upload_file(client, plan, arguments, **config.get("uploads", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -580,30 +414,12 @@ async def tool_delete_v1_knowledge_models_files(arguments: Dict[str, Any]) -> Di
     Path: /v1/knowledge-models/{knowledge_model_id}/files/{file_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["delete_v1_knowledge_models_files"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.delete(url, headers=headers, params=query_params)
+        response = await client.delete(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -623,30 +439,12 @@ async def tool_patch_v1_knowledge_models_files_metadata(arguments: Dict[str, Any
     Path: /v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/files/{file_id}/metadata"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models_files_metadata"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -666,30 +464,12 @@ async def tool_post_v1_knowledge_models_internal_documents(arguments: Dict[str,
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_internal_documents"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -709,30 +489,14 @@ async def tool_get_v1_knowledge_models_internal_documents(arguments: Dict[str, A
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_internal_documents"]
+        if arguments.get("all_pages"):
+            return await collect_pages(client, plan, arguments, **config.get("pagination", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -752,30 +516,12 @@ async def tool_patch_v1_knowledge_models_internal_documents(arguments: Dict[str,
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models_internal_documents"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -795,30 +541,12 @@ async def tool_delete_v1_knowledge_models_internal_documents(arguments: Dict[str
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["delete_v1_knowledge_models_internal_documents"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.delete(url, headers=headers, params=query_params)
+        response = await client.delete(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -838,30 +566,12 @@ async def tool_post_v1_knowledge_models_internal_documents_chunks(arguments: Dic
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_internal_documents_chunks"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -881,30 +591,14 @@ async def tool_get_v1_knowledge_models_internal_documents_chunks(arguments: Dict
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_internal_documents_chunks"]
+        if arguments.get("all_pages"):
+            return await collect_pages(client, plan, arguments, **config.get("pagination", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -924,30 +618,14 @@ async def tool_post_v1_knowledge_models_internal_documents_chunks_batch(argument
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/batch
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/batch":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/batch"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_internal_documents_chunks_batch"]
+        if arguments.get("jsonl_path"):
+            return await ingest_jsonl(client, plan, arguments, **config.get("ingestion", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -959,7 +637,7 @@ async def tool_post_v1_knowledge_models_internal_documents_chunks_batch(argument
         return {"error": str(e), "tool": "post_v1_knowledge_models_internal_documents_chunks_batch"}
 
 
-async def tool_get_v1_knowledge_models_internal_documents_chunks(arguments: Dict[str, Any]) -> Dict[str, Any]:
+async def tool_get_v1_knowledge_models_internal_documents_chunks_by_id(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """
     Get internal chunk
     
@@ -967,30 +645,12 @@ async def tool_get_v1_knowledge_models_internal_documents_chunks(arguments: Dict
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_internal_documents_chunks_by_id"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -999,7 +659,7 @@ async def tool_get_v1_knowledge_models_internal_documents_chunks(arguments: Dict
         return format_response(response)
         
     except Exception as e:
-        return {"error": str(e), "tool": "get_v1_knowledge_models_internal_documents_chunks"}
+        return {"error": str(e), "tool": "get_v1_knowledge_models_internal_documents_chunks_by_id"}
 
 
 async def tool_patch_v1_knowledge_models_internal_documents_chunks(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -1010,30 +670,12 @@ async def tool_patch_v1_knowledge_models_internal_documents_chunks(arguments: Di
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models_internal_documents_chunks"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1053,30 +695,12 @@ async def tool_delete_v1_knowledge_models_internal_documents_chunks(arguments: D
     Path: /v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/internal-documents/{document_id}/chunks/{chunk_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["delete_v1_knowledge_models_internal_documents_chunks"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.delete(url, headers=headers, params=query_params)
+        response = await client.delete(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1096,30 +720,12 @@ async def tool_patch_v1_knowledge_models_widget(arguments: Dict[str, Any]) -> Di
     Path: /v1/knowledge-models/{knowledge_model_id}/widget
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/widget":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/widget"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models_widget"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1139,30 +745,14 @@ async def tool_get_v1_knowledge_models_chunks(arguments: Dict[str, Any]) -> Dict
     Path: /v1/knowledge-models/{knowledge_model_id}/chunks
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chunks":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chunks"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_chunks"]
+        if arguments.get("all_pages"):
+            return await collect_pages(client, plan, arguments, **config.get("pagination", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1182,30 +772,12 @@ async def tool_post_v1_knowledge_models_chunks_search(arguments: Dict[str, Any])
     Path: /v1/knowledge-models/{knowledge_model_id}/chunks/search
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chunks/search":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chunks/search"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_chunks_search"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1225,30 +797,12 @@ async def tool_post_v1_knowledge_models_videos_import(arguments: Dict[str, Any])
     Path: /v1/knowledge-models/{knowledge_model_id}/videos/import
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/videos/import":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/videos/import"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_videos_import"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1268,30 +822,14 @@ async def tool_get_v1_knowledge_models_videos(arguments: Dict[str, Any]) -> Dict
     Path: /v1/knowledge-models/{knowledge_model_id}/videos
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/videos":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/videos"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["get_v1_knowledge_models_videos"]
+        if arguments.get("all_pages"):
+            return await collect_pages(client, plan, arguments, **config.get("pagination", {}))
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.get(url, headers=headers, params=query_params)
+        response = await client.get(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1311,30 +849,12 @@ async def tool_patch_v1_knowledge_models_videos(arguments: Dict[str, Any]) -> Di
     Path: /v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["patch_v1_knowledge_models_videos"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.patch(url, headers=headers, params=query_params, json=request_body)
+        response = await client.patch(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1354,30 +874,12 @@ async def tool_delete_v1_knowledge_models_videos(arguments: Dict[str, Any]) -> D
     Path: /v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/videos/{document_external_id}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["delete_v1_knowledge_models_videos"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.delete(url, headers=headers, params=query_params)
+        response = await client.delete(url, headers=headers, params=query_params, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1389,7 +891,7 @@ async def tool_delete_v1_knowledge_models_videos(arguments: Dict[str, Any]) -> D
         return {"error": str(e), "tool": "delete_v1_knowledge_models_videos"}
 
 
-async def tool_post_v1_knowledge_models_chat_completions(arguments: Dict[str, Any]) -> Dict[str, Any]:
+async def tool_post_v1_knowledge_models_chat_completions_by_extension(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """
     POST: Generates text responses based on incoming messages.
     
@@ -1397,30 +899,16 @@ async def tool_post_v1_knowledge_models_chat_completions(arguments: Dict[str, An
     Path: /v1/knowledge-models/{knowledge_model_id}/chat/completions/{extension}
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat/completions/{extension}":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat/completions/{extension}"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_chat_completions_by_extension"]
+        url, query_params, headers, request_body = plan.build(arguments)
+        
+        # Stream server-sent events when the completion was requested in stream mode
+        if isinstance(request_body, dict) and request_body.get("stream"):
+            return await _stream_completion(plan, url, query_params, headers, request_body)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1429,7 +917,7 @@ async def tool_post_v1_knowledge_models_chat_completions(arguments: Dict[str, An
         return format_response(response)
         
     except Exception as e:
-        return {"error": str(e), "tool": "post_v1_knowledge_models_chat_completions"}
+        return {"error": str(e), "tool": "post_v1_knowledge_models_chat_completions_by_extension"}
 
 
 async def tool_post_v1_knowledge_models_chat_completions(arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -1440,30 +928,16 @@ async def tool_post_v1_knowledge_models_chat_completions(arguments: Dict[str, An
     Path: /v1/knowledge-models/{knowledge_model_id}/chat/completions
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/chat/completions":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/chat/completions"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_chat_completions"]
+        url, query_params, headers, request_body = plan.build(arguments)
+        
+        # Stream server-sent events when the completion was requested in stream mode
+        if isinstance(request_body, dict) and request_body.get("stream"):
+            return await _stream_completion(plan, url, query_params, headers, request_body)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1483,30 +957,12 @@ async def tool_post_v1_knowledge_models_tools_translation(arguments: Dict[str, A
     Path: /v1/knowledge-models/{knowledge_model_id}/tools/translation
     """
     try:
-        # Extract parameters
-        path_params = {}
-        query_params = {}
-        headers = get_api_headers()
-        request_body = None
-        
-        # Process input arguments
-        for key, value in arguments.items():
-            if key == "body":
-                request_body = value
-            elif "{" + key + "}" in "/v1/knowledge-models/{knowledge_model_id}/tools/translation":
-                path_params[key] = value
-            else:
-                query_params[key] = value
-        
-        # Build URL
-        url_path = "/v1/knowledge-models/{knowledge_model_id}/tools/translation"
-        for param_name, param_value in path_params.items():
-            url_path = url_path.replace("{" + param_name + "}", str(param_value))
-        
-        url = "" + url_path
+        # Build request from the precompiled plan
+        plan = PLANS["post_v1_knowledge_models_tools_translation"]
+        url, query_params, headers, request_body = plan.build(arguments)
         
         # Make request
-        response = await client.post(url, headers=headers, params=query_params, json=request_body)
+        response = await client.post(url, headers=headers, params=query_params, json=request_body, extensions=plan.extensions)
         
         # Handle response
         if response.status_code >= 400:
@@ -1517,3 +973,153 @@ async def tool_post_v1_knowledge_models_tools_translation(arguments: Dict[str, A
     except Exception as e:
         return {"error": str(e), "tool": "post_v1_knowledge_models_tools_translation"}
 
+
+
+# Local chunk mirror: synced from the chunk listings, searched with SQLite FTS5
+mirror_config = dict(config.get("mirror", {}))
+sync_on_stale = mirror_config.pop("sync_on_stale", True)
+mirror = ChunkMirror(**mirror_config)
+_background_syncs: Set[asyncio.Task] = set()
+
+
+async def _sync_mirror(knowledge_model_id: str, full: bool = False) -> Dict[str, Any]:
+    """Sync the mirror of a knowledge model from its chunk and internal document listings."""
+    return await mirror.sync(
+        client,
+        PLANS["get_v1_knowledge_models_chunks"],
+        PLANS["get_v1_knowledge_models_internal_documents"],
+        knowledge_model_id,
+        full=full,
+    )
+
+
+def _background_sync_done(task: asyncio.Task) -> None:
+    """Forget a finished background sync and log its failure, which nobody awaits."""
+    _background_syncs.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.getLogger(__name__).warning("Background mirror sync failed: %r", task.exception())
+
+
+async def tool_sync_local_mirror(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sync the local full-text mirror of a knowledge model's chunks.
+    
+    Only new or changed documents are refetched unless a full sync is due or requested.
+    """
+    try:
+        stats = await _sync_mirror(arguments["knowledge_model_id"], full=bool(arguments.get("full")))
+        return {"success": True, "data": stats}
+        
+    except PaginationError as e:
+        return handle_api_error(e.response)
+    except Exception as e:
+        return {"error": str(e), "tool": "sync_local_mirror"}
+
+
+async def tool_search_local_chunks(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Search chunks in the local mirror, falling back to remote search when it is stale.
+    
+    A stale mirror is refreshed in the background (unless disabled in config.json).
+    """
+    try:
+        knowledge_model_id = arguments["knowledge_model_id"]
+        query = arguments["query"]
+        top_k = int(arguments.get("top_k") or 10)
+        document_ids = arguments.get("included_document_ids")
+        
+        status = await mirror.status(knowledge_model_id)
+        if status["stale"]:
+            if sync_on_stale and not mirror.syncing(knowledge_model_id):
+                task = asyncio.ensure_future(_sync_mirror(knowledge_model_id))
+                _background_syncs.add(task)
+                task.add_done_callback(_background_sync_done)
+            
+            body = {"query": query, "top_k": top_k}
+            if document_ids:
+                body["included_document_ids"] = document_ids
+            result = await tool_post_v1_knowledge_models_chunks_search({"knowledge_model_id": knowledge_model_id, "body": body})
+            result["source"] = "remote"
+            result["mirror"] = status
+            return result
+        
+        started = time.monotonic()
+        results = await mirror.search(knowledge_model_id, query, top_k, document_ids)
+        return {
+            "success": True,
+            "source": "local",
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 2),
+            "data": {"results": results, "total": len(results)},
+            "mirror": status,
+        }
+        
+    except Exception as e:
+        return {"error": str(e), "tool": "search_local_chunks"}
+
+
+async def tool_search_knowledge_models(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Search several knowledge models concurrently and merge the results by score.
+    
+    Searches still running at the deadline are cancelled; the results of the
+    models that answered are returned, with the others listed as timed out.
+    """
+    try:
+        search_config = config.get("multi_search", {})
+        knowledge_model_ids = arguments["knowledge_model_ids"]
+        if not isinstance(knowledge_model_ids, list) or not knowledge_model_ids:
+            raise ValueError("knowledge_model_ids must be a non-empty list of knowledge model ids")
+        knowledge_model_ids = list(dict.fromkeys(knowledge_model_ids))
+        top_k = int(arguments.get("top_k") or 10)
+        deadline = float(arguments.get("deadline") or search_config.get("deadline", 10.0))
+        semaphore = asyncio.Semaphore(search_config.get("max_concurrency", 8))
+        body = {"query": arguments["query"], "top_k": top_k}
+        
+        async def search(knowledge_model_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await tool_post_v1_knowledge_models_chunks_search({"knowledge_model_id": knowledge_model_id, "body": body})
+        
+        started = time.monotonic()
+        tasks = {asyncio.ensure_future(search(knowledge_model_id)): knowledge_model_id for knowledge_model_id in knowledge_model_ids}
+        pending = set(tasks)
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=deadline)
+        finally:
+            # Also reached when this call is itself cancelled
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        # Merge: the same chunk (by id, or by identical text) is kept once with its best score
+        merged: Dict[Any, Dict[str, Any]] = {}
+        errors: Dict[str, Any] = {}
+        for task in done:
+            knowledge_model_id = tasks[task]
+            result = task.result()
+            if result.get("error"):
+                errors[knowledge_model_id] = result.get("message", result["error"])
+                continue
+            data = result.get("data")
+            for item in data.get("results", []) if isinstance(data, dict) else []:
+                key = ("text", item["text"]) if item.get("text") else ("id", knowledge_model_id, item.get("id"))
+                score = item.get("similarity_score") or 0.0
+                current = merged.get(key)
+                if current is None or score > (current.get("similarity_score") or 0.0):
+                    merged[key] = {**item, "knowledge_model_id": knowledge_model_id}
+        
+        ranked = sorted(merged.values(), key=lambda item: item.get("similarity_score") or 0.0, reverse=True)[:top_k]
+        timed_out = [tasks[task] for task in pending]
+        return {
+            "success": len(errors) + len(timed_out) < len(knowledge_model_ids),
+            "partial": bool(errors or timed_out),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "data": {"results": ranked, "total": len(ranked)},
+            "models": {
+                "searched": [tasks[task] for task in done if tasks[task] not in errors],
+                "timed_out": timed_out,
+                "errors": errors,
+            },
+        }
+        
+    except Exception as e:
+        return {"error": str(e), "tool": "search_knowledge_models"}
@@ -0,0 +1,130 @@
+"""
+Streaming multipart/form-data uploads from local files.
+
+The request body is produced on the fly: a small preamble with the form
+fields and the file part headers, the file itself read in fixed-size chunks,
+and the closing boundary. Memory use therefore does not depend on the file
+size. The Content-Length is known up front, so no chunked transfer encoding
+is needed, and the body can be iterated again if the request is retried.
+"""
+
+import asyncio
+import mimetypes
+import os
+import uuid
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from plans import RequestPlan
+from utils import format_response, handle_api_error, report_progress
+
+
+def _quote_field(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\r", " ").replace("\n", " ")
+
+
+class MultipartFileStream(httpx.AsyncByteStream):
+    """multipart/form-data body with form fields followed by one file part."""
+
+    def __init__(
+        self,
+        path: str,
+        field_name: str = "file",
+        fields: Optional[Dict[str, str]] = None,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        chunk_size: int = 1_048_576,
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.file_size = os.path.getsize(path)
+        self.boundary = uuid.uuid4().hex
+        self.bytes_sent = 0
+
+        filename = filename or os.path.basename(path)
+        content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        parts = []
+        for name, value in (fields or {}).items():
+            parts.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_quote_field(name)}"\r\n\r\n{value}\r\n'
+            )
+        parts.append(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_quote_field(field_name)}"; '
+            f'filename="{_quote_field(filename)}"\r\nContent-Type: {content_type}\r\n\r\n'
+        )
+        self._preamble = "".join(parts).encode("utf-8")
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+
+    @property
+    def content_length(self) -> int:
+        return len(self._preamble) + self.file_size + len(self._epilogue)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Content-Type": f"multipart/form-data; boundary={self.boundary}",
+            "Content-Length": str(self.content_length),
+        }
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        self.bytes_sent = len(self._preamble)
+        yield self._preamble
+
+        # Blocking file reads run in the default executor, one chunk at a time
+        handle = await loop.run_in_executor(None, open, self.path, "rb")
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, handle.read, self.chunk_size)
+                if not chunk:
+                    break
+                self.bytes_sent += len(chunk)
+                await report_progress(self.bytes_sent, self.content_length, f"Uploaded {self.bytes_sent} of {self.content_length} bytes")
+                yield chunk
+        finally:
+            handle.close()
+
+        self.bytes_sent += len(self._epilogue)
+        yield self._epilogue
+
+
+async def upload_file(
+    client: httpx.AsyncClient,
+    plan: RequestPlan,
+    arguments: Dict[str, Any],
+    chunk_size: int = 1_048_576,
+    write_timeout: Optional[float] = 300.0,
+) -> Dict[str, Any]:
+    """Upload the local file named by the ``file_path`` argument.
+
+    ``folder``, ``filename`` and ``content_type`` arguments describe the
+    upload; the remaining arguments are used to build the request as usual.
+    """
+    arguments = dict(arguments)
+    path = os.path.expanduser(arguments.pop("file_path"))
+    folder = arguments.pop("folder", None)
+    stream = MultipartFileStream(
+        path,
+        fields={"folder": str(folder)} if folder is not None else None,
+        filename=arguments.pop("filename", None),
+        content_type=arguments.pop("content_type", None),
+        chunk_size=chunk_size,
+    )
+
+    url, query_params, headers, _ = plan.build(arguments)
+    headers = {**headers, **stream.headers}
+    timeout = client.timeout
+    if write_timeout is not None:
+        timeout = httpx.Timeout(timeout.read, connect=timeout.connect, write=write_timeout, pool=timeout.pool)
+    request = client.build_request(
+        plan.method, url, headers=headers, params=query_params, timeout=timeout, extensions=plan.extensions,
+    )
+    request.stream = stream
+
+    response = await client.send(request)
+    if response.status_code >= 400:
+        return handle_api_error(response)
+    result = format_response(response)
+    result["upload"] = {"file_size": stream.file_size, "bytes_sent": stream.bytes_sent}
+    return result
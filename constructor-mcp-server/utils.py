@@ -2,13 +2,31 @@
 Utility functions for MCP server.
 """
 
+import importlib.util
 import json
 import logging
 import os
-from typing import Any, Dict, Optional
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 import httpx
 
+from breaker import BreakerClock, create_breaker_transport
+from cache import CachingTransport
+from coalescing import CoalescingTransport
+from compression import create_compression_transport
+from limits import AdmissionController, LimitingTransport
+from retry import create_retry_transport
+
+DEFAULT_BASE_URL = "https://constructor.app/api/platform-kmapi"
+
+# Shared HTTP client, created lazily by get_http_client()
+_http_client: Optional[httpx.AsyncClient] = None
+
+# Progress reporter for the tool call currently being handled, set by the server
+ProgressCallback = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+progress_callback: ContextVar[Optional[ProgressCallback]] = ContextVar("progress_callback", default=None)
+
 def setup_logging() -> logging.Logger:
     """Setup logging configuration."""
     logging.basicConfig(
@@ -25,6 +43,118 @@ def load_config() -> Dict[str, Any]:
     except FileNotFoundError:
         return {}
 
+def create_http_client(config: Optional[Dict[str, Any]] = None) -> httpx.AsyncClient:
+    """Create an HTTP client from the ``api`` and ``http`` sections of config.json."""
+    if config is None:
+        config = load_config()
+    
+    base_url = config.get("api", {}).get("base_url", DEFAULT_BASE_URL)
+    http_config = config.get("http", {})
+    timeout_config = http_config.get("timeout", {})
+    
+    timeout = httpx.Timeout(
+        connect=timeout_config.get("connect", 5.0),
+        read=timeout_config.get("read", 30.0),
+        write=timeout_config.get("write", 30.0),
+        pool=timeout_config.get("pool", 5.0),
+    )
+    limits = httpx.Limits(
+        max_connections=http_config.get("max_connections", 100),
+        max_keepalive_connections=http_config.get("max_keepalive_connections", 20),
+        keepalive_expiry=http_config.get("keepalive_expiry", 30.0),
+    )
+    
+    http2 = bool(http_config.get("http2", False))
+    if http2 and importlib.util.find_spec("h2") is None:
+        logging.getLogger(__name__).warning(
+            "HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1"
+        )
+        http2 = False
+    
+    auth_header = config.get("auth", {}).get("header", "X-KM-AccessKey")
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+    
+    # The breaker checks requests above admission control, so that an open
+    # breaker fails fast, and times calls below it, so that queueing for a
+    # slot is not mistaken for a slow upstream
+    breaker_config = config.get("breaker", {})
+    breaker_enabled = breaker_config.get("enabled", True)
+    if breaker_enabled:
+        transport = BreakerClock(transport)
+    
+    limits_config = config.get("limits", {})
+    if limits_config.get("enabled", True):
+        controller = AdmissionController(
+            max_in_flight=limits_config.get("max_in_flight", 16),
+            rate=limits_config.get("rate"),
+            burst=limits_config.get("burst"),
+        )
+        transport = LimitingTransport(transport, controller)
+    
+    if breaker_enabled:
+        transport = create_breaker_transport(transport, breaker_config)
+    
+    retry_config = config.get("retry", {})
+    if retry_config.get("enabled", True):
+        transport = create_retry_transport(transport, retry_config)
+    
+    # Compression sits above retries so a body is compressed once for all attempts
+    compression_config = config.get("compression", {})
+    if compression_config.get("enabled", True):
+        transport = create_compression_transport(transport, compression_config)
+    
+    coalescing_config = config.get("coalescing", {})
+    if coalescing_config.get("enabled", True):
+        transport = CoalescingTransport(
+            transport,
+            methods=coalescing_config.get("methods", ["GET"]),
+            auth_header=auth_header,
+        )
+    
+    cache_config = config.get("cache", {})
+    if cache_config.get("enabled", True):
+        transport = CachingTransport(
+            transport,
+            ttl=cache_config.get("ttl", {}),
+            default_ttl=cache_config.get("default_ttl", 0.0),
+            max_entries=cache_config.get("max_entries", 512),
+            auth_header=auth_header,
+        )
+    
+    return httpx.AsyncClient(base_url=base_url, timeout=timeout, transport=transport)
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_http_stats() -> Dict[str, Dict[str, Any]]:
+    """Collect counters from every layer of the shared client's transport chain."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    # httpx keeps the configured transport on the client; each wrapper layer
+    # in turn keeps the transport it delegates to.
+    transport = getattr(get_http_client(), "_transport", None)
+    while transport is not None:
+        if hasattr(transport, "stats"):
+            stats[transport.name] = transport.stats()
+        transport = getattr(transport, "_transport", None)
+    return stats
+
+async def report_progress(progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+    """Send a progress notification for the current tool call, if the client asked for them."""
+    callback = progress_callback.get()
+    if callback is not None:
+        await callback(progress, total, message)
+
 def get_api_headers() -> Dict[str, str]:
     """Get headers for API requests."""
     headers = {
@@ -46,12 +176,18 @@ def handle_api_error(response: httpx.Response) -> Dict[str, Any]:
     except:
         error_data = {"message": response.text}
     
-    return {
+    error = {
         "error": True,
         "status_code": response.status_code,
         "message": error_data.get("message", "API request failed"),
         "details": error_data
     }
+    if "X-Circuit-Open" in response.headers:
+        error["circuit_open"] = True
+    if "Retry-After" in response.headers:
+        error["retry_after"] = response.headers["Retry-After"]
+    
+    return error
 
 def format_response(response: httpx.Response) -> Dict[str, Any]:
     """Format successful API response."""
@@ -1,5 +1,6 @@
 import argparse
 from .generator import generate_server
+from .sharding import PARALLEL_MIN_ITEMS, SHARD_STRATEGIES
 
 
 def main():
@@ -8,10 +9,43 @@ def main():
     )
     parser.add_argument("--input", required=True, help="Path to OpenAPI JSON file")
     parser.add_argument("--output", required=True, help="Directory to write generated server")
+    parser.add_argument(
+        "--force", action="store_true", help="Regenerate and rewrite every file, ignoring the previous run"
+    )
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="Read the spec incrementally, keeping only referenced components (for very large specs)",
+    )
+    parser.add_argument(
+        "--shard-by", choices=SHARD_STRATEGIES, default="tag",
+        help="Split routes into one module per first tag, or into hash buckets (default: tag)",
+    )
+    parser.add_argument("--shards", type=int, default=16, help="Number of hash buckets for --shard-by hash")
+    parser.add_argument(
+        "--max-shard-operations", type=int, default=500, help="Split shards with more operations into parts"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Processes used to render operations (default: 1). 0 uses one per CPU, "
+        f"but only for {PARALLEL_MIN_ITEMS} or more operations to render",
+    )
     args = parser.parse_args()
 
-    generate_server(args.input, args.output)
-    print(f"Server generated in {args.output}")
+    summary = generate_server(
+        args.input,
+        args.output,
+        force=args.force,
+        streaming=args.stream,
+        shard_by=args.shard_by,
+        shard_count=args.shards,
+        max_shard_operations=args.max_shard_operations,
+        workers=args.workers or None,
+    )
+    print(
+        f"Server generated in {args.output} "
+        f"({summary['files_written']} file(s) written, {summary['files_unchanged']} unchanged; "
+        f"{summary['operations_rendered']} operation(s) rendered, {summary['operations_reused']} reused)"
+    )
 
 
 if __name__ == "__main__":
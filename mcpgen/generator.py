@@ -1,123 +1,184 @@
 import json
-import os
-import re
+import sys
 from pathlib import Path
-from typing import Iterable, Tuple
-
-
-def sanitize(name: str) -> str:
-    """Sanitize a string to be a valid Python identifier."""
-    name = re.sub(r"[^0-9a-zA-Z_]+", "_", name)
-    if not name:
-        name = "operation"
-    if name[0].isdigit():
-        name = f"_{name}"
-    return name
-
-
-def iter_operations(spec: dict) -> Iterable[Tuple[str, str, dict]]:
-    """Yield (path, method, operation) tuples from spec."""
-    paths = spec.get("paths", {})
-    for path, methods in paths.items():
-        for method, op in methods.items():
-            yield path, method.lower(), op
-
-
-def generate_server(spec_path: str, output_dir: str) -> None:
-    """Generate a basic MCP proxy server, docs and tests from an OpenAPI spec."""
-    with open(spec_path, "r") as f:
-        spec = json.load(f)
+from typing import Any, Dict, List, Optional
+
+from .loader import load_spec_streaming
+from .manifest import Manifest, file_digest, source_digest
+from .operations import Operation, build_operations, iter_operations, sanitize  # noqa: F401
+from .resolver import resolve_spec
+from .sharding import render_parallel, shard_operations
+
+REQUIREMENTS = "fastapi\nuvicorn\nrequests\n"
+
+
+def generate_server(
+    spec_path: str,
+    output_dir: str,
+    force: bool = False,
+    streaming: bool = False,
+    shard_by: str = "tag",
+    shard_count: int = 16,
+    max_shard_operations: int = 500,
+    workers: Optional[int] = 1,
+) -> Dict[str, int]:
+    """Generate a basic MCP proxy server, docs and tests from an OpenAPI spec.
+
+    Unless ``force`` is set, operations and files unchanged since the previous
+    run in ``output_dir`` are neither re-rendered nor rewritten, and an
+    unchanged spec is not even loaded (see ``mcpgen.manifest``). With
+    ``streaming`` the spec is read incrementally and only the parts the
+    generator uses are kept (see ``mcpgen.loader``). Routes are written to one
+    module per shard (see ``mcpgen.sharding``), rendered by up to ``workers``
+    processes (``None`` for one per CPU), and ``server.py`` only assembles
+    them. Returns the counts of rendered and reused operations and written
+    and unchanged files.
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    generator_digest = source_digest(*(
+        sys.modules[module]
+        for module in (__name__, build_operations.__module__, resolve_spec.__module__,
+                       shard_operations.__module__, load_spec_streaming.__module__)
+    ))
+    inputs_digest = file_digest(spec_path, shard_by, shard_count, max_shard_operations)
+    manifest = Manifest(output_path, generator_digest, inputs_digest, force=force)
+    if manifest.up_to_date():
+        return manifest.summary()
+
+    if streaming:
+        spec = load_spec_streaming(spec_path)
+    else:
+        with open(spec_path, "r") as f:
+            spec = json.load(f)
+    # Every stage below works on the resolved spec
+    spec = resolve_spec(spec)
 
     base_url = ""
     servers = spec.get("servers")
     if servers and isinstance(servers, list):
         base_url = servers[0].get("url", "").rstrip("/")
 
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-
-    _generate_code(spec, base_url, output_path)
-    _generate_requirements(output_path)
-    _generate_docs(spec, output_path)
-    _generate_tests(spec, base_url, output_path)
-
-
-def _generate_code(spec: dict, base_url: str, out: Path) -> None:
-    server_file = out / "server.py"
-    with server_file.open("w") as f:
-        f.write("import os\nimport requests\nfrom fastapi import FastAPI\n\n")
-        f.write(f"BASE_URL = '{base_url}'\n")
-        f.write("app = FastAPI()\n\n")
-        f.write(
-            "def get_headers():\n"
-            "    token = os.environ.get('KM_ACCESS_KEY', '')\n"
-            "    return {'X-KM-AccessKey': f'Bearer {token}'}\n\n"
+    # One pass over the spec; the emitters below only read the operation table
+    operations = build_operations(spec)
+
+    keys = [f"{op.method} {op.path}" for op in operations]
+    digests = [op.digest() for op in operations]
+    fragments: List[Optional[Dict[str, str]]] = []
+    for key, digest in zip(keys, digests):
+        entry = manifest.fragments(key, digest)
+        if entry is not None:
+            manifest.reuse(key, digest)
+        fragments.append(entry)
+    pending = [index for index, entry in enumerate(fragments) if entry is None]
+    rendered = render_parallel(
+        _render_fragments, [operations[index] for index in pending], workers, prepare=Operation.pack
+    )
+    for index, entry in zip(pending, rendered):
+        manifest.store(keys[index], digests[index])
+        fragments[index] = entry
+
+    shards = shard_operations(operations, shard_by, shard_count, max_shard_operations)
+    manifest.write("common.py", _render_code_common(base_url))
+    for module, indexes in shards.items():
+        manifest.write_fragments(
+            f"{module}.py", _render_code_shard_header(), "code",
+            [keys[i] for i in indexes], [fragments[i]["code"] for i in indexes],
         )
-
-        for path, method, info in iter_operations(spec):
-            op_id = sanitize(info.get("operationId", f"{method}_{path}"))
-            path_params = [p["name"] for p in info.get("parameters", []) if p.get("in") == "path"]
-
-            params_sig = ", ".join(f"{p}: str" for p in path_params)
-            if params_sig:
-                params_sig += ", "
-            func_sig = f"{params_sig}data: dict | None = None, **query"
-
-            format_params = ", ".join(f"{p}={p}" for p in path_params)
-            if format_params:
-                format_params = f", {format_params}"
-
-            f.write(f"@app.{method}(\"{path}\")\n")
-            f.write(f"def {op_id}({func_sig}):\n")
-            f.write(f"    url = BASE_URL + \"{path}\".format({format_params.strip(', ')})\n")
-            f.write(f"    resp = requests.{method}(url, headers=get_headers(), params=query, json=data)\n")
-            f.write("    return resp.json()\n\n")
-
-
-def _generate_requirements(out: Path) -> None:
-    req_file = out / "requirements.txt"
-    with req_file.open("w") as f:
-        f.write("fastapi\nuvicorn\nrequests\n")
-
-
-def _generate_docs(spec: dict, out: Path) -> None:
-    readme_file = out / "README.md"
-    with readme_file.open("w") as f:
-        f.write("# Generated MCP Server\n\n")
-        f.write("## Setup\n\n")
-        f.write("```bash\n")
-        f.write("pip install -r requirements.txt\n")
-        f.write("export KM_ACCESS_KEY=<your-token>\n")
-        f.write("uvicorn server:app --reload\n")
-        f.write("```\n\n")
-        f.write("## Endpoints\n\n")
-        for path, method, info in iter_operations(spec):
-            summary = info.get("summary", "")
-            f.write(f"- **{method.upper()} {path}** - {summary}\n")
-
-
-def _generate_tests(spec: dict, base_url: str, out: Path) -> None:
-    test_file = out / "test_endpoints.py"
-    with test_file.open("w") as f:
-        f.write("import os\nimport requests\nimport json\n\n")
-        f.write(f"BASE_URL = '{base_url}'\n")
-        f.write("HEADERS = {'X-KM-AccessKey': f'Bearer {os.environ.get(\"KM_ACCESS_KEY\", \"\")}' }\n\n")
-        f.write("def run_tests(spec_path):\n")
-        f.write("    with open(spec_path, 'r') as fp:\n")
-        f.write("        spec = json.load(fp)\n")
-        f.write("    for path, methods in spec.get('paths', {}).items():\n")
-        f.write("        op = methods.get('get')\n")
-        f.write("        if not op:\n")
-        f.write("            continue\n")
-        f.write("        params = op.get('parameters', [])\n")
-        f.write("        required = [p for p in params if p.get('required')]\n")
-        f.write("        if required:\n")
-        f.write("            continue\n")
-        f.write("        url = BASE_URL + path\n")
-        f.write("        resp = requests.get(url, headers=HEADERS)\n")
-        f.write("        print(f'{path} -> {resp.status_code}')\n")
-        f.write("\n")
-        f.write("if __name__ == '__main__':\n")
-        f.write("    import sys\n")
-        f.write("    run_tests(sys.argv[1])\n")
-
+    manifest.write("server.py", _render_code_index(shards))
+    manifest.write("requirements.txt", REQUIREMENTS)
+    manifest.write_fragments("README.md", _render_docs_header(), "docs", keys, [entry["docs"] for entry in fragments])
+    manifest.write("test_endpoints.py", _render_tests(operations, base_url))
+    manifest.save()
+    return manifest.summary()
+
+
+def _render_fragments(operations: List[Any]) -> List[Dict[str, str]]:
+    # Top-level so that worker processes can run it; workers receive packed operations
+    fragments = []
+    for op in operations:
+        if isinstance(op, tuple):
+            op = Operation.unpack(op)
+        fragments.append({"code": _render_code_operation(op), "docs": _render_docs_operation(op)})
+    return fragments
+
+
+def _render_code_common(base_url: str) -> str:
+    return (
+        "import os\n\n"
+        f"BASE_URL = '{base_url}'\n\n"
+        "def get_headers():\n"
+        "    token = os.environ.get('KM_ACCESS_KEY', '')\n"
+        "    return {'X-KM-AccessKey': f'Bearer {token}'}\n"
+    )
+
+
+def _render_code_shard_header() -> str:
+    return (
+        "import requests\nfrom fastapi import APIRouter\n\n"
+        "from common import BASE_URL, get_headers\n\n"
+        "router = APIRouter()\n\n"
+    )
+
+
+def _render_code_index(shards: Dict[str, List[int]]) -> str:
+    imports = "".join(f"import {module}\n" for module in shards)
+    routers = "".join(f"app.include_router({module}.router)\n" for module in shards)
+    return f"from fastapi import FastAPI\n\n{imports}\napp = FastAPI()\n{routers}"
+
+
+def _render_code_operation(op: Operation) -> str:
+    path_params = [p.name for p in op.path_params]
+
+    params_sig = ", ".join(f"{p}: str" for p in path_params)
+    if params_sig:
+        params_sig += ", "
+    func_sig = f"{params_sig}data: dict | None = None, **query"
+
+    format_params = ", ".join(f"{p}={p}" for p in path_params)
+
+    return (
+        f"@router.{op.method}(\"{op.path}\")\n"
+        f"def {op.op_id}({func_sig}):\n"
+        f"    url = BASE_URL + \"{op.path}\".format({format_params})\n"
+        f"    resp = requests.{op.method}(url, headers=get_headers(), params=query, json=data)\n"
+        "    return resp.json()\n\n"
+    )
+
+
+def _render_docs_header() -> str:
+    return (
+        "# Generated MCP Server\n\n"
+        "## Setup\n\n"
+        "```bash\n"
+        "pip install -r requirements.txt\n"
+        "export KM_ACCESS_KEY=<your-token>\n"
+        "uvicorn server:app --reload\n"
+        "```\n\n"
+        "## Endpoints\n\n"
+    )
+
+
+def _render_docs_operation(op: Operation) -> str:
+    return f"- **{op.method.upper()} {op.path}** - {op.summary}\n"
+
+
+def _render_tests(operations: List[Operation], base_url: str) -> str:
+    # GET endpoints that can be called without arguments are smoke-tested
+    endpoints = "".join(
+        f"    {op.path!r},\n" for op in operations if op.method == "get" and not op.has_required_params
+    )
+    return (
+        "import os\nimport requests\n\n"
+        f"BASE_URL = '{base_url}'\n"
+        "HEADERS = {'X-KM-AccessKey': f'Bearer {os.environ.get(\"KM_ACCESS_KEY\", \"\")}' }\n\n"
+        f"ENDPOINTS = [\n{endpoints}]\n\n"
+        "def run_tests():\n"
+        "    for path in ENDPOINTS:\n"
+        "        url = BASE_URL + path\n"
+        "        resp = requests.get(url, headers=HEADERS)\n"
+        "        print(f'{path} -> {resp.status_code}')\n"
+        "\n"
+        "if __name__ == '__main__':\n"
+        "    run_tests()\n"
+    )
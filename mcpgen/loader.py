@@ -0,0 +1,205 @@
+"""
+Bounded-memory loading of very large OpenAPI specs.
+
+``load_spec_streaming`` never holds the whole document. A small scanner walks
+the outer levels of the file: the top-level object, ``paths``, and
+``components.<kind>``. Each path item or component is decoded on its own with
+the C JSON decoder, so only one of them is in memory at a time, plus whatever
+is kept:
+
+- path items are pruned to their own ``PATH_ITEM_FIELDS`` (including a
+  ``$ref`` to a shared path item, resolved later like any other reference)
+  and, per operation, the fields the operation table is built from
+  (``OPERATION_FIELDS``); responses, examples and descriptions are dropped;
+- components are kept only if a kept path item references them, directly or
+  through other components.
+
+Components referenced before they have been seen can only be found in a
+second pass. The first pass therefore records the references of every
+component it drops, and the second pass (needed only when such a component
+was dropped) loads exactly the missing ones. The references of dropped
+components are kept as (kind, name) pairs only.
+"""
+
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, IO, Iterator, Set, Tuple
+
+from .operations import HTTP_METHODS, OPERATION_FIELDS
+from .resolver import _local_refs, _unescape
+
+# Components that are looked up by name rather than by $ref
+ALWAYS_KEPT = ("securitySchemes",)
+
+# Fields of a path item kept besides its operations
+PATH_ITEM_FIELDS = ("$ref", "summary", "servers", "parameters")
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+ComponentKey = Tuple[str, str]
+
+
+class _Scanner:
+    """Pull scanner over a JSON text file, reading it in chunks."""
+
+    def __init__(self, f: IO[str], chunk_size: int = 1 << 20):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        if self._eof:
+            return False
+        data = self._f.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at end of input."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._fill(self._chunk_size):
+                return self._buffer[self._pos:self._pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON input, found {self.peek()!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value."""
+        self.peek()
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                value, end = None, -1
+            # A value ending exactly at the buffer end may be a truncated number or literal
+            if end != -1 and (end < len(self._buffer) or self._eof):
+                self._pos = end
+                return value
+            if not self._fill(size):
+                if end != -1:
+                    self._pos = end
+                    return value
+                raise ValueError("Truncated or invalid JSON input")
+            size *= 2
+
+    def key(self) -> str:
+        self.expect('"')
+        while True:
+            try:
+                key, end = scanstring(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(self._chunk_size):
+                    raise ValueError("Truncated JSON input") from None
+                continue
+            self._pos = end
+            self.expect(":")
+            return key
+
+    def members(self) -> Iterator[str]:
+        """Yield the keys of an object; the caller consumes each value before the next key."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            yield self.key()
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def _component(ref: str) -> ComponentKey:
+    """The component a local reference points into, e.g. ("schemas", "Pet")."""
+    tokens = ref[2:].split("/")
+    if len(tokens) < 3 or tokens[0] != "components":
+        return ("", "")
+    return (_unescape(tokens[1]), _unescape(tokens[2]))
+
+
+def _prune_path_item(item: Any) -> Any:
+    if not isinstance(item, dict):
+        return item
+    pruned = {}
+    for key, value in item.items():
+        if key in PATH_ITEM_FIELDS:
+            pruned[key] = value
+        elif key.lower() in HTTP_METHODS and isinstance(value, dict):
+            pruned[key] = {field: value[field] for field in OPERATION_FIELDS if field in value}
+    return pruned
+
+
+def _scan(
+    path: str,
+    keep_paths: bool,
+    wanted: Set[ComponentKey],
+    kept: Dict[str, Dict[str, Any]],
+    graph: Dict[ComponentKey, Set[ComponentKey]],
+) -> Dict[str, Any]:
+    """One pass over the file; returns the top-level document without paths and components."""
+    spec: Dict[str, Any] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        scanner = _Scanner(f)
+        for top in scanner.members():
+            if top == "paths":
+                paths: Dict[str, Any] = {}
+                for path_key in scanner.members():
+                    item = scanner.value()
+                    if keep_paths:
+                        item = paths[path_key] = _prune_path_item(item)
+                        wanted.update(_component(ref) for ref in _local_refs(item))
+                if keep_paths:
+                    spec["paths"] = paths
+            elif top == "components" and scanner.peek() == "{":
+                for kind in scanner.members():
+                    if scanner.peek() != "{":
+                        scanner.value()
+                        continue
+                    for name in scanner.members():
+                        component = scanner.value()
+                        refs = {_component(ref) for ref in _local_refs(component)}
+                        if kind in ALWAYS_KEPT or (kind, name) in wanted:
+                            kept.setdefault(kind, {})[name] = component
+                            wanted.update(refs)
+                        else:
+                            graph[(kind, name)] = refs
+            else:
+                value = scanner.value()
+                if keep_paths:
+                    spec[top] = value
+    return spec
+
+
+def load_spec_streaming(path: str) -> Dict[str, Any]:
+    """Load the parts of a spec needed to generate a server, without reading it whole."""
+    wanted: Set[ComponentKey] = set()
+    kept: Dict[str, Dict[str, Any]] = {}
+    graph: Dict[ComponentKey, Set[ComponentKey]] = {}
+    spec = _scan(path, True, wanted, kept, graph)
+
+    # Close the wanted set over the references of components dropped in the first pass
+    stack = list(wanted)
+    while stack:
+        for ref in graph.get(stack.pop(), ()):
+            if ref not in wanted:
+                wanted.add(ref)
+                stack.append(ref)
+    missing = {key for key in wanted if key in graph}
+    if missing:
+        _scan(path, False, missing, kept, {})
+
+    spec["components"] = kept
+    return spec
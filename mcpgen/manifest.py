@@ -0,0 +1,209 @@
+"""
+Manifest for incremental regeneration.
+
+The manifest (``.mcpgen-manifest.json`` in the output directory) records:
+
+- a hash of the generator's own source, so that a changed generator
+  invalidates everything;
+- a hash of the spec file and the options that shape the output;
+- per operation, a hash of the inputs its fragments are rendered from and
+  where each fragment sits in the output files (not the fragments themselves);
+- per output file, the sha256, size and mtime of the bytes last written.
+
+On the next run with the same generator, spec and options, and every output
+file still as written, nothing is loaded or rendered at all. Otherwise,
+operations whose hash is unchanged read their fragments back from the
+previous output files, as long as those files were not modified since.
+Output files whose new bytes match what is on disk are not rewritten, so
+their mtimes stay put and ``uvicorn --reload`` is not triggered. Files
+written by an earlier run but no longer produced are removed.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MANIFEST_NAME = ".mcpgen-manifest.json"
+MANIFEST_VERSION = 2
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: str, *extra: Any) -> str:
+    """Hash of a file's bytes and of any extra values."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    digest.update(repr(extra).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def source_digest(*modules: Any) -> str:
+    """Hash of the source files of the given modules."""
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Operation and file hashes of one output directory."""
+
+    def __init__(self, out: Path, generator_digest: str, inputs_digest: str, force: bool = False):
+        self.out = out
+        self.generator_digest = generator_digest
+        self.inputs_digest = inputs_digest
+        self.force = force
+        previous = self._load()
+        self._previous_files: Dict[str, Dict[str, Any]] = previous.get("files", {})
+        # Fragments are only trusted when written by this very generator
+        self._reusable = (
+            not force
+            and previous.get("version") == MANIFEST_VERSION
+            and previous.get("generator") == generator_digest
+        )
+        self._previous_inputs = previous.get("inputs")
+        self._previous_operations: Dict[str, Dict[str, Any]] = previous.get("operations", {}) if self._reusable else {}
+        self._previous_text: Dict[str, Optional[str]] = {}
+        self._operations: Dict[str, Dict[str, Any]] = {}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self.rendered = 0
+        self.reused = 0
+        self.written = 0
+        self.unchanged = 0
+        self.removed = 0
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with (self.out / MANIFEST_NAME).open("r") as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return previous if isinstance(previous, dict) else {}
+
+    def up_to_date(self) -> bool:
+        """Whether the previous run had the same inputs and left every file as written.
+
+        When it did, the output would be identical, so the caller can stop
+        before loading the spec. The counters then describe a run that reused
+        everything.
+        """
+        if not self._reusable or self._previous_inputs != self.inputs_digest or not self._previous_files:
+            return False
+        for name, recorded in self._previous_files.items():
+            if not self._on_disk(name, recorded.get("sha256"), recorded.get("size")):
+                return False
+        self.reused = len(self._previous_operations)
+        self.unchanged = len(self._previous_files)
+        return True
+
+    def _previous(self, name: str) -> Optional[str]:
+        """Text of an output file of the previous run, or None if it changed since."""
+        if name not in self._previous_text:
+            recorded = self._previous_files.get(name)
+            text = None
+            if recorded and self._on_disk(name, recorded.get("sha256"), recorded.get("size")):
+                text = (self.out / name).read_bytes().decode("utf-8")
+            self._previous_text[name] = text
+        return self._previous_text[name]
+
+    def fragments(self, key: str, digest: str) -> Optional[Dict[str, str]]:
+        """Read an operation's fragments back from the previous output if its inputs are unchanged."""
+        entry = self._previous_operations.get(key)
+        if entry is None or entry.get("hash") != digest:
+            return None
+        fragments = {}
+        for kind, location in entry.items():
+            if kind == "hash":
+                continue
+            name, start, end = location
+            text = self._previous(name)
+            if text is None:
+                return None
+            fragments[kind] = text[start:end]
+        self.reused += 1
+        return fragments
+
+    def store(self, key: str, digest: str) -> None:
+        self.rendered += 1
+        self._operations[key] = {"hash": digest}
+
+    def reuse(self, key: str, digest: str) -> None:
+        self._operations[key] = {"hash": digest}
+
+    def write_fragments(self, name: str, header: str, kind: str, keys: List[str], fragments: List[str]) -> bool:
+        """Write ``header`` followed by ``fragments`` and record where each one sits."""
+        offset = len(header)
+        for key, fragment in zip(keys, fragments):
+            self._operations[key][kind] = [name, offset, offset + len(fragment)]
+            offset += len(fragment)
+        return self.write(name, header + "".join(fragments))
+
+    def _on_disk(self, name: str, digest: Optional[str], size: Optional[int]) -> bool:
+        """Whether the file already holds bytes with this digest."""
+        path = self.out / name
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        if stat.st_size != size:
+            return False
+        recorded = self._previous_files.get(name)
+        if recorded and recorded.get("size") == stat.st_size and recorded.get("mtime_ns") == stat.st_mtime_ns:
+            return recorded.get("sha256") == digest
+        # Modified outside the generator (or no record): compare the bytes themselves
+        return _sha256(path.read_bytes()) == digest
+
+    def write(self, name: str, content: str) -> bool:
+        """Write an output file unless it already holds these bytes; return whether it was written."""
+        data = content.encode("utf-8")
+        digest = _sha256(data)
+        path = self.out / name
+        written = self.force or not self._on_disk(name, digest, len(data))
+        if written:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+            self.written += 1
+        else:
+            self.unchanged += 1
+        stat = path.stat()
+        self._files[name] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        return written
+
+    def save(self) -> None:
+        """Remove files no longer produced and write the manifest."""
+        for name in set(self._previous_files) - set(self._files):
+            if Path(name).is_absolute() or ".." in Path(name).parts:
+                continue
+            try:
+                (self.out / name).unlink()
+                self.removed += 1
+            except FileNotFoundError:
+                pass
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "generator": self.generator_digest,
+            "inputs": self.inputs_digest,
+            "operations": self._operations,
+            "files": self._files,
+        }
+        tmp = self.out / (MANIFEST_NAME + ".tmp")
+        # json.dumps uses the C encoder; json.dump to a file does not
+        tmp.write_text(json.dumps(manifest, separators=(",", ":"), sort_keys=True))
+        os.replace(tmp, self.out / MANIFEST_NAME)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "operations_rendered": self.rendered,
+            "operations_reused": self.reused,
+            "files_written": self.written,
+            "files_unchanged": self.unchanged,
+            "files_removed": self.removed,
+        }
@@ -0,0 +1,165 @@
+"""
+Intermediate representation of the operations in an OpenAPI spec.
+
+The spec is walked once. Each operation becomes a compact ``Operation``
+record with its name already sanitized, its parameters split by location and
+path-level parameters merged in. Names are interned, so the same parameter
+name or path in thousands of operations shares one string. Records hold the
+schemas of the (resolved) spec by reference and never copy them. Every
+emitter works from the resulting table.
+"""
+
+import hashlib
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Fields of an operation object that build_operations reads
+OPERATION_FIELDS = ("operationId", "summary", "tags", "parameters", "requestBody")
+
+_INVALID_CHARS = re.compile(r"[^0-9a-zA-Z_]+")
+
+
+def sanitize(name: str) -> str:
+    """Sanitize a string to be a valid Python identifier."""
+    name = _INVALID_CHARS.sub("_", name)
+    if not name:
+        name = "operation"
+    if name[0].isdigit():
+        name = f"_{name}"
+    return name
+
+
+def iter_operations(spec: dict) -> Iterable[Tuple[str, str, dict]]:
+    """Yield (path, method, operation) tuples from spec."""
+    paths = spec.get("paths", {})
+    for path, methods in paths.items():
+        for method, op in methods.items():
+            if method.lower() in HTTP_METHODS:
+                yield path, method.lower(), op
+
+
+class Parameter:
+    """One operation parameter."""
+
+    __slots__ = ("name", "location", "required", "schema")
+
+    def __init__(self, name: str, location: str, required: bool, schema: Optional[dict]):
+        self.name = name
+        self.location = location
+        self.required = required
+        self.schema = schema
+
+
+class Operation:
+    """One operation of the spec, ready for the emitters."""
+
+    __slots__ = (
+        "op_id", "method", "path", "summary", "tags",
+        "path_params", "query_params", "header_params", "request_body",
+    )
+
+    def __init__(
+        self,
+        op_id: str,
+        method: str,
+        path: str,
+        summary: str,
+        tags: Tuple[str, ...],
+        path_params: Tuple[Parameter, ...],
+        query_params: Tuple[Parameter, ...],
+        header_params: Tuple[Parameter, ...],
+        request_body: Optional[dict],
+    ):
+        self.op_id = op_id
+        self.method = method
+        self.path = path
+        self.summary = summary
+        self.tags = tags
+        self.path_params = path_params
+        self.query_params = query_params
+        self.header_params = header_params
+        self.request_body = request_body
+
+    def digest(self) -> str:
+        """Hash of the fields the emitters render (schemas are not rendered and not hashed)."""
+        params = tuple(
+            (p.name, p.location, p.required)
+            for p in self.path_params + self.query_params + self.header_params
+        )
+        fields = (self.op_id, self.method, self.path, self.summary, self.tags, params)
+        return hashlib.sha256(repr(fields).encode("utf-8")).hexdigest()
+
+    def pack(self) -> tuple:
+        """The rendered fields as plain tuples, much cheaper to pickle for worker processes."""
+        def rows(params: Tuple[Parameter, ...]) -> tuple:
+            return tuple((p.name, p.location, p.required) for p in params)
+
+        return (
+            self.op_id, self.method, self.path, self.summary, self.tags,
+            rows(self.path_params), rows(self.query_params), rows(self.header_params),
+        )
+
+    @classmethod
+    def unpack(cls, packed: tuple) -> "Operation":
+        """Rebuild an operation (without schemas) from ``pack()`` output."""
+        op_id, method, path, summary, tags, *groups = packed
+        path_params, query_params, header_params = (
+            tuple(Parameter(name, location, required, None) for name, location, required in rows) for rows in groups
+        )
+        return cls(op_id, method, path, summary, tags, path_params, query_params, header_params, None)
+
+    @property
+    def has_required_params(self) -> bool:
+        return any(p.required for p in self.path_params + self.query_params + self.header_params)
+
+
+def _parameters(raw: Iterable[Any], parameters: Dict[Tuple[str, str], Parameter]) -> None:
+    for p in raw:
+        if not isinstance(p, dict) or "name" not in p:
+            continue
+        location = sys.intern(p.get("in", "query"))
+        name = sys.intern(p["name"])
+        required = bool(p.get("required")) or location == "path"
+        parameters[(name, location)] = Parameter(name, location, required, p.get("schema"))
+
+
+def build_operations(spec: dict) -> List[Operation]:
+    """Build the operation table of a spec in document order."""
+    operations: List[Operation] = []
+    for path, item in spec.get("paths", {}).items():
+        if not isinstance(item, dict):
+            continue
+        path = sys.intern(path)
+        for method, info in item.items():
+            method = method.lower()
+            if method not in HTTP_METHODS or not isinstance(info, dict):
+                continue
+            # Operation-level parameters override path-level ones with the same name and location
+            parameters: Dict[Tuple[str, str], Parameter] = {}
+            _parameters(item.get("parameters", ()), parameters)
+            _parameters(info.get("parameters", ()), parameters)
+            by_location: Dict[str, List[Parameter]] = {"path": [], "query": [], "header": []}
+            for parameter in parameters.values():
+                by_location.setdefault(parameter.location, []).append(parameter)
+
+            body_schema = None
+            content = (info.get("requestBody") or {}).get("content") or {}
+            if content:
+                media = content.get("application/json") or next(iter(content.values()))
+                body_schema = media.get("schema") if isinstance(media, dict) else None
+
+            operations.append(Operation(
+                op_id=sys.intern(sanitize(info.get("operationId", f"{method}_{path}"))),
+                method=sys.intern(method),
+                path=path,
+                summary=info.get("summary", ""),
+                tags=tuple(sys.intern(tag) for tag in info.get("tags", ())),
+                path_params=tuple(by_location["path"]),
+                query_params=tuple(by_location["query"]),
+                header_params=tuple(by_location["header"]),
+                request_body=body_schema,
+            ))
+    return operations
@@ -0,0 +1,178 @@
+"""
+Resolution of local ``$ref`` references in an OpenAPI spec.
+
+Each referenced component is resolved once and memoized. Every reference to it
+is then replaced by the same resolved object, so shared subtrees are not
+copied. Subtrees without references are returned unchanged. Components are
+resolved in dependency order, which keeps the recursion depth bounded by the
+nesting of a single schema rather than by the length of a reference chain.
+
+References that take part in a cycle (found with Tarjan's strongly connected
+components algorithm) are not inlined. They stay ``{"$ref": ...}`` nodes
+pointing at their resolved component, so the result is acyclic and can be
+serialized.
+"""
+
+from typing import Any, Dict, List, Set
+
+
+def _escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _local_refs(node: Any) -> List[str]:
+    """Every local ``$ref`` inside a node, without duplicates."""
+    found: Dict[str, None] = {}
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            ref = current.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/"):
+                found[ref] = None
+            stack.extend(value for value in current.values() if isinstance(value, (dict, list)))
+        elif isinstance(current, list):
+            stack.extend(item for item in current if isinstance(item, (dict, list)))
+    return list(found)
+
+
+class RefResolver:
+    """Memoizing resolver of local references against one spec."""
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.cycles: Set[str] = set()
+        self._resolved: Dict[str, Any] = {}
+        self._targets: Dict[str, List[str]] = {}
+
+    def lookup(self, ref: str) -> Any:
+        """Return the unresolved node a local reference points at."""
+        node: Any = self.spec
+        try:
+            for token in ref[2:].split("/"):
+                token = _unescape(token)
+                node = node[int(token)] if isinstance(node, list) else node[token]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"Unresolvable $ref: {ref}") from None
+        return node
+
+    def _targets_of(self, ref: str) -> List[str]:
+        targets = self._targets.get(ref)
+        if targets is None:
+            targets = self._targets[ref] = _local_refs(self.lookup(ref))
+        return targets
+
+    def _prepare(self, roots: List[str]) -> None:
+        """Resolve every component reachable from ``roots``, dependencies first."""
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        stack: List[str] = []
+        on_stack: Set[str] = set()
+
+        def enter(ref: str) -> None:
+            index[ref] = lowlink[ref] = len(index)
+            stack.append(ref)
+            on_stack.add(ref)
+
+        for root in roots:
+            if root in self._resolved or root in index:
+                continue
+            enter(root)
+            work = [(root, iter(self._targets_of(root)))]
+            while work:
+                ref, targets = work[-1]
+                for target in targets:
+                    if target in self._resolved:
+                        continue
+                    if target not in index:
+                        enter(target)
+                        work.append((target, iter(self._targets_of(target))))
+                        break
+                    if target in on_stack:
+                        lowlink[ref] = min(lowlink[ref], index[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[ref])
+                    if lowlink[ref] != index[ref]:
+                        continue
+                    # ``ref`` roots a strongly connected component; every
+                    # component it depends on has been resolved already
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == ref:
+                            break
+                    if len(component) > 1 or ref in self._targets_of(ref):
+                        self.cycles.update(component)
+                    for member in reversed(component):
+                        self._resolved[member] = self._resolve(self.lookup(member))
+
+    def _resolve(self, node: Any) -> Any:
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str) and ref.startswith("#/"):
+                if ref in self.cycles:
+                    return node
+                target = self._resolved[ref]
+                if len(node) == 1 or not isinstance(target, dict):
+                    return target
+                # OpenAPI 3.1 allows keywords next to $ref; they override the target's
+                siblings = {key: self._resolve(value) for key, value in node.items() if key != "$ref"}
+                return {**target, **siblings}
+            resolved = None
+            for key, value in node.items():
+                if isinstance(value, (dict, list)):
+                    new = self._resolve(value)
+                    if new is not value:
+                        if resolved is None:
+                            resolved = dict(node)
+                        resolved[key] = new
+            return node if resolved is None else resolved
+        if isinstance(node, list):
+            items = None
+            for index, item in enumerate(node):
+                if isinstance(item, (dict, list)):
+                    new = self._resolve(item)
+                    if new is not item:
+                        if items is None:
+                            items = list(node)
+                        items[index] = new
+            return node if items is None else items
+        return node
+
+    def component(self, ref: str) -> Any:
+        """Return the resolved node a local reference points at, memoized."""
+        if ref not in self._resolved:
+            self._prepare([ref])
+        return self._resolved[ref]
+
+    def resolve(self, node: Any) -> Any:
+        """Return ``node`` with its local references resolved."""
+        self._prepare(_local_refs(node))
+        return self._resolve(node)
+
+
+def resolve_spec(spec: dict) -> dict:
+    """Return a copy of ``spec`` whose paths and components have their references resolved."""
+    resolver = RefResolver(spec)
+    resolved = dict(spec)
+    if "paths" in spec:
+        resolved["paths"] = resolver.resolve(spec["paths"])
+    if isinstance(spec.get("components"), dict):
+        # Components share the memoized objects the paths were resolved with
+        resolved["components"] = {
+            kind: {
+                name: resolver.component(f"#/components/{_escape(kind)}/{_escape(name)}")
+                for name in entries
+            } if isinstance(entries, dict) else entries
+            for kind, entries in spec["components"].items()
+        }
+    return resolved
@@ -0,0 +1,101 @@
+"""
+Sharding of generated server code and parallel rendering.
+
+Operations are split into shards, one generated module per shard:
+
+- ``tag``: one shard per first tag; untagged operations go to ``default``;
+- ``hash``: ``shard_count`` buckets by a CRC32 of method and path.
+
+Shards larger than ``max_shard_operations`` are split into numbered parts.
+Shard names and the order of operations within a shard depend only on the
+spec, never on the number of workers, so the output is deterministic.
+
+``render_parallel`` renders fragments in a process pool. Small batches are
+rendered in-process, because the pool's start-up cost would outweigh the work.
+"""
+
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from .operations import Operation, sanitize
+
+SHARD_STRATEGIES = ("tag", "hash")
+
+# With one worker per CPU, below this many items rendering stays in the current
+# process; an explicit worker count is always honoured
+PARALLEL_MIN_ITEMS = 5000
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _shard_name(op: Operation, shard_by: str, shard_count: int) -> str:
+    if shard_by == "hash":
+        bucket = zlib.crc32(f"{op.method} {op.path}".encode("utf-8")) % shard_count
+        return f"{bucket:0{len(str(shard_count - 1))}d}"
+    if op.tags:
+        return sanitize(op.tags[0]).strip("_").lower() or "default"
+    return "default"
+
+
+def shard_operations(
+    operations: Sequence[Operation],
+    shard_by: str = "tag",
+    shard_count: int = 16,
+    max_shard_operations: int = 500,
+) -> Dict[str, List[int]]:
+    """Map module names (``routes_<shard>``) to operation indexes, sorted by name."""
+    if shard_by not in SHARD_STRATEGIES:
+        raise ValueError(f"Unknown shard strategy {shard_by!r}; expected one of {', '.join(SHARD_STRATEGIES)}")
+    shard_count = max(shard_count, 1)
+    groups: Dict[str, List[int]] = {}
+    for index, op in enumerate(operations):
+        groups.setdefault(_shard_name(op, shard_by, shard_count), []).append(index)
+
+    shards: Dict[str, List[int]] = {}
+    for name in sorted(groups):
+        indexes = groups[name]
+        if len(indexes) <= max_shard_operations:
+            shards[f"routes_{name}"] = indexes
+            continue
+        parts = (len(indexes) + max_shard_operations - 1) // max_shard_operations
+        for part in range(parts):
+            chunk = indexes[part * max_shard_operations:(part + 1) * max_shard_operations]
+            shards[f"routes_{name}_{part + 1:0{len(str(parts))}d}"] = chunk
+    return shards
+
+
+def render_parallel(
+    render: Callable[[List[T]], List[R]],
+    items: List[T],
+    workers: Optional[int] = None,
+    prepare: Optional[Callable[[T], Any]] = None,
+) -> List[R]:
+    """Apply ``render`` (a picklable top-level function over a batch) to ``items``, keeping their order.
+
+    ``prepare`` is applied to each item before it is sent to a worker process,
+    e.g. to pack it into plain tuples that pickle faster; ``render`` must then
+    accept prepared items as well.
+
+    With ``workers=None`` (one per CPU) fewer than ``PARALLEL_MIN_ITEMS``
+    items are rendered in the current process, where starting a pool would
+    cost more than it saves.
+    """
+    if workers is None:
+        if len(items) < PARALLEL_MIN_ITEMS:
+            return render(items)
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(items))
+    if workers <= 1:
+        return render(items)
+    if prepare is not None:
+        items = [prepare(item) for item in items]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        size = -(-len(items) // (workers * 4))
+        batches = [items[start:start + size] for start in range(0, len(items), size)]
+        results: List[R] = []
+        for batch in pool.map(render, batches):
+            results.extend(batch)
+    return results
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# The server modules are flat and import each other by name
+sys.path.insert(0, os.path.join(ROOT, "constructor-mcp-server"))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from batch import BatchError, run_batch
+
+
+async def _echo(arguments):
+    return {"success": True, "data": arguments}
+
+
+HANDLERS = {"echo": _echo}
+
+
+def test_references_feed_later_calls():
+    result = asyncio.run(run_batch([
+        {"id": "first", "tool": "echo", "arguments": {"items": [{"id": 1}, {"id": 2}]}},
+        {"id": "each", "tool": "echo", "arguments": {"item": {"$ref": "first.data.items.*.id"}}},
+    ], HANDLERS))
+    assert result["success"]
+    assert [call["data"] for call in result["results"]["each"]["result"]] == [{"item": 1}, {"item": 2}]
+
+
+@pytest.mark.parametrize("calls, message", [
+    (["echo"], "Call 0 must be an object"),
+    ([{"tool": "echo", "arguments": ["x"]}], "Arguments of call '0' must be an object"),
+    ([{"id": "a", "tool": "echo"}, {"tool": "echo", "depends_on": "a"}], "depends_on of call '1'"),
+    ([{"tool": "missing"}], "Unknown tool"),
+])
+def test_malformed_calls_are_rejected(calls, message):
+    with pytest.raises(BatchError, match=message):
+        asyncio.run(run_batch(calls, HANDLERS))
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import httpx
+
+from breaker import CLOSED, HALF_OPEN, OPEN, BreakerClock, BreakerSettings, BreakerTransport, CircuitBreaker
+from limits import AdmissionController, LimitingTransport
+
+
+def _settings(**overrides):
+    values = {"min_calls": 4, "failure_rate": 0.5, "open_duration": 0.05, "half_open_max_calls": 1}
+    values.update(overrides)
+    return BreakerSettings(**values)
+
+
+def test_opens_on_failure_rate_and_closes_after_probe():
+    breaker = CircuitBreaker(_settings())
+    for failed in (False, True, False, True):
+        assert breaker.allow()
+        breaker.record(failed, 0.01)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # Only half_open_max_calls probes at a time
+    assert not breaker.allow()
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(_settings(min_calls=1))
+    breaker.allow()
+    breaker.record(True, 0.01)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, 0.01)
+    assert breaker.state == OPEN
+
+
+def test_abandoned_probe_frees_its_place():
+    breaker = CircuitBreaker(_settings(min_calls=1))
+    breaker.allow()
+    breaker.record(True, 0.01)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
+
+
+def test_untimed_calls_are_never_slow():
+    breaker = CircuitBreaker(_settings(slow_call_duration=0.0, slow_call_rate=0.5))
+    for _ in range(4):
+        breaker.allow()
+        breaker.record(False, None)
+    assert breaker.state == CLOSED
+
+
+def _chain(handler, controller, settings):
+    limited = LimitingTransport(BreakerClock(httpx.MockTransport(handler)), controller)
+    return BreakerTransport(limited, settings=settings)
+
+
+def test_open_breaker_fails_fast_without_admission():
+    async def main():
+        controller = AdmissionController(max_in_flight=1)
+        transport = _chain(lambda request: httpx.Response(500), controller, _settings(min_calls=1, open_duration=60))
+        request = httpx.Request("GET", "http://upstream/x", extensions={"operation": "op"})
+        response = await transport.handle_async_request(request)
+        await response.aclose()
+        assert response.status_code == 500
+
+        # Every slot is taken; an open breaker must not wait for one
+        await controller.acquire()
+        request = httpx.Request("GET", "http://upstream/x", extensions={"operation": "op"})
+        response = await asyncio.wait_for(transport.handle_async_request(request), 1)
+        assert response.status_code == 503
+        assert response.headers["X-Circuit-Open"] == "1"
+        assert controller.stats()["queued"] == 0
+
+    asyncio.run(main())
+
+
+def test_admission_wait_is_not_slow():
+    async def main():
+        controller = AdmissionController(max_in_flight=1)
+        settings = _settings(min_calls=1, slow_call_duration=0.05, slow_call_rate=0.5)
+        transport = _chain(lambda request: httpx.Response(200), controller, settings)
+
+        await controller.acquire()
+        request = httpx.Request("GET", "http://upstream/x", extensions={"operation": "op"})
+        call = asyncio.ensure_future(transport.handle_async_request(request))
+        await asyncio.sleep(0.1)
+        controller.release()
+        response = await call
+        await response.aclose()
+        assert request.extensions["breaker_duration"] < 0.05
+        assert transport.breaker_for("op").state == CLOSED
+
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+
+from cache import CachingTransport
+
+
+class _Upstream:
+    def __init__(self, etag=None):
+        self.requests = []
+        self.etag = etag
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.etag and request.headers.get("If-None-Match") == self.etag:
+            return httpx.Response(304)
+        headers = {"ETag": self.etag} if self.etag else {}
+        return httpx.Response(200, headers=headers, content=b"body %d" % len(self.requests))
+
+
+def _run(transport, *calls):
+    async def main():
+        bodies = []
+        for method, url in calls:
+            request = httpx.Request(method, url, extensions={"operation": "get_items"})
+            response = await transport.handle_async_request(request)
+            bodies.append(await response.aread())
+        return bodies
+    return asyncio.run(main())
+
+
+def _cache(upstream, **settings):
+    return CachingTransport(httpx.MockTransport(upstream), ttl={"get_items": 60}, **settings)
+
+
+def test_fresh_entries_are_served_from_the_cache():
+    upstream = _Upstream()
+    transport = _cache(upstream)
+    bodies = _run(transport, ("GET", "https://api.test/items"), ("GET", "https://api.test/items"))
+    assert bodies == [b"body 1", b"body 1"]
+    assert len(upstream.requests) == 1
+    assert transport.stats()["hits"] == 1
+
+
+def test_expired_entries_are_revalidated(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("cache.time.monotonic", lambda: now[0])
+    upstream = _Upstream(etag='"v1"')
+    transport = _cache(upstream)
+    _run(transport, ("GET", "https://api.test/items"))
+    now[0] += 61
+    assert _run(transport, ("GET", "https://api.test/items")) == [b"body 1"]
+    assert upstream.requests[-1].headers["If-None-Match"] == '"v1"'
+    assert transport.stats()["revalidated"] == 1
+
+
+def test_writes_invalidate_the_path_and_its_collection():
+    upstream = _Upstream()
+    transport = _cache(upstream)
+    _run(
+        transport,
+        ("GET", "https://api.test/items"),
+        ("GET", "https://api.test/items/1"),
+        ("GET", "https://api.test/other"),
+        ("PATCH", "https://api.test/items/1"),
+    )
+    assert transport.stats()["entries"] == 1
+    assert transport.stats()["invalidations"] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    upstream = _Upstream()
+    transport = _cache(upstream, max_entries=2)
+    _run(
+        transport,
+        ("GET", "https://api.test/a"),
+        ("GET", "https://api.test/b"),
+        ("GET", "https://api.test/a"),
+        ("GET", "https://api.test/c"),
+        ("GET", "https://api.test/a"),
+    )
+    assert [request.url.path for request in upstream.requests] == ["/a", "/b", "/c"]
+    assert transport.stats()["evictions"] == 1
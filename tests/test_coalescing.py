@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+import pytest
+
+from coalescing import CoalescingTransport
+
+
+class _Upstream(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def handle_async_request(self, request):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return httpx.Response(200, content=b"body %d" % self.calls)
+
+
+def _request():
+    return httpx.Request("GET", "https://api.test/items")
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_identical_requests_share_one_upstream_call():
+    async def main():
+        upstream = _Upstream()
+        transport = CoalescingTransport(upstream)
+        tasks = [asyncio.ensure_future(transport.handle_async_request(_request())) for _ in range(3)]
+        await _settle()
+        upstream.release.set()
+        responses = await asyncio.gather(*tasks)
+        return upstream, transport, [await response.aread() for response in responses]
+
+    upstream, transport, bodies = asyncio.run(main())
+    assert upstream.calls == 1
+    assert bodies == [b"body 1"] * 3
+    assert transport.stats()["coalesced"] == 2
+
+
+def test_cancelling_one_waiter_keeps_the_request_for_the_others():
+    async def main():
+        upstream = _Upstream()
+        transport = CoalescingTransport(upstream)
+        first = asyncio.ensure_future(transport.handle_async_request(_request()))
+        second = asyncio.ensure_future(transport.handle_async_request(_request()))
+        await _settle()
+        first.cancel()
+        await _settle()
+        upstream.release.set()
+        response = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return upstream, await response.aread()
+
+    upstream, body = asyncio.run(main())
+    assert (upstream.calls, upstream.cancelled) == (1, 0)
+    assert body == b"body 1"
+
+
+def test_last_waiter_leaving_cancels_the_upstream_request():
+    async def main():
+        upstream = _Upstream()
+        transport = CoalescingTransport(upstream)
+        task = asyncio.ensure_future(transport.handle_async_request(_request()))
+        await _settle()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await _settle()
+        return upstream, transport
+
+    upstream, transport = asyncio.run(main())
+    assert upstream.cancelled == 1
+    assert transport.stats()["in_flight"] == 0
+
+
+def test_waiter_of_an_abandoned_flight_starts_a_new_one():
+    async def main():
+        upstream = _Upstream()
+        transport = CoalescingTransport(upstream)
+        task = asyncio.ensure_future(transport.handle_async_request(_request()))
+        await _settle()
+        # As if every other waiter had gone away while this one was being scheduled
+        flight = next(iter(transport._flights.values()))
+        flight.abandoned = True
+        transport._forget(next(iter(transport._flights)), flight)
+        flight.task.cancel()
+        await _settle()
+        upstream.release.set()
+        response = await task
+        return upstream, await response.aread()
+
+    upstream, body = asyncio.run(main())
+    assert upstream.calls == 2
+    assert body == b"body 2"
@@ -0,0 +1,65 @@
+from compaction import Compactor
+from serialization import JsonSerializer
+
+
+def _compactor(**settings):
+    return Compactor(JsonSerializer(backend="json"), **settings)
+
+
+def _follow(compactor, cursor):
+    """Every part returned by following a chain of cursors for one cut."""
+    parts = []
+    while cursor is not None:
+        result = compactor.resume(cursor)
+        parts.append(result)
+        truncated = result.get("compaction", {}).get("truncated", [])
+        same = [cut for cut in truncated if cut["path"] == result["continuation"]["path"]]
+        cursor = same[0]["cursor"] if same else None
+    return parts
+
+
+def test_elided_string_can_be_continued():
+    compactor = _compactor(max_tokens=1000, max_string_chars=200)
+    text = "".join(chr(ord("a") + index % 26) for index in range(50_000))
+    result = compactor.compact("transcription", {"success": True, "data": {"transcription": text}})
+
+    cuts = result["compaction"]["truncated"]
+    assert [(cut["path"], cut["type"], cut["kept"], cut["total"]) for cut in cuts] == [
+        (["data", "transcription"], "string", 200, 50_000)
+    ]
+    parts = _follow(compactor, cuts[0]["cursor"])
+    assert parts[0]["continuation"]["offset"] == 200
+    assert text[:200] + "".join(part["data"] for part in parts) == text
+
+
+def test_every_cut_array_gets_a_cursor():
+    compactor = _compactor(max_tokens=300)
+    data = {"a": [{"id": index, "pad": "x" * 40} for index in range(50)], "b": [{"id": index, "pad": "y" * 40} for index in range(50)]}
+    result = compactor.compact("listing", {"success": True, "data": data})
+
+    cuts = {tuple(cut["path"]): cut for cut in result["compaction"]["truncated"]}
+    assert set(cuts) == {("data", "a"), ("data", "b")}
+    for key in ("a", "b"):
+        cut = cuts[("data", key)]
+        assert cut["kept"] == len(result["data"][key]) and cut["total"] == 50
+        items = list(result["data"][key])
+        for part in _follow(compactor, cut["cursor"]):
+            assert part["continuation"]["offset"] == len(items)
+            items.extend(part["data"])
+        assert items == data[key]
+
+
+def test_result_within_budget_is_unchanged():
+    compactor = _compactor()
+    result = {"success": True, "data": {"items": [1, 2, 3]}}
+    assert compactor.compact("small", result) is result
+
+
+def test_unknown_cursor():
+    compactor = _compactor()
+    try:
+        compactor.resume("nope.0")
+    except ValueError as e:
+        assert "nope.0" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
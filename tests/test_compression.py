@@ -0,0 +1,37 @@
+import asyncio
+import gzip
+
+import httpx
+
+from compression import CompressionTransport
+
+BODY = b"chunk text " * 500
+
+
+def _handler(request):
+    return httpx.Response(200, headers={"Content-Encoding": "gzip"}, content=gzip.compress(BODY))
+
+
+def _get(extensions, headers=None):
+    async def main():
+        transport = CompressionTransport(httpx.MockTransport(_handler))
+        request = httpx.Request("GET", "http://upstream/x", headers=headers, extensions=extensions)
+        response = await transport.handle_async_request(request)
+        raw = b"".join([chunk async for chunk in response.stream])
+        return request, response, raw
+
+    return asyncio.run(main())
+
+
+def test_responses_are_decoded():
+    request, response, raw = _get({})
+    assert "gzip" in request.headers["Accept-Encoding"]
+    assert "Content-Encoding" not in response.headers
+    assert raw == BODY
+
+
+def test_streamed_responses_keep_their_encoding():
+    request, response, raw = _get({"streaming": True}, {"Accept-Encoding": "identity"})
+    assert request.headers["Accept-Encoding"] == "identity"
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(raw) == BODY
@@ -0,0 +1,90 @@
+import asyncio
+import gzip
+import hashlib
+import os
+
+import httpx
+
+from downloads import SpoolDownloader, read_inline
+from plans import compile_plans
+
+PLAN = compile_plans({"file": {"method": "GET", "path": "/files/{file_id}"}})["file"]
+BODY = bytes(range(256)) * 40
+
+
+def _interrupted(data, fail_after):
+    async def stream():
+        yield data[:fail_after]
+        raise httpx.ReadError("connection reset")
+    return stream()
+
+
+def _run(handler, downloader, **kwargs):
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream") as client:
+            return await downloader.download(client, PLAN, "/files/1", {}, **kwargs)
+    return asyncio.run(main())
+
+
+def test_interrupted_download_resumes_with_range(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        headers = {"ETag": '"v1"', "X-Checksum-SHA256": hashlib.sha256(BODY).hexdigest()}
+        if len(requests) == 1:
+            return httpx.Response(200, headers={**headers, "Content-Length": str(len(BODY))}, content=_interrupted(BODY, 1024))
+        start = int(request.headers["Range"][len("bytes="):-1])
+        headers["Content-Range"] = f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"
+        return httpx.Response(206, headers=headers, content=BODY[start:])
+
+    download = _run(handler, SpoolDownloader(str(tmp_path), chunk_size=256))
+    assert all(request.headers["Accept-Encoding"] == "identity" for request in requests)
+    assert requests[1].headers["Range"] == "bytes=1024-"
+    assert requests[1].headers["If-Range"] == '"v1"'
+    with open(download.path, "rb") as handle:
+        assert handle.read() == BODY
+    assert download.size == len(BODY)
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(download.path)]
+
+
+def test_encoded_download_restarts_instead_of_resuming(tmp_path):
+    encoded = gzip.compress(BODY)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        # Upstream ignores Accept-Encoding: identity
+        headers = {"ETag": '"v1"', "Content-Encoding": "gzip"}
+        if len(requests) == 1:
+            return httpx.Response(200, headers=headers, content=_interrupted(encoded, len(encoded) // 2))
+        return httpx.Response(200, headers=headers, content=encoded)
+
+    download = _run(handler, SpoolDownloader(str(tmp_path), chunk_size=256))
+    assert "Range" not in requests[1].headers
+    with open(download.path, "rb") as handle:
+        assert handle.read() == BODY
+
+
+def test_inline_download_is_removed_from_spool(tmp_path):
+    def handler(request):
+        return httpx.Response(200, headers={"Content-Type": "text/plain"}, content=b"hello")
+
+    download = _run(handler, SpoolDownloader(str(tmp_path)), inline_max_bytes=1024)
+    assert read_inline(download) == "hello"
+    assert os.listdir(tmp_path) == []
+
+
+def test_concurrent_downloads_of_one_url(tmp_path):
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=BODY)
+
+    async def main():
+        downloader = SpoolDownloader(str(tmp_path), chunk_size=256)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://upstream") as client:
+            downloads = await asyncio.gather(*(downloader.download(client, PLAN, "/files/1", {}) for _ in range(4)))
+        assert [download.size for download in downloads] == [len(BODY)] * 4
+        assert downloader._locks == {}
+
+    asyncio.run(main())
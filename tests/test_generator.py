@@ -0,0 +1,77 @@
+import json
+
+from mcpgen.generator import generate_server
+from mcpgen.manifest import MANIFEST_NAME
+
+
+def _spec(summary="Get item"):
+    return {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {
+            f"/items{index}/{{item_id}}": {
+                "get": {
+                    "operationId": f"get-item-{index}",
+                    "summary": summary if index == 0 else f"Get item {index}",
+                    "tags": [f"group{index % 2}"],
+                    "parameters": [{"name": "item_id", "in": "path", "required": True, "schema": {"type": "string"}}],
+                },
+            }
+            for index in range(6)
+        },
+    }
+
+
+def _write(path, spec):
+    path.write_text(json.dumps(spec))
+
+
+def _outputs(directory):
+    return {path.name: path.read_bytes() for path in directory.iterdir() if path.name != MANIFEST_NAME}
+
+
+def test_unchanged_rerun_stops_at_the_manifest(tmp_path):
+    spec_path = tmp_path / "spec.json"
+    _write(spec_path, _spec())
+    out = tmp_path / "out"
+    first = generate_server(str(spec_path), str(out))
+    assert first["operations_rendered"] == 6
+    mtimes = {path.name: path.stat().st_mtime_ns for path in out.iterdir()}
+
+    second = generate_server(str(spec_path), str(out))
+    assert second["operations_rendered"] == 0
+    assert second["operations_reused"] == 6
+    assert second["files_written"] == 0
+    assert {path.name: path.stat().st_mtime_ns for path in out.iterdir()} == mtimes
+    # Fragments are read back from the output files, not stored in the manifest
+    assert "@router" not in (out / MANIFEST_NAME).read_text()
+
+
+def test_changed_operation_is_the_only_one_rendered(tmp_path):
+    spec_path = tmp_path / "spec.json"
+    _write(spec_path, _spec())
+    out = tmp_path / "out"
+    generate_server(str(spec_path), str(out))
+
+    _write(spec_path, _spec("Fetch one item"))
+    summary = generate_server(str(spec_path), str(out))
+    assert summary["operations_rendered"] == 1
+    assert summary["operations_reused"] == 5
+
+    forced = tmp_path / "forced"
+    generate_server(str(spec_path), str(forced), force=True)
+    assert _outputs(out) == _outputs(forced)
+
+
+def test_edited_output_is_rendered_again(tmp_path):
+    spec_path = tmp_path / "spec.json"
+    _write(spec_path, _spec())
+    out = tmp_path / "out"
+    generate_server(str(spec_path), str(out))
+    (out / "README.md").write_text("edited by hand\n")
+
+    summary = generate_server(str(spec_path), str(out))
+    assert summary["files_written"] == 1
+    forced = tmp_path / "forced"
+    generate_server(str(spec_path), str(forced), force=True)
+    assert _outputs(out) == _outputs(forced)
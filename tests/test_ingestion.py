@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+import pytest
+
+import ingestion
+from ingestion import ingest_batches, pack_batches
+from plans import RequestPlan
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://api.test")
+
+
+def _batches(count):
+    return pack_batches(((line, {"text": str(line)}) for line in range(1, count + 1)), max_count=1)
+
+
+def test_batches_are_sent_and_failures_reported():
+    sent = []
+
+    def handler(request):
+        sent.append(request.content)
+        if b'"3"' in request.content:
+            return httpx.Response(400, json={"message": "bad chunk"})
+        return httpx.Response(200, json={})
+
+    async def main():
+        async with _client(handler) as client:
+            return await ingest_batches(client, RequestPlan("op", "POST", "/chunks"), {}, _batches(5), concurrency=2)
+
+    report = asyncio.run(main())
+    assert len(sent) == 5
+    assert report.batches == 4
+    assert [failure["batch"] for failure in report.failed] == [2]
+
+
+def test_worker_failure_does_not_hang_the_producer(monkeypatch):
+    async def broken_progress(*args):
+        raise RuntimeError("progress channel closed")
+
+    monkeypatch.setattr(ingestion, "report_progress", broken_progress)
+
+    async def main():
+        async with _client(lambda request: httpx.Response(200, json={})) as client:
+            plan = RequestPlan("op", "POST", "/chunks")
+            await asyncio.wait_for(ingest_batches(client, plan, {}, _batches(50), concurrency=1), 5)
+
+    with pytest.raises(RuntimeError, match="progress channel closed"):
+        asyncio.run(main())
@@ -0,0 +1,66 @@
+import asyncio
+
+from limits import AdmissionController
+
+
+def test_cancel_while_queued_then_release():
+    async def main():
+        controller = AdmissionController(max_in_flight=1)
+        await controller.acquire()
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        queued.cancel()
+        # Released before the cancelled caller has run its cleanup
+        controller.release()
+        try:
+            await queued
+        except asyncio.CancelledError:
+            pass
+        else:
+            raise AssertionError("acquire() was not cancelled")
+        assert controller.in_flight == 0
+        assert controller.stats()["queue_depth"] == 0
+        await asyncio.wait_for(controller.acquire(), 1)
+        assert controller.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_cancel_after_admission_returns_slot():
+    async def main():
+        controller = AdmissionController(max_in_flight=1)
+        await controller.acquire()
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        # Admitted by the release, then cancelled before it resumes
+        controller.release()
+        queued.cancel()
+        try:
+            await queued
+        except asyncio.CancelledError:
+            pass
+        assert queued.cancelled()
+        assert controller.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_fifo_order():
+    async def main():
+        controller = AdmissionController(max_in_flight=1)
+        await controller.acquire()
+        order = []
+
+        async def caller(name):
+            await controller.acquire()
+            order.append(name)
+            controller.release()
+
+        tasks = [asyncio.ensure_future(caller(name)) for name in "abc"]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*tasks)
+        assert order == ["a", "b", "c"]
+        assert controller.in_flight == 0
+
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+from mcpgen.generator import generate_server
+from mcpgen.loader import load_spec_streaming
+from mcpgen.manifest import MANIFEST_NAME
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "..", "openapi-example.json")
+
+COMPONENTS = {
+    "parameters": {"ItemId": {"name": "item_id", "in": "path", "required": True, "schema": {"$ref": "#/components/schemas/Id"}}},
+    "schemas": {
+        "Id": {"type": "string"},
+        "Item": {"type": "object", "properties": {"id": {"$ref": "#/components/schemas/Id"}}},
+        "Unused": {"type": "object"},
+    },
+}
+PATHS = {
+    "/items/{item_id}": {
+        "parameters": [{"$ref": "#/components/parameters/ItemId"}],
+        "get": {
+            "operationId": "get-item",
+            "summary": "Get item",
+            "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}},
+            "responses": {"200": {"description": "An item"}},
+        },
+    },
+}
+
+
+def _outputs(directory):
+    return {name: (directory / name).read_bytes() for name in os.listdir(directory) if name != MANIFEST_NAME}
+
+
+@pytest.mark.parametrize("components_first", [True, False])
+def test_only_referenced_components_are_kept(tmp_path, components_first):
+    spec = {"openapi": "3.0.0"}
+    if components_first:
+        spec.update(components=COMPONENTS, paths=PATHS)
+    else:
+        spec.update(paths=PATHS, components=COMPONENTS)
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(spec, indent=2))
+
+    loaded = load_spec_streaming(str(path))
+    assert loaded["components"] == {
+        "parameters": COMPONENTS["parameters"],
+        "schemas": {"Id": COMPONENTS["schemas"]["Id"], "Item": COMPONENTS["schemas"]["Item"]},
+    }
+    assert "responses" not in loaded["paths"]["/items/{item_id}"]["get"]
+
+
+def test_streaming_and_in_memory_loading_generate_the_same_server(tmp_path):
+    generate_server(EXAMPLE, str(tmp_path / "memory"), force=True)
+    generate_server(EXAMPLE, str(tmp_path / "stream"), force=True, streaming=True)
+    assert _outputs(tmp_path / "memory") == _outputs(tmp_path / "stream")
@@ -0,0 +1,26 @@
+from plans import RequestPlan
+
+
+def test_arguments_are_split_by_location():
+    plan = RequestPlan("op", "GET", "/models/{model_id}/chunks", query=["offset", "limit", "sort"], header=["X-Trace"])
+    url, params, headers, body = plan.build({
+        "model_id": "a b", "sort": "index", "X-Trace": "1", "body": {"k": 1}, "unknown": "q",
+    })
+    assert url == "/models/a%20b/chunks"
+    assert params == {"sort": "index", "unknown": "q"}
+    assert headers["X-Trace"] == "1"
+    assert body == {"k": 1}
+
+
+def test_control_arguments_are_never_sent():
+    plan = RequestPlan("op", "GET", "/items", query=["offset", "limit"], controls=["dry_run"])
+    _, params, _, _ = plan.build({"limit": 10, "all_pages": False, "max_items": 5, "max_bytes": 100, "dry_run": True})
+    assert params == {"limit": 10}
+
+
+def test_api_key_is_read_at_build_time(monkeypatch):
+    plan = RequestPlan("op", "GET", "/items")
+    monkeypatch.setenv("API_KEY", "first")
+    assert plan.build({}).headers["X-KM-AccessKey"] == "Bearer first"
+    monkeypatch.setenv("API_KEY", "second")
+    assert plan.build({}).headers["X-KM-AccessKey"] == "Bearer second"
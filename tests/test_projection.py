@@ -0,0 +1,18 @@
+from projection import Projection
+
+
+def _project(fields, data):
+    return Projection(fields).apply({"success": True, "data": data})["data"]
+
+
+def test_overlapping_fields_are_merged():
+    data = {"a": {"b": 1, "c": 2}, "tags": ["x", "y"], "id": 7}
+    assert _project(["a", "a.b"], data) == {"a": {"b": 1, "c": 2}}
+    assert _project(["a.b", "a"], data) == {"a": {"b": 1, "c": 2}}
+    assert _project("tags,tags.name,id", data) == {"tags": ["x", "y"], "id": 7}
+    assert data == {"a": {"b": 1, "c": 2}, "tags": ["x", "y"], "id": 7}
+
+
+def test_sibling_fields_share_their_parent():
+    data = {"results": [{"a": {"b": 1, "c": 2, "d": 3}}], "total": 1}
+    assert _project(["a.b", "a.c"], data) == {"results": [{"a": {"b": 1, "c": 2}}], "total": 1}
@@ -0,0 +1,56 @@
+import copy
+import json
+
+import pytest
+
+from mcpgen.resolver import RefResolver, resolve_spec
+
+
+def _spec():
+    return {
+        "paths": {
+            "/a": {"get": {"responses": {"200": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}}}},
+            "/b": {"get": {"responses": {"200": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}}}}},
+        },
+        "components": {
+            "schemas": {
+                "Item": {"type": "object", "properties": {"tag": {"$ref": "#/components/schemas/Tag"}}},
+                "Tag": {"type": "string"},
+                "Node": {"type": "object", "properties": {"children": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}}}},
+                "a/b": {"type": "integer"},
+            },
+        },
+    }
+
+
+def _schema(spec, path):
+    return spec["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+
+def test_references_resolve_to_one_shared_object():
+    spec = _spec()
+    original = copy.deepcopy(spec)
+    resolved = resolve_spec(spec)
+    assert _schema(resolved, "/a") == {"type": "object", "properties": {"tag": {"type": "string"}}}
+    assert _schema(resolved, "/a") is _schema(resolved, "/b")
+    assert _schema(resolved, "/a") is resolved["components"]["schemas"]["Item"]
+    assert spec == original
+
+
+def test_cyclic_references_stay_references():
+    resolved = resolve_spec(_spec())
+    node = resolved["components"]["schemas"]["Node"]
+    assert node["properties"]["children"]["items"] == {"$ref": "#/components/schemas/Node"}
+    json.dumps(resolved)
+
+
+def test_sibling_keywords_override_the_target():
+    resolver = RefResolver(_spec())
+    assert resolver.resolve({"$ref": "#/components/schemas/Tag", "description": "x"}) == {"type": "string", "description": "x"}
+
+
+def test_escaped_and_unresolvable_references():
+    resolver = RefResolver(_spec())
+    assert resolver.component("#/components/schemas/a~1b") == {"type": "integer"}
+    with pytest.raises(ValueError, match="Unresolvable"):
+        resolver.resolve({"$ref": "#/components/schemas/Missing"})
@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+
+from retry import RetryBudget, RetryPolicy, RetryTransport, parse_retry_after
+
+
+def _upstream(statuses, seen):
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(statuses[min(len(seen), len(statuses)) - 1], headers={"Retry-After": "0"})
+    return httpx.MockTransport(handler)
+
+
+def _send(transport, method="GET", extensions=None):
+    async def main():
+        request = httpx.Request(method, "https://api.test/items", extensions=extensions or {})
+        return (await transport.handle_async_request(request)).status_code
+    return asyncio.run(main())
+
+
+def test_transient_statuses_are_retried_until_success():
+    seen = []
+    transport = RetryTransport(_upstream([503, 502, 200], seen), policy=RetryPolicy(backoff_base=0))
+    assert _send(transport) == 200
+    assert len(seen) == 3
+    assert transport.stats()["retries"] == 2
+
+
+def test_budget_caps_retries_across_requests():
+    budget = RetryBudget(ratio=0.5, min_per_second=0, window=60)
+    seen = []
+    transport = RetryTransport(_upstream([503], seen), policy=RetryPolicy(max_attempts=5, backoff_base=0), budget=budget)
+    statuses = [_send(transport) for _ in range(4)]
+    assert statuses == [503] * 4
+    # Each request may add half a retry: 4 requests allow 2 retries in total
+    assert transport.stats()["retries"] == 2
+    assert len(seen) == 6
+    assert transport.stats()["budget_exhausted"] == 4
+
+
+def test_budget_refills_after_the_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("retry.time.monotonic", lambda: now[0])
+    budget = RetryBudget(ratio=0, min_per_second=0.1, window=10)
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    now[0] += 11
+    assert budget.try_acquire()
+
+
+def test_non_idempotent_and_streamed_requests_are_not_retried():
+    seen = []
+    transport = RetryTransport(_upstream([503, 200], seen), policy=RetryPolicy(backoff_base=0))
+    assert _send(transport, method="POST") == 503
+    seen.clear()
+    assert _send(transport, extensions={"streaming": True}) == 503
+    assert transport.stats()["retries"] == 0
+
+
+def test_retry_after_is_parsed_as_seconds_or_date():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
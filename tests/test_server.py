@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+server = pytest.importorskip("server")
+
+
+def test_previous_tool_names_reach_the_single_item_tools(monkeypatch):
+    calls = []
+
+    def record(name):
+        async def handler(arguments):
+            calls.append(name)
+            return {}
+        return handler
+
+    for name, (argument, target) in server.LEGACY_TOOL_ROUTES.items():
+        route = server._route_legacy(record(name), argument, record(target))
+        asyncio.run(route({argument: "x"}))
+        asyncio.run(route({}))
+        assert calls[-2:] == [target, name]
+
+
+def test_previous_tool_names_stay_registered():
+    for name, (_, target) in server.LEGACY_TOOL_ROUTES.items():
+        assert name in server.TOOL_HANDLERS
+        assert target in server.TOOL_HANDLERS
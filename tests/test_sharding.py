@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from mcpgen import sharding
+from mcpgen.sharding import render_parallel
+
+
+def _double(items):
+    return [item * 2 for item in items]
+
+
+def _pools(monkeypatch):
+    pools = []
+
+    def pool(max_workers):
+        pools.append(max_workers)
+        return ThreadPoolExecutor(max_workers)
+
+    monkeypatch.setattr(sharding, "ProcessPoolExecutor", pool)
+    return pools
+
+
+def test_explicit_workers_are_honoured_below_the_threshold(monkeypatch):
+    pools = _pools(monkeypatch)
+    items = list(range(100))
+    assert render_parallel(_double, items, workers=4) == [item * 2 for item in items]
+    assert pools == [4]
+
+
+def test_one_per_cpu_stays_in_process_below_the_threshold(monkeypatch):
+    pools = _pools(monkeypatch)
+    assert render_parallel(_double, [1, 2, 3], workers=None) == [2, 4, 6]
+    assert render_parallel(_double, [1, 2, 3], workers=1) == [2, 4, 6]
+    assert pools == []